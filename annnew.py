@@ -0,0 +1,202 @@
+# annnew.py - Approximate nearest-neighbour (IVF) index for the Good Prompts DB
+#
+# Pure NumPy inverted-file index: embeddings ko spherical k-means se `nlist`
+# clusters mein baanta jaata hai, aur query sirf `nprobe` sabse nazdeek clusters
+# ko scan karti hai. Index sirf row ids rakhta hai; vectors hamesha shared
+# memmap (ExampleIndex.embeddings) se padhe jaate hain, isliye memory flat rehti hai.
+import os
+import numpy as np
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# --- Configuration ---
+ANN_INDEX_PATH = os.getenv("HISSAB_ANN_INDEX_PATH", "hissab_ann.npz")
+ANN_NPROBE = int(os.getenv("HISSAB_ANN_NPROBE", "8"))
+ANN_MIN_ROWS = int(os.getenv("HISSAB_ANN_MIN_ROWS", "20000"))  # isse kam rows par exact search hi tez hai
+ANN_MAX_LISTS = 4096
+ANN_TRAIN_POINTS_PER_LIST = 24
+ANN_TRAIN_ITERATIONS = 8
+ANN_RETRAIN_GROWTH = 4.0  # rows itne guna badh jaayein to clusters dobara train karo
+_ASSIGN_CHUNK = 16384
+
+
+class GrowableArray:
+    """Amortized O(1) append wala 1-D NumPy array (capacity doubling)."""
+    __slots__ = ("data", "size")
+
+    def __init__(self, dtype=np.int64, initial=None, fill=0):
+        initial = np.asarray(initial if initial is not None else [], dtype=dtype)
+        self.data = np.full(max(16, len(initial) * 2), fill, dtype=dtype)
+        self.data[:len(initial)] = initial
+        self.size = len(initial)
+
+    def _reserve(self, capacity: int, fill=0):
+        if capacity > len(self.data):
+            grown = np.full(max(capacity, len(self.data) * 2), fill, dtype=self.data.dtype)
+            grown[:self.size] = self.data[:self.size]
+            self.data = grown
+
+    def append(self, value):
+        self._reserve(self.size + 1)
+        self.data[self.size] = value
+        self.size += 1
+
+    def extend(self, values):
+        values = np.asarray(values, dtype=self.data.dtype)
+        self._reserve(self.size + len(values))
+        self.data[self.size:self.size + len(values)] = values
+        self.size += len(values)
+
+    def set_at(self, positions, values, fill=0):
+        """positions par values likho; zaroorat ho to array ko `fill` se badhao."""
+        positions = np.asarray(positions, dtype=np.int64)
+        if not len(positions):
+            return
+        end = int(positions.max()) + 1
+        self._reserve(end, fill)
+        if end > self.size:
+            self.data[self.size:end] = fill
+            self.size = end
+        self.data[positions] = values
+
+    def view(self) -> np.ndarray:
+        return self.data[:self.size]
+
+
+def normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def _nearest_centroid(vectors: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    """Har (normalized) vector ke liye sabse nazdeek centroid, chunks mein taaki memory na phate."""
+    out = np.empty(len(vectors), dtype=np.int32)
+    for start in range(0, len(vectors), _ASSIGN_CHUNK):
+        chunk = normalize_rows(vectors[start:start + _ASSIGN_CHUNK])
+        out[start:start + len(chunk)] = np.argmax(chunk @ centroids.T, axis=1)
+    return out
+
+
+def _spherical_kmeans(data: np.ndarray, nlist: int, iterations: int, rng) -> np.ndarray:
+    centroids = data[rng.choice(len(data), nlist, replace=False)].copy()
+    for _ in range(iterations):
+        assign = _nearest_centroid(data, centroids)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assign, data)
+        counts = np.bincount(assign, minlength=nlist)
+        empty = counts == 0
+        if empty.any():
+            # Khaali clusters ko random points se dobara shuru karo
+            sums[empty] = data[rng.choice(len(data), int(empty.sum()), replace=False)]
+        centroids = normalize_rows(sums)
+    return centroids
+
+
+class IVFIndex:
+    """Inverted-file ANN index over row ids; vectors caller ke matrix se aate hain."""
+
+    def __init__(self, centroids: np.ndarray, nprobe: int = ANN_NPROBE):
+        self.centroids = np.ascontiguousarray(centroids, dtype=np.float32)
+        self.nprobe = nprobe
+        self.lists = [GrowableArray(np.int64) for _ in range(len(self.centroids))]
+        self.assign = GrowableArray(np.int32, fill=-1)  # emb_row -> list number (-1 = index mein nahi)
+        self.trained_rows = 0
+
+    @property
+    def nlist(self) -> int:
+        return len(self.centroids)
+
+    def __len__(self) -> int:
+        return sum(lst.size for lst in self.lists)
+
+    @staticmethod
+    def suggested_nlist(num_rows: int) -> int:
+        return int(np.clip(4 * np.sqrt(max(num_rows, 1)), 16, ANN_MAX_LISTS))
+
+    @classmethod
+    def train(cls, matrix: np.ndarray, nlist: int = None, seed: int = 0, nprobe: int = ANN_NPROBE) -> "IVFIndex":
+        """matrix (memmap bhi chalega) ke sample par clusters train karo."""
+        rng = np.random.default_rng(seed)
+        nlist = min(nlist or cls.suggested_nlist(len(matrix)), len(matrix))
+        sample_size = min(len(matrix), nlist * ANN_TRAIN_POINTS_PER_LIST)
+        sample_rows = np.sort(rng.choice(len(matrix), sample_size, replace=False))
+        sample = normalize_rows(matrix[sample_rows])
+        index = cls(_spherical_kmeans(sample, nlist, ANN_TRAIN_ITERATIONS, rng), nprobe=nprobe)
+        index.trained_rows = len(matrix)
+        return index
+
+    def add(self, row_ids, vectors: np.ndarray):
+        """Nayi rows ko incremental taur par unke nazdeeki cluster mein daalo."""
+        row_ids = np.asarray(row_ids, dtype=np.int64)
+        if not len(row_ids):
+            return
+        lists = _nearest_centroid(vectors, self.centroids)
+        self._insert(row_ids, lists)
+
+    def _insert(self, row_ids: np.ndarray, lists: np.ndarray):
+        self.assign.set_at(row_ids, lists, fill=-1)
+        order = np.argsort(lists, kind="stable")
+        sorted_lists = lists[order]
+        boundaries = np.flatnonzero(np.diff(sorted_lists)) + 1
+        for group in np.split(order, boundaries):
+            self.lists[int(lists[group[0]])].extend(row_ids[group])
+
+    def add_all(self, matrix: np.ndarray, start: int = 0):
+        """matrix ki saari rows (start se aage) index karo."""
+        for begin in range(start, len(matrix), _ASSIGN_CHUNK * 4):
+            end = min(begin + _ASSIGN_CHUNK * 4, len(matrix))
+            self.add(np.arange(begin, end), matrix[begin:end])
+
+    def candidates(self, query: np.ndarray, nprobe: int = None) -> np.ndarray:
+        """Query ke nprobe nazdeeki clusters ki saari row ids (sorted, memmap locality ke liye)."""
+        nprobe = min(nprobe or self.nprobe, self.nlist)
+        scores = self.centroids @ query
+        probe = np.argpartition(-scores, nprobe - 1)[:nprobe] if nprobe < self.nlist else np.arange(self.nlist)
+        parts = [self.lists[i].view() for i in probe if self.lists[i].size]
+        if not parts:
+            return np.empty(0, dtype=np.int64)
+        return np.sort(np.concatenate(parts))
+
+    # --- Persistence ---
+    def save(self, path: str = ANN_INDEX_PATH, generation: int = 0):
+        tmp_path = path + ".tmp.npz"
+        np.savez(tmp_path, centroids=self.centroids, assign=self.assign.view(),
+                 trained_rows=self.trained_rows, generation=generation)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str = ANN_INDEX_PATH, generation: int = 0, dim: int = None, nprobe: int = ANN_NPROBE):
+        """Saved index load karo; generation/dim match na kare to None."""
+        if not os.path.exists(path):
+            return None
+        try:
+            with np.load(path) as data:
+                if int(data["generation"]) != generation:
+                    return None
+                if dim is not None and data["centroids"].shape[1] != dim:
+                    return None
+                index = cls(data["centroids"], nprobe=nprobe)
+                index.trained_rows = int(data["trained_rows"])
+                assign = data["assign"]
+        except (OSError, KeyError, ValueError) as e:
+            print(f"ANN index load nahi ho paaya, dobara banega: {e}")
+            return None
+        indexed = np.flatnonzero(assign >= 0)
+        index._insert(indexed, assign[indexed])
+        return index
+
+
+def exact_top_k(matrix: np.ndarray, inv_norms: np.ndarray, query: np.ndarray, row_ids: np.ndarray, k: int):
+    """Diye gaye row_ids par brute-force cosine top-k: (row_ids, scores), best pehle."""
+    if not len(row_ids):
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+    scores = (matrix[row_ids] @ query) * inv_norms[row_ids]
+    if len(scores) > k:
+        top = np.argpartition(-scores, k - 1)[:k]
+    else:
+        top = np.arange(len(scores))
+    top = top[np.argsort(-scores[top])]
+    return row_ids[top], scores[top]
@@ -1,140 +1,167 @@
-import streamlit as st
-import speech_recognition as sr
-from streamlit_mic_recorder import mic_recorder
-import os
-import io
-from pydub import AudioSegment
-
-# Naye advanced logic wali main file ko import karein
-import main3 as main
-
-# ---------------------------
-# Streamlit App UI Setup
-# ---------------------------
-st.set_page_config(page_title="💰 Hissab Assistant", layout="centered")
-st.title("💰 Hissab Assistant (Optimized & Fixed)")
-st.caption("AI-powered financial calculator with a self-improving feedback loop.")
-
-# --- Session State Initialization ---
-if 'hindi_story' not in st.session_state:
-    st.session_state.hindi_story = ""
-if 'hinglish_story' not in st.session_state:
-    st.session_state.hinglish_story = ""
-if 'category' not in st.session_state:
-    st.session_state.category = ""
-if 'detailed_text' not in st.session_state:
-    st.session_state.detailed_text = ""
-if 'feedback_given' not in st.session_state:
-    st.session_state.feedback_given = False
-if 'error_analysis' not in st.session_state:
-    st.session_state.error_analysis = None
-if 'processing_complete' not in st.session_state:
-    st.session_state.processing_complete = False
-
-# --- Feedback Callback Functions ---
-def handle_good_feedback():
-    # 'context' object ki ab zaroorat nahi, seedhe state se values bhejenge
-    main.save_good_prompt(st.session_state.hinglish_story, st.session_state.category, st.session_state.detailed_text)
-    st.toast("✅ Shukriya! Isse system aur behtar hoga.")
-    st.session_state.feedback_given = True
-
-def handle_bad_feedback():
-    api_key = os.getenv("GOOGLE_API_KEY")
-    # Structured logging ke liye zaroori jaankari pass karein
-    context = {
-        "user_hindi_query": st.session_state.hindi_story,
-        "hinglish_story": st.session_state.hinglish_story,
-        "primary_category": st.session_state.category
-    }
-    main.save_bad_prompt(context, st.session_state.detailed_text)
-    with st.spinner("Galti ka vishleshan kiya ja raha hai..."):
-        analysis = main.analyze_bad_response(api_key, context, st.session_state.detailed_text)
-        st.session_state.error_analysis = analysis
-    st.toast(f"📝 Galti: {analysis}" if analysis else "📝 Feedback ke liye shukriya.")
-    st.session_state.feedback_given = True
-
-# --- Input Section (Audio code is unchanged) ---
-mode = st.radio("Aap input kaise dena chahte hain:", ["🎤 Voice", "⌨️ Text"], horizontal=True)
-user_story_input = None
-
-if mode == "🎤 Voice":
-    st.write("Niche diye gaye button par click karke apni aawaz record karein.")
-    audio_info = mic_recorder(start_prompt="▶️ Record", stop_prompt="⏹️ Stop", key='recorder')
-    if audio_info and audio_info['bytes']:
-        st.info("Audio record ho gaya hai. Ab process kiya ja raha hai...")
-        st.audio(audio_info['bytes'])
-        recognizer = sr.Recognizer()
-        converted_audio_path = "audio_converted.wav"
-        try:
-            sound = AudioSegment.from_file(io.BytesIO(audio_info['bytes']))
-            sound.export(converted_audio_path, format="wav")
-            with sr.AudioFile(converted_audio_path) as source:
-                audio_data = recognizer.record(source)
-            recognized_text = recognizer.recognize_google(audio_data, language='hi-IN')
-            st.success(f"📝 Aapne kaha: {recognized_text}")
-            user_story_input = recognized_text
-        except Exception as e:
-            st.error(f"Audio process karte samay error aaya: {e}")
-        finally:
-            if os.path.exists(converted_audio_path):
-                os.remove(converted_audio_path)
-else:
-    user_story_input = st.text_area("Apni kahani yahan likhiye:", placeholder="Example: Mere paas 500 rupaye the...")
-
-# --- Core Logic: Optimized Processing (FIXED) ---
-if user_story_input and user_story_input != st.session_state.hindi_story:
-    # Naye input aane par state reset karein
-    st.session_state.hindi_story = user_story_input
-    st.session_state.feedback_given = False
-    st.session_state.detailed_text = ""
-    st.session_state.error_analysis = None
-    st.session_state.processing_complete = True # Processing shuru karein
-    
-    # Pre-processing yahin par karein
-    with st.spinner("Input ko samajha ja raha hai... (Step 1/2)"):
-        api_key = os.getenv("GOOGLE_API_KEY")
-        # Groq (ya jo bhi model) se pehle pre-process karein
-        hinglish_text, category = main.preprocess_and_classify(api_key, user_story_input)
-        st.session_state.hinglish_story = hinglish_text
-        st.session_state.category = category
-    
-    # Calculation shuru karein
-    with st.spinner('Hisaab lagaya ja raha hai... (Step 2/2)'):
-        # --- YEH HAI CORRECTED FUNCTION CALL ---
-        response_generator = main.process_query_stream(api_key, st.session_state.hinglish_story, st.session_state.category)
-        st.session_state.detailed_text = "".join(list(response_generator))
-
-    st.rerun() # UI ko final result ke saath refresh karein
-
-# --- Display Section ---
-if st.session_state.processing_complete:
-    st.divider()
-    st.subheader("📊 Aapka Detailed Hisaab")
-    
-    with st.chat_message("user"):
-        st.write(st.session_state.hindi_story)
-
-    with st.chat_message("assistant"):
-        st.write(st.session_state.detailed_text)
-    
-    if st.session_state.detailed_text and not st.session_state.feedback_given:
-        st.write("Kya yeh jawab sahi tha?")
-        col1, col2, _ = st.columns([1, 1, 3])
-        col1.button("👍 Good", on_click=handle_good_feedback, use_container_width=True)
-        col2.button("👎 Bad", on_click=handle_bad_feedback, use_container_width=True)
-
-    if st.session_state.detailed_text:
-        st.divider()
-        st.subheader("🔊 Audio Summary")
-        api_key = os.getenv("GOOGLE_API_KEY")
-        with st.spinner('Audio summary banaya ja raha hai...'):
-            audio_file = main.generate_audio_summary(
-                api_key, 
-                st.session_state.detailed_text,
-                error_analysis=st.session_state.error_analysis
-            )
-            if audio_file and os.path.exists(audio_file):
-                st.audio(audio_file, format="audio/mp3")
-            else:
-                st.warning("Audio summary generate nahi ho paya.")
-
+import streamlit as st
+from streamlit_mic_recorder import mic_recorder
+import uuid
+
+from speechnew import transcribe
+
+# Naye advanced logic wali main file ko import karein
+import main3 as main
+
+# Model aur DB background mein load hote hain; UI turant render hota hai.
+# main3 module process mein ek hi baar import hota hai, isliye model saare sessions share karte hain.
+if 'warmed_up' not in st.session_state:
+    main.warm_up()
+    st.session_state.warmed_up = True
+
+# ---------------------------
+# Streamlit App UI Setup
+# ---------------------------
+st.set_page_config(page_title="💰 Hissab Assistant", layout="centered")
+st.title("💰 Hissab Assistant (Optimized & Fixed)")
+st.caption("AI-powered financial calculator with a self-improving feedback loop.")
+
+# --- Session State Initialization ---
+if 'hindi_story' not in st.session_state:
+    st.session_state.hindi_story = ""
+if 'hinglish_story' not in st.session_state:
+    st.session_state.hinglish_story = ""
+if 'category' not in st.session_state:
+    st.session_state.category = ""
+if 'detailed_text' not in st.session_state:
+    st.session_state.detailed_text = ""
+if 'feedback_given' not in st.session_state:
+    st.session_state.feedback_given = False
+if 'error_analysis' not in st.session_state:
+    st.session_state.error_analysis = None
+if 'processing_complete' not in st.session_state:
+    st.session_state.processing_complete = False
+if 'context' not in st.session_state:
+    st.session_state.context = {}
+if 'analysis_job' not in st.session_state:
+    st.session_state.analysis_job = None
+if 'session_id' not in st.session_state:
+    # Audio cache mein is session ke clips isi id ke naam pinned rehte hain
+    st.session_state.session_id = uuid.uuid4().hex
+
+# --- Feedback Callback Functions ---
+# Dono callbacks sirf background jobs queue karte hain (milliseconds); DB write aur
+# error analysis worker threads mein hote hain aur restart ke baad bhi poore hote hain.
+def handle_good_feedback():
+    main.save_good_prompt(st.session_state.context, st.session_state.detailed_text)
+    st.toast("✅ Shukriya! Isse system aur behtar hoga.")
+    st.session_state.feedback_given = True
+
+def handle_bad_feedback():
+    # Structured logging ke liye pipeline ka poora context pass karein
+    context = st.session_state.context
+    main.save_bad_prompt(context, st.session_state.detailed_text)
+    st.session_state.analysis_job = main.request_error_analysis(context, st.session_state.detailed_text)
+    st.toast("📝 Feedback ke liye shukriya. Galti ka vishleshan ho raha hai...")
+    st.session_state.feedback_given = True
+
+@st.fragment(run_every=1.0)
+def show_error_analysis_status():
+    """Analysis job ko poll karo; jawab aate hi poora page rerun (audio mein analysis judne ke liye)."""
+    job = main.get_job(st.session_state.analysis_job)
+    if job is None or job["status"] == "failed":
+        st.session_state.analysis_job = None
+        st.rerun()
+    elif job["status"] == "done":
+        st.session_state.error_analysis = job["result"]
+        st.session_state.analysis_job = None
+        st.rerun()
+    else:
+        st.info("⏳ Galti ka vishleshan kiya ja raha hai...")
+
+# --- Input Section ---
+mode = st.radio("Aap input kaise dena chahte hain:", ["🎤 Voice", "⌨️ Text"], horizontal=True)
+user_story_input = None
+
+if mode == "🎤 Voice":
+    st.write("Niche diye gaye button par click karke apni aawaz record karein.")
+    audio_info = mic_recorder(start_prompt="▶️ Record", stop_prompt="⏹️ Stop", key='recorder')
+    if audio_info and audio_info['bytes']:
+        st.info("Audio record ho gaya hai. Ab process kiya ja raha hai...")
+        st.audio(audio_info['bytes'])
+        # Conversion memory mein hota hai (koi shared audio_converted.wav nahi). mic_recorder Stop
+        # dabane par hi poori recording ek blob mein deta hai, isliye bolte waqt live text nahi
+        # aata; on_partial sirf lambi recording ke recognition ki progress dikhata hai (Stop ke
+        # baad, tukde saath-saath recognize hote hue). Live partials ke liye streaming recorder chahiye.
+        transcript_placeholder = st.empty()
+        try:
+            recognized_text = transcribe(
+                audio_info['bytes'],
+                on_partial=lambda text: transcript_placeholder.info(f"📝 Pehchaan ho rahi hai: {text}…"))
+            if recognized_text:
+                transcript_placeholder.success(f"📝 Aapne kaha: {recognized_text}")
+                user_story_input = recognized_text
+            else:
+                transcript_placeholder.warning("Aawaz samajh nahi aayi, kripya dobara bolein.")
+        except Exception as e:
+            transcript_placeholder.error(f"Audio process karte samay error aaya: {e}")
+else:
+    user_story_input = st.text_area("Apni kahani yahan likhiye:", placeholder="Example: Mere paas 500 rupaye the...")
+
+# --- Core Logic: Optimized Processing (FIXED) ---
+if user_story_input and user_story_input != st.session_state.hindi_story:
+    # Naye input aane par state reset karein
+    st.session_state.hindi_story = user_story_input
+    st.session_state.feedback_given = False
+    st.session_state.detailed_text = ""
+    st.session_state.error_analysis = None
+    st.session_state.analysis_job = None
+    st.session_state.processing_complete = True # Processing shuru karein
+    
+    # Pre-processing + calculation: Gemini ke chunks aate hi screen par dikhte hain
+    context = {}
+    streamed_text = ""
+    with st.chat_message("assistant"):
+        placeholder = st.empty()
+        placeholder.markdown("⏳ Hisaab lagaya ja raha hai...")
+        for chunk in main.iter_async_stream(main.process_query_stream_async(user_story_input, context)):
+            streamed_text += chunk
+            placeholder.markdown(streamed_text + "▌")
+    st.session_state.detailed_text = streamed_text
+    st.session_state.context = context
+    st.session_state.hinglish_story = context.get("hinglish_story", "")
+    st.session_state.category = context.get("primary_category", "")
+
+    st.rerun() # UI ko final result ke saath refresh karein
+
+# --- Display Section ---
+if st.session_state.processing_complete:
+    st.divider()
+    st.subheader("📊 Aapka Detailed Hisaab")
+    
+    with st.chat_message("user"):
+        st.write(st.session_state.hindi_story)
+
+    with st.chat_message("assistant"):
+        st.write(st.session_state.detailed_text)
+    
+    if st.session_state.detailed_text and not st.session_state.feedback_given:
+        st.write("Kya yeh jawab sahi tha?")
+        col1, col2, _ = st.columns([1, 1, 3])
+        col1.button("👍 Good", on_click=handle_good_feedback, use_container_width=True)
+        col2.button("👎 Bad", on_click=handle_bad_feedback, use_container_width=True)
+
+    if st.session_state.analysis_job is not None:
+        show_error_analysis_status()
+    elif st.session_state.error_analysis:
+        st.warning(f"📝 Galti: {st.session_state.error_analysis}")
+
+    if st.session_state.detailed_text:
+        st.divider()
+        st.subheader("🔊 Audio Summary")
+        with st.spinner('Audio summary banaya ja raha hai...'):
+            # Summary aur mp3 dono cache se aate hain, isliye har rerun par dobara nahi bante
+            audio_bytes = main.run_async(main.generate_audio_summary_async(
+                st.session_state.detailed_text,
+                error_analysis=st.session_state.error_analysis,
+                session_id=st.session_state.session_id
+            ))
+            if audio_bytes:
+                st.audio(audio_bytes, format="audio/mp3")
+            else:
+                st.warning("Audio summary generate nahi ho paya.")
+
@@ -0,0 +1,162 @@
+# audiocachenew.py - Content-addressed caches for the audio summary (text -> summary -> mp3)
+#
+# Har Streamlit rerun par Groq summary + gTTS dobara na chale, isliye:
+#   sha256(detailed_text)        -> summary sentence   (memory LRU)
+#   sha256(lang | spoken text)   -> mp3 bytes          (memory LRU + bounded disk LRU)
+# Disk par files hissab_audio_cache/<hash>.mp3 hain, atomic rename se likhi jaati
+# hain aur total size AUDIO_CACHE_MAX_BYTES se upar jaane par sabse purani (mtime)
+# pehle hatti hain. Har session apne aakhri SESSION_KEEP clips ka "owner" hota hai;
+# jab tak owner session zinda hai (SESSION_TTL_SECONDS), woh clips evict nahi hote.
+import os
+import time
+import hashlib
+import threading
+from dotenv import load_dotenv
+
+from cachenew import LRUCache
+
+load_dotenv()
+
+# --- Configuration ---
+AUDIO_CACHE_DIR = os.getenv("HISSAB_AUDIO_CACHE_DIR", "hissab_audio_cache")
+AUDIO_CACHE_MAX_BYTES = int(float(os.getenv("HISSAB_AUDIO_CACHE_MB", "64")) * 1024 * 1024)
+AUDIO_MEMORY_ITEMS = 128
+SUMMARY_CACHE_SIZE = 2048
+SESSION_KEEP = 3
+SESSION_TTL_SECONDS = 3600.0
+
+
+def content_key(*parts: str) -> str:
+    return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+
+class AudioCache:
+    """Summary aur mp3 caches, per-session ownership ke saath (thread-safe, processes ke beech disk shared)."""
+
+    def __init__(self, directory: str = AUDIO_CACHE_DIR, max_bytes: int = AUDIO_CACHE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._summaries = LRUCache(SUMMARY_CACHE_SIZE)
+        self._audio = LRUCache(AUDIO_MEMORY_ITEMS)
+        self._sessions = {}  # session_id -> (last_seen, [audio keys, purane pehle])
+        self._lock = threading.Lock()
+        self.counters = {"disk_hits": 0, "syntheses": 0, "evicted_files": 0}
+        os.makedirs(directory, exist_ok=True)
+
+    # --- detailed_text -> summary ---
+    def get_summary(self, detailed_text: str):
+        return self._summaries.get(content_key(detailed_text))
+
+    def put_summary(self, detailed_text: str, summary: str):
+        if summary:
+            self._summaries.put(content_key(detailed_text), summary)
+
+    # --- spoken text -> mp3 bytes ---
+    @staticmethod
+    def audio_key(text: str, lang: str = "hi") -> str:
+        return content_key(lang, text)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.mp3")
+
+    def get_audio(self, key: str):
+        data = self._audio.get(key)
+        if data is not None:
+            return data
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path)  # disk LRU ke liye recency
+        except FileNotFoundError:
+            return None
+        self._audio.put(key, data)
+        with self._lock:
+            self.counters["disk_hits"] += 1
+        return data
+
+    def put_audio(self, key: str, data: bytes):
+        self._audio.put(key, data)
+        tmp_path = f"{self._path(key)}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, self._path(key))
+        with self._lock:
+            self.counters["syntheses"] += 1
+        self._evict(keep=key)
+
+    def get_or_create_audio(self, text: str, synthesize, session_id: str = None, lang: str = "hi") -> bytes:
+        """Cache se mp3 lo, warna synthesize(text) chalao aur rakh lo. session_id clip ka owner banta hai."""
+        key = self.audio_key(text, lang)
+        data = self.get_audio(key)
+        if data is None:
+            data = synthesize(text)
+            self.put_audio(key, data)
+        if session_id:
+            self.claim(session_id, key)
+        return data
+
+    # --- Per-session ownership ---
+    def claim(self, session_id: str, key: str):
+        """Session ke aakhri SESSION_KEEP clips pinned rehte hain; usse purane chhod diye jaate hain."""
+        with self._lock:
+            _, keys = self._sessions.get(session_id, (0.0, []))
+            keys = [k for k in keys if k != key] + [key]
+            self._sessions[session_id] = (time.monotonic(), keys[-SESSION_KEEP:])
+
+    def release_session(self, session_id: str):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def _pinned(self) -> set:
+        now = time.monotonic()
+        with self._lock:
+            for session_id in [s for s, (seen, _) in self._sessions.items() if now - seen > SESSION_TTL_SECONDS]:
+                del self._sessions[session_id]
+            return {key for _, keys in self._sessions.values() for key in keys}
+
+    def _evict(self, keep: str = None):
+        """Disk cache max_bytes se bada ho to sabse kam-recent, kisi zinda session ke na hone wale clips hatao."""
+        try:
+            entries = [(e.stat().st_mtime, e.stat().st_size, e.path, e.name[:-4])
+                       for e in os.scandir(self.directory) if e.name.endswith(".mp3")]
+        except FileNotFoundError:
+            return
+        total = sum(size for _, size, _, _ in entries)
+        if total <= self.max_bytes:
+            return
+        pinned = self._pinned()
+        evicted = 0
+        for _, size, path, key in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if key in pinned or key == keep:
+                continue
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass  # doosre process ne pehle hi hata diya
+            self._audio.pop(key)
+            total -= size
+            evicted += 1
+        with self._lock:
+            self.counters["evicted_files"] += evicted
+
+    def metrics(self) -> dict:
+        with self._lock:
+            counters = dict(self.counters)
+            counters["live_sessions"] = len(self._sessions)
+        counters["summary_cache"] = self._summaries.stats()
+        counters["audio_memory_cache"] = self._audio.stats()
+        return counters
+
+
+_audio_cache = None
+_audio_cache_lock = threading.Lock()
+
+def get_audio_cache() -> AudioCache:
+    global _audio_cache
+    with _audio_cache_lock:
+        if _audio_cache is None:
+            _audio_cache = AudioCache()
+        return _audio_cache
@@ -0,0 +1,164 @@
+# batchnew.py - Offline/batch mode: JSONL ya CSV queries ko pipeline se parallel mein chalao
+#
+# Logged traffic replay karne aur model/prompt badlav ko bulk mein grade karne ke liye.
+# Queries chunks mein padhi jaati hain; har chunk pehle embedding model se ek
+# batch mein encode hota hai (query cache garam), phir process_query_stream_async
+# bounded concurrency ke saath chalta hai. Har result turant output JSONL mein
+# likha jaata hai, aur wahi file checkpoint hai: dobara chalane par jo ids
+# already likhe ja chuke hain woh skip ho jaate hain.
+#
+# Usage:
+#   python batchnew.py queries.jsonl -o results.jsonl --concurrency 8 --rate-limit groq=5 --rate-limit gemini=2
+import os
+import csv
+import json
+import time
+import asyncio
+import argparse
+import numpy as np
+
+import main3
+import vectordbnew
+from providersnew import get_llm
+
+# --- Configuration ---
+DEFAULT_CONCURRENCY = 8
+DEFAULT_BATCH_SIZE = 256
+QUERY_FIELDS = ("query", "user_hindi_query", "text", "user_text")
+STAGES = ("embed", "classify", "preprocess", "semantic_search", "calculator", "answer_cache", "retrieval",
+          "prompt_build", "llm_ttft", "llm_generate", "request")
+
+
+def read_queries(path: str) -> list:
+    """[(id, query)] JSONL ya CSV se. id na ho to line number (1 se) id banta hai."""
+    with open(path, encoding="utf-8", newline="") as f:
+        if path.lower().endswith(".csv"):
+            records = list(csv.DictReader(f))
+        else:
+            records = [json.loads(line) for line in f if line.strip()]
+    queries = []
+    for n, record in enumerate(records, start=1):
+        text = next((record[k] for k in QUERY_FIELDS if record.get(k)), None)
+        if text is None:
+            raise ValueError(f"{path}: record {n} mein query field nahi mila (chahiye: {', '.join(QUERY_FIELDS)})")
+        queries.append((str(record.get("id") or n), text))
+    return queries
+
+
+def load_checkpoint(output_path: str) -> set:
+    """Output file mein pehle se likhe ids. Crash ke beech adhuri aakhri line kaat di jaati hai."""
+    if not os.path.exists(output_path):
+        return set()
+    done, valid_bytes = set(), 0
+    with open(output_path, "rb") as f:
+        for line in f:
+            try:
+                done.add(str(json.loads(line)["id"]))
+            except (ValueError, KeyError):
+                break
+            valid_bytes += len(line)
+    if valid_bytes != os.path.getsize(output_path):
+        with open(output_path, "r+b") as f:
+            f.truncate(valid_bytes)
+    return done
+
+
+def _percentiles(samples: list) -> dict:
+    if not samples:
+        return {}
+    ms = np.asarray(samples) * 1000.0
+    return {"count": len(samples), "p50_ms": float(np.percentile(ms, 50)), "p95_ms": float(np.percentile(ms, 95)),
+            "p99_ms": float(np.percentile(ms, 99)), "max_ms": float(ms.max())}
+
+
+async def _process(query_id: str, text: str, semaphore: asyncio.Semaphore) -> dict:
+    context = {}
+    async with semaphore:
+        parts = [chunk async for chunk in main3.process_query_stream_async(text, context)]
+    return {
+        "id": query_id,
+        "query": text,
+        "response": "".join(parts),
+        "hinglish_story": context.get("hinglish_story"),
+        "category": context.get("primary_category"),
+        "classified_by": context.get("classified_by"),
+        "response_source": context.get("response_source"),
+        "prompt_tokens": context.get("prompt_tokens"),
+        "timings": context.get("timings", {}),
+        "error": context.get("error"),
+    }
+
+
+async def _run(queries: list, output_path: str, concurrency: int, batch_size: int, progress: bool) -> dict:
+    semaphore = asyncio.Semaphore(concurrency)
+    stage_samples = {stage: [] for stage in STAGES}
+    sources, errors, processed = {}, 0, 0
+    started = time.perf_counter()
+    with open(output_path, "a", encoding="utf-8") as out:
+        for start in range(0, len(queries), batch_size):
+            chunk = queries[start:start + batch_size]
+            # Ek batch encode: local classifier aur (Hinglish queries ke liye) retrieval dono cache hit karenge
+            await asyncio.to_thread(vectordbnew.encode_queries, [text for _, text in chunk])
+            for task in asyncio.as_completed([_process(qid, text, semaphore) for qid, text in chunk]):
+                result = await task
+                out.write(json.dumps(result, ensure_ascii=False) + "\n")
+                out.flush()
+                processed += 1
+                errors += int(bool(result["error"]))
+                sources[result["response_source"]] = sources.get(result["response_source"], 0) + 1
+                for stage, seconds in result["timings"].items():
+                    stage_samples.setdefault(stage, []).append(seconds)
+            if progress:
+                print(f"{processed}/{len(queries)} queries done ({processed / (time.perf_counter() - started):.1f}/s)")
+    elapsed = time.perf_counter() - started
+    return {
+        "processed": processed,
+        "errors": errors,
+        "elapsed_seconds": elapsed,
+        "throughput_qps": processed / elapsed if elapsed else 0.0,
+        "response_sources": sources,
+        "stages": {stage: _percentiles(samples) for stage, samples in stage_samples.items() if samples},
+    }
+
+
+def run_batch(input_path: str, output_path: str, concurrency: int = DEFAULT_CONCURRENCY,
+              batch_size: int = DEFAULT_BATCH_SIZE, rate_limits: dict = None, progress: bool = False) -> dict:
+    """Library entry point: input file ki saari (ya checkpoint ke baad bachi) queries chalao, report lautao."""
+    queries = read_queries(input_path)
+    done = load_checkpoint(output_path)
+    pending = [(qid, text) for qid, text in queries if qid not in done]
+    batch_size = min(batch_size, vectordbnew.QUERY_CACHE_SIZE)  # chunk ke embeddings cache se bahar na girein
+    for provider, calls_per_second in (rate_limits or {}).items():
+        get_llm().set_rate_limit(provider, calls_per_second)
+    main3.ensure_ready()
+    report = main3.run_async(_run(pending, output_path, concurrency, batch_size, progress))
+    report.update({"total_queries": len(queries), "skipped_from_checkpoint": len(queries) - len(pending),
+                   "pipeline": main3.get_pipeline_metrics()})
+    return report
+
+
+def _rate_limit(value: str) -> tuple:
+    provider, _, rate = value.partition("=")
+    return provider, float(rate)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Queries ki JSONL/CSV file ko HissabGPT pipeline se batch mein chalao.")
+    parser.add_argument("input", help="JSONL ya CSV; field/column: query (ya user_hindi_query/text), optional id")
+    parser.add_argument("-o", "--output", required=True, help="results JSONL (yahi checkpoint bhi hai)")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY)
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--rate-limit", type=_rate_limit, action="append", default=[],
+                        help="provider=calls_per_second, jaise groq=5 (kai baar de sakte hain)")
+    parser.add_argument("--report", help="report JSON is file mein bhi likho")
+    args = parser.parse_args()
+
+    report = run_batch(args.input, args.output, args.concurrency, args.batch_size, dict(args.rate_limit), progress=True)
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1 @@
+# benchmarks - Reproducible performance benchmarks for HissabGPT (run from the repo root)
@@ -0,0 +1,127 @@
+# benchmarks/ann_benchmark.py - Recall vs latency of the IVF ANN index against exact search
+#
+# Usage (repo root se):
+#   python -m benchmarks.ann_benchmark --rows 1000000 --nprobe 4 8 16 32 --json bench_output.json
+import os
+import json
+import time
+import argparse
+import tempfile
+import numpy as np
+
+from annnew import IVFIndex, exact_top_k, normalize_rows
+
+try:
+    from sklearn.metrics.pairwise import cosine_similarity
+except ImportError:  # baseline timing ke liye optional
+    cosine_similarity = None
+
+DIM = 384
+NUM_CATEGORIES = 11
+
+
+def make_dataset(rows: int, dim: int, seed: int, path: str):
+    """Clustered synthetic embeddings (sentence embeddings jaisa structure) ek float32 memmap mein."""
+    rng = np.random.default_rng(seed)
+    topics = normalize_rows(rng.standard_normal((max(64, rows // 500), dim)))
+    matrix = np.memmap(path, dtype=np.float32, mode="w+", shape=(rows, dim))
+    for start in range(0, rows, 65536):
+        end = min(start + 65536, rows)
+        picks = rng.integers(0, len(topics), end - start)
+        matrix[start:end] = topics[picks] + 0.35 * rng.standard_normal((end - start, dim)).astype(np.float32) / np.sqrt(dim) * 4
+    matrix.flush()
+    codes = rng.integers(0, NUM_CATEGORIES, rows).astype(np.int16)
+    return np.memmap(path, dtype=np.float32, mode="r", shape=(rows, dim)), codes
+
+
+def percentile_ms(samples, q):
+    return float(np.percentile(np.asarray(samples) * 1000.0, q))
+
+
+def run(rows: int, queries: int, k: int, nprobes: list, seed: int) -> dict:
+    rng = np.random.default_rng(seed + 1)
+    with tempfile.TemporaryDirectory() as tmp:
+        matrix, codes = make_dataset(rows, DIM, seed, os.path.join(tmp, "emb.f32"))
+        inv_norms = 1.0 / np.linalg.norm(matrix, axis=1)
+        all_rows = np.arange(rows)
+
+        t0 = time.perf_counter()
+        index = IVFIndex.train(matrix, seed=seed)
+        train_s = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        index.add_all(matrix)
+        add_s = time.perf_counter() - t0
+
+        query_rows = rng.choice(rows, queries, replace=False)
+        query_vecs = normalize_rows(matrix[query_rows] + 0.05 * rng.standard_normal((queries, DIM)).astype(np.float32))
+        wanted = [rng.choice(NUM_CATEGORIES, 2, replace=False).astype(np.int16) for _ in range(queries)]
+
+        # Exact ground truth (same category filter as production)
+        truth, exact_times = [], []
+        for q, cats in zip(query_vecs, wanted):
+            t0 = time.perf_counter()
+            candidates = all_rows[np.isin(codes, cats)]
+            ids, _ = exact_top_k(matrix, inv_norms, q, candidates, k)
+            exact_times.append(time.perf_counter() - t0)
+            truth.append(set(ids.tolist()))
+
+        result = {
+            "rows": rows, "dim": DIM, "k": k, "queries": queries, "nlist": index.nlist,
+            "train_seconds": round(train_s, 3), "index_add_seconds": round(add_s, 3),
+            "exact_numpy": {"p50_ms": percentile_ms(exact_times, 50), "p99_ms": percentile_ms(exact_times, 99)},
+            "ivf": [],
+        }
+
+        if cosine_similarity is not None:
+            # Purana tareeqa: sklearn cosine_similarity poore matrix par
+            sk_times = []
+            for q in query_vecs[:min(queries, 20)]:
+                t0 = time.perf_counter()
+                sims = cosine_similarity([q], matrix)[0]
+                np.argsort(sims)[-k:]
+                sk_times.append(time.perf_counter() - t0)
+            result["exact_sklearn_cosine"] = {"p50_ms": percentile_ms(sk_times, 50), "p99_ms": percentile_ms(sk_times, 99)}
+
+        for nprobe in nprobes:
+            times, recalls = [], []
+            for q, cats, expected in zip(query_vecs, wanted, truth):
+                t0 = time.perf_counter()
+                candidates = index.candidates(q, nprobe=nprobe)
+                candidates = candidates[np.isin(codes[candidates], cats)]
+                ids, _ = exact_top_k(matrix, inv_norms, q, candidates, k)
+                times.append(time.perf_counter() - t0)
+                recalls.append(len(expected & set(ids.tolist())) / max(1, len(expected)))
+            result["ivf"].append({
+                "nprobe": nprobe, "recall_at_k": round(float(np.mean(recalls)), 4),
+                "p50_ms": percentile_ms(times, 50), "p99_ms": percentile_ms(times, 99),
+            })
+        del matrix
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="IVF ANN recall/latency benchmark vs exact cosine search.")
+    parser.add_argument("--rows", type=int, nargs="+", default=[20000, 100000])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[4, 8, 16, 32])
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", help="results ko is file mein likho")
+    args = parser.parse_args()
+
+    results = []
+    for rows in args.rows:
+        result = run(rows, args.queries, args.k, args.nprobe, args.seed)
+        results.append(result)
+        print(f"\nrows={rows} nlist={result['nlist']} train={result['train_seconds']}s "
+              f"exact p50={result['exact_numpy']['p50_ms']:.2f}ms")
+        for entry in result["ivf"]:
+            print(f"  nprobe={entry['nprobe']:>3}  recall@{args.k}={entry['recall_at_k']:.3f}  "
+                  f"p50={entry['p50_ms']:.3f}ms  p99={entry['p99_ms']:.3f}ms")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+# benchmarks/async_benchmark.py - Time-to-first-token and end-to-end latency: sync vs async pipeline
+#
+# Asli APIs ki jagah providersnew.StubProvider (simulated network latency ke
+# saath) aur benchmarks/fakes.py ka hashing embedding model use hote hain; DB ek temp
+# directory mein banta hai. Teen cheezein naapi jaati hain:
+#   1. purana flow: "".join(list(process_query_stream(...))) -> user ko pehla token = poora jawab
+#   2. async streaming: process_query_stream_async ka pehla chunk aur poora jawab
+#   3. 👎 feedback: click par jobs queue hone ka time, error analysis job ka result aane tak,
+#      aur audio summary text
+#
+# Usage (repo root se):
+#   python -m benchmarks.async_benchmark --queries 10 --concurrency 8 --json bench_output.json
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import tempfile
+import numpy as np
+
+from benchmarks.fakes import FakeEmbeddingModel
+
+
+def _stats(samples) -> dict:
+    ms = np.asarray(samples) * 1000.0
+    return {"p50_ms": float(np.percentile(ms, 50)), "p95_ms": float(np.percentile(ms, 95)), "mean_ms": float(ms.mean())}
+
+
+def _queries(n: int) -> list:
+    # Devanagari + alag numbers: local fast path aur answer cache dono miss, yaani aaj ka poora flow
+    return [f"मेरे पास {1000 + 37 * i} रुपये थे, मैंने {100 + 11 * i} खर्च किए, अब कितने बचे?" for i in range(n)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sync vs async pipeline latency against the stub LLM provider.")
+    parser.add_argument("--queries", type=int, default=10)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--first-token", type=float, default=0.4)
+    parser.add_argument("--chunk", type=float, default=0.05)
+    parser.add_argument("--completion", type=float, default=0.25)
+    parser.add_argument("--json", help="results ko is file mein likho")
+    args = parser.parse_args()
+    json_path = os.path.abspath(args.json) if args.json else None
+
+    workdir = tempfile.mkdtemp(prefix="hissab_bench_")
+    os.chdir(workdir)  # store/cache files temp directory mein bante hain
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    import vectordbnew
+    import main3
+    from providersnew import StubProvider, make_stub_router, set_llm
+    vectordbnew.set_embedding_model(FakeEmbeddingModel(), model_key="bench:fake")
+    stub = StubProvider(args.first_token, args.chunk, completion_seconds=args.completion)
+    set_llm(make_stub_router(stub))
+    main3.calculator.enabled = False  # yahan LLM streaming naapni hai; calculator ye queries khud solve kar deta
+    main3.ensure_ready()
+
+    queries = _queries(args.queries * 3 + args.concurrency)
+    sync_queries = queries[:args.queries]
+    async_queries = queries[args.queries:2 * args.queries]
+    concurrent_queries = queries[2 * args.queries:2 * args.queries + args.concurrency]
+
+    # 1. Purana flow: app poora generator drain karke hi render karta tha
+    sync_e2e = []
+    for q in sync_queries:
+        t0 = time.perf_counter()
+        "".join(list(main3.process_query_stream(q)))
+        sync_e2e.append(time.perf_counter() - t0)
+
+    # 2. Async streaming, jaise app3 ab render karta hai
+    async_ttft, async_e2e = [], []
+    for q in async_queries:
+        t0 = time.perf_counter()
+        first = None
+        for _ in main3.iter_async_stream(main3.process_query_stream_async(q, {})):
+            if first is None:
+                first = time.perf_counter() - t0
+        async_ttft.append(first)
+        async_e2e.append(time.perf_counter() - t0)
+
+    # 2b. Ek hi event loop par concurrent requests
+    async def _consume(q):
+        async for _ in main3.process_query_stream_async(q, {}):
+            pass
+
+    async def _concurrent():
+        t0 = time.perf_counter()
+        await asyncio.gather(*[_consume(q) for q in concurrent_queries])
+        return time.perf_counter() - t0
+    concurrent_wall = main3.run_async(_concurrent())
+
+    # 3. 👎 feedback, jaise app3 karta hai: click sirf jobs queue karta hai, analysis worker mein
+    context = {"hinglish_story": sync_queries[0]}
+    t0 = time.perf_counter()
+    main3.save_bad_prompt(context, "jawab")
+    job_id = main3.request_error_analysis(context, "jawab")
+    feedback_click = time.perf_counter() - t0
+    while main3.get_job(job_id)["status"] not in ("done", "failed"):
+        time.sleep(0.005)
+    analysis_ready = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    main3.run_async(main3.summarize_for_audio_async("jawab"))
+    audio_summary = time.perf_counter() - t0
+
+    results = {
+        "fake_latency": vars(stub),
+        "sync_join": {"time_to_first_render": _stats(sync_e2e), "end_to_end": _stats(sync_e2e)},
+        "async_stream": {"time_to_first_token": _stats(async_ttft), "end_to_end": _stats(async_e2e)},
+        "concurrent_async": {"requests": len(concurrent_queries), "wall_ms": concurrent_wall * 1000,
+                             "serial_estimate_ms": float(np.mean(async_e2e)) * 1000 * len(concurrent_queries)},
+        "bad_feedback": {"click_ms": feedback_click * 1000, "analysis_ready_ms": analysis_ready * 1000,
+                         "audio_summary_ms": audio_summary * 1000},
+    }
+    print(json.dumps(results, indent=2))
+    if json_path:
+        with open(json_path, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
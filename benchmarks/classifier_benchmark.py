@@ -0,0 +1,66 @@
+# benchmarks/classifier_benchmark.py - Local classifier coverage vs agreement with the LLM labels
+#
+# Good DB ki har row ki category Groq (LLM) ne di thi, isliye woh held-out
+# labels ka kaam karti hai. Sabse nayi --holdout fraction rows alag rakh kar baaki
+# rows + category descriptions par classifier train hota hai, phir har threshold
+# par dekha jaata hai ki fast path kitni baar lega (coverage) aur tab LLM se
+# kitna agree karega.
+#
+# Usage (repo root se, asli hissab_store.db ke saath):
+#   python -m benchmarks.classifier_benchmark --holdout 0.2 --json bench_output.json
+import json
+import argparse
+import numpy as np
+
+import classifiernew
+import vectordbnew
+from storenew import get_store
+from classifiernew import CentroidClassifier, DESCRIPTION_WEIGHT
+from annnew import normalize_rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local classifier held-out evaluation.")
+    parser.add_argument("--holdout", type=float, default=0.2)
+    parser.add_argument("--min-score", type=float, nargs="+", default=[0.45, 0.55, 0.65])
+    parser.add_argument("--min-margin", type=float, nargs="+", default=[0.04, 0.08, 0.12])
+    parser.add_argument("--json", help="results ko is file mein likho")
+    args = parser.parse_args()
+
+    vectordbnew.setup_vector_db()
+    store = get_store()
+    ids, vectors, labels = [], [], []
+    for shard in vectordbnew.hissab_db.shards():
+        shard_rows = store.shard_rows(shard.category)
+        ids.extend(row_id for row_id, _, _ in shard_rows)
+        vectors.append(np.asarray(shard.embeddings[[emb_row for _, emb_row, _ in shard_rows]]))
+        labels.extend([shard.category] * len(shard_rows))
+    order = np.argsort(ids)  # id order = insert order (shards ke paar)
+    matrix, labels = np.vstack(vectors)[order], [labels[i] for i in order]
+    split = int(len(matrix) * (1 - args.holdout))
+    if split == len(matrix):
+        print("Held-out set khaali hai; DB mein aur examples chahiye.")
+        return
+
+    model = CentroidClassifier(list(vectordbnew.category_embeddings.keys()), matrix.shape[1])
+    for category, embedding in vectordbnew.category_embeddings.items():
+        model._add(category, normalize_rows(embedding) * DESCRIPTION_WEIGHT, DESCRIPTION_WEIGHT)
+    model.partial_fit(matrix[:split], labels[:split])
+
+    held_out = matrix[split:]
+    results = []
+    print(f"train={split} held_out={len(matrix) - split}")
+    for min_score in args.min_score:
+        for min_margin in args.min_margin:
+            classifiernew.CLASSIFIER_MIN_SCORE, classifiernew.CLASSIFIER_MIN_MARGIN = min_score, min_margin
+            result = {"min_score": min_score, "min_margin": min_margin, **model.evaluate(held_out, labels[split:])}
+            results.append(result)
+            print(f"  score>={min_score:.2f} margin>={min_margin:.2f}: fast-path coverage={result['coverage']:.2%} "
+                  f"agreement={result['confident_agreement']:.2%} (overall acc {result['overall_accuracy']:.2%})")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
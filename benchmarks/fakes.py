@@ -0,0 +1,32 @@
+# benchmarks/fakes.py - Offline stand-in for the sentence-transformers embedding model
+#
+# LLM APIs ka offline stand-in providersnew.StubProvider hai.
+import time
+import hashlib
+import numpy as np
+
+
+class FakeEmbeddingModel:
+    """Deterministic hashing 'sentence embedding': same words -> similar vectors."""
+
+    def __init__(self, dim: int = 384, encode_seconds: float = 0.0):
+        self.dim = dim
+        self.encode_seconds = encode_seconds
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.dim
+
+    def encode(self, texts, **kwargs):
+        single = isinstance(texts, str)
+        texts = [texts] if single else list(texts)
+        if self.encode_seconds:
+            time.sleep(self.encode_seconds * len(texts))
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for i, text in enumerate(texts):
+            for word in text.lower().split():
+                h = int.from_bytes(hashlib.blake2b(word.encode("utf-8"), digest_size=8).digest(), "little")
+                out[i, h % self.dim] += 1.0 if (h >> 32) & 1 else -1.0
+        norms = np.linalg.norm(out, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        out /= norms
+        return out[0] if single else out
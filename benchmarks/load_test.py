@@ -0,0 +1,150 @@
+# benchmarks/load_test.py - Poori pipeline ka concurrent load test (stub LLM + fake embeddings)
+#
+# Synthetic DB (benchmarks/synthetic.py) ek temp directory mein banta hai, LLM calls
+# providersnew.StubProvider par jaati hain (Groq/Gemini jaisi first-token, per-chunk
+# aur completion latency ke saath, optional failure rate), aur embeddings
+# benchmarks/fakes.py ke hashing model se. Har concurrency level par
+# process_query_stream_async ek hi event loop par `concurrency` virtual users se
+# chalta hai; query mix mein Hinglish (local classifier / calculator), Devanagari
+# (LLM preprocess) aur repeat queries (answer cache) hain, aur kuch jawab 👍 bhi hote hain
+# (DB write path). Report: throughput, error rate, request/TTFT/per-stage percentiles.
+#
+# Usage (repo root se):
+#   python -m benchmarks.load_test --db-size 10000 --concurrency 1 8 32 --requests 200 --json load.json
+#   python -m benchmarks.load_test --failure-rate 0.05 --thresholds benchmarks/thresholds.json
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import tempfile
+import numpy as np
+
+from benchmarks.fakes import FakeEmbeddingModel
+from benchmarks.synthetic import generate_examples, generate_queries, populate_store
+from benchmarks.regression import check_thresholds, load_thresholds
+
+
+def _stats(samples) -> dict:
+    if not samples:
+        return {}
+    ms = np.asarray(samples) * 1000.0
+    return {"count": len(samples), "p50_ms": float(np.percentile(ms, 50)), "p95_ms": float(np.percentile(ms, 95)),
+            "p99_ms": float(np.percentile(ms, 99)), "max_ms": float(ms.max())}
+
+
+async def _user(main3, queue: asyncio.Queue, results: list, thumbs_up_ratio: float, rng: random.Random):
+    while True:
+        try:
+            query = queue.get_nowait()
+        except asyncio.QueueEmpty:
+            return
+        context, first = {}, None
+        t0 = time.perf_counter()
+        parts = []
+        async for chunk in main3.process_query_stream_async(query, context):
+            if first is None:
+                first = time.perf_counter() - t0
+            parts.append(chunk)
+        total = time.perf_counter() - t0
+        if not context.get("error") and context.get("query_embedding") is not None and rng.random() < thumbs_up_ratio:
+            await asyncio.to_thread(main3.save_good_prompt, context, "".join(parts))
+        results.append((total, first, context))
+
+
+async def run_level(main3, queries: list, concurrency: int, thumbs_up_ratio: float, seed: int) -> dict:
+    queue = asyncio.Queue()
+    for query in queries:
+        queue.put_nowait(query)
+    results = []
+    rng = random.Random(seed)
+    started = time.perf_counter()
+    await asyncio.gather(*[_user(main3, queue, results, thumbs_up_ratio, rng) for _ in range(concurrency)])
+    elapsed = time.perf_counter() - started
+
+    stages, sources = {}, {}
+    for _, _, context in results:
+        source = "error" if context.get("error") else context.get("response_source", "unknown")
+        sources[source] = sources.get(source, 0) + 1
+        for stage, seconds in context.get("timings", {}).items():
+            stages.setdefault(stage, []).append(seconds)
+    errors = sources.get("error", 0)
+    return {
+        "requests": len(results),
+        "elapsed_seconds": elapsed,
+        "throughput_qps": len(results) / elapsed if elapsed else 0.0,
+        "error_rate": errors / len(results) if results else 0.0,
+        "response_sources": sources,
+        "request": _stats([total for total, _, _ in results]),
+        "time_to_first_chunk": _stats([first for _, first, _ in results if first is not None]),
+        "stages": {stage: _stats(samples) for stage, samples in sorted(stages.items())},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent full-pipeline load test against the stub LLM provider.")
+    parser.add_argument("--db-size", type=int, default=10000)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--requests", type=int, default=200, help="har concurrency level par")
+    parser.add_argument("--devanagari-ratio", type=float, default=0.2)
+    parser.add_argument("--repeat-ratio", type=float, default=0.1)
+    parser.add_argument("--thumbs-up-ratio", type=float, default=0.1)
+    parser.add_argument("--first-token", type=float, default=0.15)
+    parser.add_argument("--chunk", type=float, default=0.02)
+    parser.add_argument("--completion", type=float, default=0.1)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--no-calculator", action="store_true", help="saari queries LLM generation tak jaayein")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", help="results ko is file mein likho")
+    parser.add_argument("--thresholds", help="regression thresholds JSON (dekhein benchmarks/regression.py)")
+    args = parser.parse_args()
+    json_path = os.path.abspath(args.json) if args.json else None
+    thresholds_path = os.path.abspath(args.thresholds) if args.thresholds else None
+
+    workdir = tempfile.mkdtemp(prefix="hissab_load_")
+    os.chdir(workdir)  # store/cache files temp directory mein bante hain
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    import vectordbnew
+    import main3
+    from storenew import get_store
+    from providersnew import StubProvider, make_stub_router, set_llm
+    model = FakeEmbeddingModel()
+    vectordbnew.set_embedding_model(model, model_key="bench:fake")
+    seeds = vectordbnew.INITIAL_PROMPTS[:args.db_size]
+    populate_store(get_store(), seeds + generate_examples(max(0, args.db_size - len(seeds)), args.seed), model.encode)
+    stub = StubProvider(args.first_token, args.chunk, completion_seconds=args.completion, failure_rate=args.failure_rate)
+    router = make_stub_router(stub)
+    set_llm(router)
+    main3.calculator.enabled = not args.no_calculator
+    main3.ensure_ready()
+
+    levels = {}
+    for n, concurrency in enumerate(args.concurrency):
+        queries = generate_queries(args.requests, args.seed + 1 + n, args.devanagari_ratio, args.repeat_ratio)
+        levels[str(concurrency)] = level = main3.run_async(
+            run_level(main3, queries, concurrency, args.thumbs_up_ratio, args.seed + n))
+        print(f"concurrency={concurrency:>3} qps={level['throughput_qps']:.1f} errors={level['error_rate']:.1%} "
+              f"request p50={level['request']['p50_ms']:.0f}ms p95={level['request']['p95_ms']:.0f}ms "
+              f"first-chunk p95={level['time_to_first_chunk'].get('p95_ms', 0):.0f}ms sources={level['response_sources']}")
+
+    results = {"load": {
+        "db_size": args.db_size,
+        "fake_latency": vars(stub),
+        "calculator": not args.no_calculator,
+        "levels": levels,
+        "pipeline": main3.get_pipeline_metrics(),
+    }}
+    if json_path:
+        with open(json_path, "w") as f:
+            json.dump(results, f, indent=2, ensure_ascii=False, default=str)
+    if thresholds_path:
+        failures = check_thresholds(results, load_thresholds(thresholds_path))
+        for failure in failures:
+            print(f"REGRESSION: {failure}")
+        sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+# benchmarks/model_benchmark.py - Embedding model startup, encode latency and quality per backend
+#
+# Har backend ek alag subprocess mein load hota hai taaki cold-start time aur
+# memory (max RSS) saaf naape ja sakein. Quality INITIAL_PROMPTS par torch
+# baseline ke against check hoti hai:
+#   - semantic category top-2 same hai ya nahi (find_semantic_categories jaisa)
+#   - leave-one-out nearest example same hai ya nahi (find_similar_examples jaisa)
+#   - baseline embeddings se cosine similarity
+#
+# Usage (repo root se):
+#   python -m benchmarks.model_benchmark --backends torch int8 onnx --json bench_output.json
+import sys
+import json
+import argparse
+import subprocess
+import numpy as np
+
+_WORKER = r"""
+import json, time, resource, sys
+import numpy as np
+t0 = time.perf_counter()
+import vectordbnew
+import_seconds = time.perf_counter() - t0
+t0 = time.perf_counter()
+model = vectordbnew._load_embedding_model(sys.argv[1])
+load_seconds = time.perf_counter() - t0
+texts = [p['user_text'] for p in vectordbnew.INITIAL_PROMPTS]
+descriptions = list(vectordbnew.CATEGORY_DESCRIPTIONS.values())
+model.encode(texts[:1])  # warm-up
+timings = []
+for i in range(int(sys.argv[2])):
+    t = time.perf_counter()
+    model.encode([texts[i % len(texts)]])
+    timings.append(time.perf_counter() - t)
+print(json.dumps({
+    "import_seconds": import_seconds,
+    "load_seconds": load_seconds,
+    "encode_p50_ms": float(np.percentile(timings, 50) * 1000),
+    "encode_p99_ms": float(np.percentile(timings, 99) * 1000),
+    "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    "prompts": np.asarray(model.encode(texts), dtype=float).tolist(),
+    "categories": np.asarray(model.encode(descriptions), dtype=float).tolist(),
+}))
+"""
+
+
+def _normalize(matrix):
+    matrix = np.asarray(matrix, dtype=np.float32)
+    return matrix / np.linalg.norm(matrix, axis=1, keepdims=True)
+
+
+def run_backend(backend: str, encodes: int) -> dict:
+    out = subprocess.run([sys.executable, "-c", _WORKER, backend, str(encodes)],
+                         capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def quality(result: dict, baseline: dict) -> dict:
+    prompts, base_prompts = _normalize(result["prompts"]), _normalize(baseline["prompts"])
+    cats, base_cats = _normalize(result["categories"]), _normalize(baseline["categories"])
+
+    top2 = np.argsort(prompts @ cats.T, axis=1)[:, -2:]
+    base_top2 = np.argsort(base_prompts @ base_cats.T, axis=1)[:, -2:]
+    category_agreement = np.mean([set(a) == set(b) for a, b in zip(top2, base_top2)])
+
+    sims, base_sims = prompts @ prompts.T, base_prompts @ base_prompts.T
+    np.fill_diagonal(sims, -1)
+    np.fill_diagonal(base_sims, -1)
+    neighbour_agreement = np.mean(np.argmax(sims, axis=1) == np.argmax(base_sims, axis=1))
+
+    return {
+        "semantic_top2_agreement": float(category_agreement),
+        "nearest_example_agreement": float(neighbour_agreement),
+        "mean_cosine_to_baseline": float(np.mean(np.sum(prompts * base_prompts, axis=1))),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Embedding backend startup/latency/quality benchmark.")
+    parser.add_argument("--backends", nargs="+", default=["torch", "int8", "onnx"])
+    parser.add_argument("--encodes", type=int, default=50)
+    parser.add_argument("--json", help="results ko is file mein likho")
+    args = parser.parse_args()
+
+    results = {}
+    for backend in ["torch"] + [b for b in args.backends if b != "torch"]:
+        try:
+            results[backend] = run_backend(backend, args.encodes)
+        except subprocess.CalledProcessError as e:
+            print(f"{backend}: failed\n{e.stderr[-2000:]}")
+    if "torch" not in results:
+        return
+    report = {}
+    for backend, result in results.items():
+        report[backend] = {k: v for k, v in result.items() if k not in ("prompts", "categories")}
+        report[backend].update(quality(result, results["torch"]))
+        r = report[backend]
+        print(f"{backend:>6}: import={r['import_seconds']:.2f}s load={r['load_seconds']:.2f}s "
+              f"encode p50={r['encode_p50_ms']:.1f}ms rss={r['max_rss_mb']:.0f}MB "
+              f"top2-agree={r['semantic_top2_agreement']:.2f} nn-agree={r['nearest_example_agreement']:.2f} "
+              f"cos={r['mean_cosine_to_baseline']:.4f}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+# benchmarks/regression.py - Benchmark results ko thresholds aur purane baseline se compare karo
+#
+# Thresholds JSON: dotted path -> {"max": x} / {"min": y}. Path ka koi bhi hissa "*"
+# ho sakta hai (jaise har DB size ke liye ek hi limit):
+#   {"scale.sizes.*.find_similar_examples.p95_ms": {"max": 25},
+#    "load.error_rate": {"max": 0}}
+# Baseline mode: purani results file ke har *_ms number se naya number
+# `tolerance` (default 25%) se zyaada badha to regression.
+#
+# Usage (repo root se):
+#   python -m benchmarks.regression bench_output.json --thresholds benchmarks/thresholds.json --baseline old.json
+import sys
+import json
+import argparse
+
+DEFAULT_THRESHOLDS = "benchmarks/thresholds.json"
+
+
+def load_thresholds(path: str = DEFAULT_THRESHOLDS) -> dict:
+    with open(path, encoding="utf-8") as f:
+        return {k: v for k, v in json.load(f).items() if not k.startswith("_")}  # "_comment" jaise keys chhodo
+
+
+def _flatten(results, prefix: str = "") -> dict:
+    """{"a": {"b": 1}} -> {"a.b": 1}; sirf numbers rakhe jaate hain."""
+    flat = {}
+    if isinstance(results, dict):
+        for key, value in results.items():
+            flat.update(_flatten(value, f"{prefix}{key}."))
+    elif isinstance(results, (int, float)) and not isinstance(results, bool):
+        flat[prefix[:-1]] = float(results)
+    return flat
+
+
+def _matches(pattern: str, path: str) -> bool:
+    wanted, parts = pattern.split("."), path.split(".")
+    return len(wanted) == len(parts) and all(w in ("*", p) for w, p in zip(wanted, parts))
+
+
+def check_thresholds(results: dict, thresholds: dict) -> list:
+    """Har toota hua threshold ek message; khaali list = sab theek. Jo pattern kisi result
+    se match hi na kare woh bhi report hota hai (galat path chupchaap pass na ho)."""
+    flat = _flatten(results)
+    failures = []
+    for pattern, limits in thresholds.items():
+        matched = [path for path in flat if _matches(pattern, path)]
+        if not matched:
+            # Results mein woh section hi nahi (jaise sirf scale chala) to chhod do
+            if pattern.split(".")[0] in results:
+                failures.append(f"{pattern}: results mein nahi mila")
+            continue
+        for path in matched:
+            value = flat[path]
+            if "max" in limits and value > limits["max"]:
+                failures.append(f"{path} = {value:.4g} > max {limits['max']}")
+            if "min" in limits and value < limits["min"]:
+                failures.append(f"{path} = {value:.4g} < min {limits['min']}")
+    return failures
+
+
+def compare_baseline(results: dict, baseline: dict, tolerance: float = 0.25, min_delta_ms: float = 0.5) -> list:
+    """Latencies (*_ms) jo baseline se tolerance se zyaada badh gayin. Bahut chhote
+    numbers par noise na pakde, isliye min_delta_ms se kam ka badlav ignore hota hai."""
+    new, old = _flatten(results), _flatten(baseline)
+    failures = []
+    for path, before in old.items():
+        after = new.get(path)
+        if after is None or not path.endswith("_ms"):
+            continue
+        if after > before * (1 + tolerance) and after - before >= min_delta_ms:
+            failures.append(f"{path}: {before:.3f}ms -> {after:.3f}ms (+{(after / before - 1) * 100 if before else 0:.0f}%)")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark results ko thresholds/baseline ke against check karo.")
+    parser.add_argument("results", help="scale_benchmark/load_test/suite ki --json file")
+    parser.add_argument("--thresholds", default=DEFAULT_THRESHOLDS)
+    parser.add_argument("--baseline", help="purani results file; *_ms numbers compare hote hain")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    args = parser.parse_args()
+
+    with open(args.results, encoding="utf-8") as f:
+        results = json.load(f)
+    failures = check_thresholds(results, load_thresholds(args.thresholds))
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            failures += compare_baseline(results, json.load(f), args.tolerance)
+    for failure in failures:
+        print(f"REGRESSION: {failure}")
+    print("OK" if not failures else f"{len(failures)} regression(s)")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+# benchmarks/scale_benchmark.py - Retrieval, prompt building aur DB writes ka latency vs DB size
+#
+# Har DB size (11 INITIAL_PROMPTS se laakhon rows tak) ek alag subprocess mein ek
+# temp directory par banta hai, taaki vectordbnew/storenew ke module globals aur
+# memory (max RSS) saaf naape ja sakein. Rows benchmarks/synthetic.py se aati hain
+# aur embeddings benchmarks/fakes.py ke hashing model se. Naapa jaata hai:
+#   - setup_vector_db (index load / ANN build), find_semantic_categories,
+#     find_random_examples_from_category, find_similar_examples, ragnew.get_enhanced_prompt
+#   - add_user_prompt_to_db (append) aur store flush (disk commit + index update)
+#
+# Usage (repo root se):
+#   python -m benchmarks.scale_benchmark --sizes 11 1000 10000 100000 --json bench_output.json
+#   python -m benchmarks.scale_benchmark --sizes 1000000 --queries 200 --thresholds benchmarks/thresholds.json
+import os
+import sys
+import json
+import time
+import argparse
+import resource
+import subprocess
+import tempfile
+import numpy as np
+
+from benchmarks.regression import check_thresholds, load_thresholds
+
+DEFAULT_SIZES = [11, 1000, 10000, 100000]
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _stats(samples) -> dict:
+    ms = np.asarray(samples) * 1000.0
+    return {"p50_ms": float(np.percentile(ms, 50)), "p95_ms": float(np.percentile(ms, 95)),
+            "p99_ms": float(np.percentile(ms, 99)), "mean_ms": float(ms.mean())}
+
+
+def _timed(fn, args_list) -> tuple:
+    results, times = [], []
+    for args in args_list:
+        t0 = time.perf_counter()
+        results.append(fn(*args))
+        times.append(time.perf_counter() - t0)
+    return results, _stats(times)
+
+
+def run_size(size: int, queries: int, writes: int, seed: int) -> dict:
+    """Ek DB size ka benchmark (isi process mein; cwd temp directory honi chahiye)."""
+    from benchmarks.fakes import FakeEmbeddingModel
+    from benchmarks.synthetic import generate_examples, generate_queries, populate_store
+    import vectordbnew
+    from storenew import get_store
+    from ragnew import get_enhanced_prompt
+    from annnew import ANN_MIN_ROWS
+
+    model = FakeEmbeddingModel()
+    vectordbnew.set_embedding_model(model, model_key="bench:fake")
+    store = get_store()
+    t0 = time.perf_counter()
+    seeds = vectordbnew.INITIAL_PROMPTS[:size]
+    populate_store(store, seeds + generate_examples(max(0, size - len(seeds)), seed), model.encode)
+    populate_seconds = time.perf_counter() - t0
+    rows = store.count_good()
+
+    t0 = time.perf_counter()
+    vectordbnew.setup_vector_db()
+    setup_seconds = time.perf_counter() - t0
+    # Bade DB par ANN background mein banta hai; search usi ke saath naapni hai
+    t0 = time.perf_counter()
+    index = vectordbnew.hissab_db
+    while index.ann_building:
+        time.sleep(0.05)
+    for shard in index.shards():
+        if shard.ann is None and len(shard) >= ANN_MIN_ROWS:
+            shard.rebuild_ann()
+    ann_seconds = time.perf_counter() - t0
+
+    texts = generate_queries(queries, seed + 1, devanagari_ratio=0.0, repeat_ratio=0.0)
+    embeddings = vectordbnew.encode_queries(texts)  # encode model ka kaam hai, yahan sirf search naapna hai
+    categories, semantic = _timed(
+        lambda t, e: vectordbnew.find_semantic_categories(t, top_k=2, query_embedding=e), zip(texts, embeddings))
+    _, random_examples = _timed(
+        lambda c: vectordbnew.find_random_examples_from_category(c[0], max_examples=5), [(c,) for c in categories])
+    retrieved, similar = _timed(
+        lambda t, c, e: vectordbnew.find_similar_examples(t, c, max_examples=5, query_embedding=e),
+        zip(texts, categories, embeddings))
+    prompts, prompt_build = _timed(
+        lambda t, c, ex: get_enhanced_prompt(t, c[0], c, ex), zip(texts, categories, retrieved))
+
+    new_rows = generate_examples(writes, seed + 2)
+    new_embeddings = model.encode([r["user_text"] for r in new_rows])
+    _, append = _timed(
+        lambda r, e: vectordbnew.add_user_prompt_to_db(r["user_text"], r["model_response"], r["category"], embedding=e),
+        zip(new_rows, new_embeddings))
+    t0 = time.perf_counter()
+    store.flush()  # commit + listener se ExampleIndex/classifier update
+    flush_seconds = time.perf_counter() - t0
+
+    return {
+        "rows": rows,
+        "populate_seconds": round(populate_seconds, 3),
+        "setup_vector_db_seconds": round(setup_seconds, 3),
+        "shards": len(index.categories()),
+        "ann_shards": sum(shard.ann is not None for shard in index.shards()),
+        "ann_build_seconds": round(ann_seconds, 3),
+        "find_semantic_categories": semantic,
+        "find_random_examples_from_category": random_examples,
+        "find_similar_examples": similar,
+        "get_enhanced_prompt": prompt_build,
+        "prompt_chars_mean": float(np.mean([len(p) for p in prompts])),
+        "add_user_prompt_to_db": append,
+        "flush_ms": flush_seconds * 1000 / max(1, writes),
+        "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }
+
+
+def _run_in_subprocess(size: int, queries: int, writes: int, seed: int) -> dict:
+    with tempfile.TemporaryDirectory(prefix="hissab_scale_") as workdir:
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join([REPO_ROOT, os.environ.get("PYTHONPATH", "")]),
+                   HISSAB_METRICS="0")
+        out = subprocess.run([sys.executable, "-m", "benchmarks.scale_benchmark", "--worker", str(size),
+                              "--queries", str(queries), "--writes", str(writes), "--seed", str(seed)],
+                             cwd=workdir, env=env, capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def run(sizes: list, queries: int = 200, writes: int = 64, seed: int = 42) -> dict:
+    results = {}
+    for size in sizes:
+        try:
+            results[str(size)] = result = _run_in_subprocess(size, queries, writes, seed)
+        except subprocess.CalledProcessError as e:
+            print(f"rows={size}: failed\n{e.stderr[-2000:]}")
+            continue
+        print(f"rows={result['rows']:>8} setup={result['setup_vector_db_seconds']:.2f}s "
+              f"ann_shards={result['ann_shards']}/{result['shards']} "
+              f"semantic p95={result['find_semantic_categories']['p95_ms']:.3f}ms "
+              f"random p95={result['find_random_examples_from_category']['p95_ms']:.3f}ms "
+              f"similar p95={result['find_similar_examples']['p95_ms']:.3f}ms "
+              f"prompt p95={result['get_enhanced_prompt']['p95_ms']:.3f}ms "
+              f"append p95={result['add_user_prompt_to_db']['p95_ms']:.3f}ms rss={result['max_rss_mb']:.0f}MB")
+    return {"queries": queries, "writes": writes, "seed": seed, "sizes": results}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Retrieval/prompt/DB-write latency as the good-examples DB grows.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--writes", type=int, default=64)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", help="results ko is file mein likho")
+    parser.add_argument("--thresholds", help="regression thresholds JSON (dekhein benchmarks/regression.py)")
+    parser.add_argument("--worker", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker is not None:
+        print(json.dumps(run_size(args.worker, args.queries, args.writes, args.seed)))
+        return
+
+    results = {"scale": run(args.sizes, args.queries, args.writes, args.seed)}
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.thresholds:
+        failures = check_thresholds(results, load_thresholds(args.thresholds))
+        for failure in failures:
+            print(f"REGRESSION: {failure}")
+        sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+# benchmarks/suite.py - Scale benchmark + load test ek saath, thresholds/baseline check ke saath
+#
+# Ek machine-readable JSON banta hai ({"meta", "scale", "load"}); exit code 1 agar koi
+# threshold (benchmarks/thresholds.json) ya baseline se tolerance toota. Performance
+# badlav prove karne ke liye: pehle main branch par --json baseline.json, phir badlav
+# ke saath --baseline baseline.json.
+#
+# Usage (repo root se):
+#   python -m benchmarks.suite --json bench_output.json
+#   python -m benchmarks.suite --quick --baseline bench_output.json
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import subprocess
+import tempfile
+
+from benchmarks import scale_benchmark
+from benchmarks.regression import DEFAULT_THRESHOLDS, check_thresholds, compare_baseline, load_thresholds
+
+QUICK = {"sizes": [11, 1000, 10000], "queries": 100, "db_size": 2000, "concurrency": [1, 8], "requests": 60}
+FULL = {"sizes": scale_benchmark.DEFAULT_SIZES, "queries": 200, "db_size": 10000, "concurrency": [1, 8, 32], "requests": 200}
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=scale_benchmark.REPO_ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_load_test(profile: dict, seed: int) -> dict:
+    """load_test apni temp directory mein chdir karta hai, isliye alag process mein."""
+    with tempfile.TemporaryDirectory(prefix="hissab_suite_") as tmp:
+        path = os.path.join(tmp, "load.json")
+        subprocess.run([sys.executable, "-m", "benchmarks.load_test", "--db-size", str(profile["db_size"]),
+                        "--requests", str(profile["requests"]), "--seed", str(seed), "--json", path,
+                        "--concurrency", *map(str, profile["concurrency"])],
+                       cwd=scale_benchmark.REPO_ROOT, env=dict(os.environ, HISSAB_TRACE_SAMPLE_RATE="0"), check=True)
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)["load"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the scale benchmark and load test, then check for regressions.")
+    parser.add_argument("--quick", action="store_true", help="chhote sizes (CI/pre-commit ke liye)")
+    parser.add_argument("--skip-load", action="store_true")
+    parser.add_argument("--skip-scale", action="store_true")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", help="results ko is file mein likho")
+    parser.add_argument("--thresholds", default=DEFAULT_THRESHOLDS)
+    parser.add_argument("--baseline", help="purani suite results file; *_ms numbers compare hote hain")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    args = parser.parse_args()
+    profile = QUICK if args.quick else FULL
+
+    results = {"meta": {"commit": _git_commit(), "python": platform.python_version(), "machine": platform.machine(),
+                        "cpus": os.cpu_count(), "profile": "quick" if args.quick else "full", "started": time.time()}}
+    if not args.skip_scale:
+        results["scale"] = scale_benchmark.run(profile["sizes"], profile["queries"], seed=args.seed)
+    if not args.skip_load:
+        results["load"] = run_load_test(profile, args.seed)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+
+    failures = check_thresholds(results, load_thresholds(args.thresholds))
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            failures += compare_baseline(results, json.load(f), args.tolerance)
+    for failure in failures:
+        print(f"REGRESSION: {failure}")
+    print("OK" if not failures else f"{len(failures)} regression(s)")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+# benchmarks/synthetic.py - Synthetic Hinglish hisaab data (queries + responses) for scale/load tests
+#
+# Har category ke templates mein naam, cheezein aur amounts random bharte hain; jawab
+# utne hi numbers se banta hai, isliye rows asli DB jaisi dikhti hain (alag-alag
+# lambai, Indian number format, kuch Devanagari queries). Same seed -> same data.
+import random
+
+from calculatornew import format_rupees
+
+NAMES = ["Rohit", "Suman", "Aman", "Priya", "Vikas", "Neha", "Arjun", "Pooja", "Ravi", "Kiran", "Sanjay", "Meena"]
+ITEMS = ["chai", "khana", "petrol", "shirt", "joote", "sabzi", "dawai", "kitaab", "recharge", "auto", "movie", "doodh"]
+PLACES = ["Goa", "Manali", "Jaipur", "Shimla", "Rishikesh", "Udaipur"]
+ASSETS = ["share market", "mutual fund", "sona", "FD", "crypto"]
+
+
+def _amount(rng: random.Random, low: int, high: int, step: int = 10) -> int:
+    return rng.randrange(low // step, high // step + 1) * step
+
+
+def _expense(rng):
+    picks = rng.sample(ITEMS, rng.randint(2, 4))
+    costs = [_amount(rng, 20, 2000) for _ in picks]
+    text = "Aaj " + ", ".join(f"{c} rupaye {i} par" for i, c in zip(picks, costs)) + " kharch kiye. Kul kitna hua?"
+    lines = "\n".join(f"- {i.title()}: {format_rupees(c)}" for i, c in zip(picks, costs))
+    return text, f"Aapke aaj ke kul kharch is prakaar hain:\n{lines}\n**Kul Kharch: {format_rupees(sum(costs))}**"
+
+
+def _group(rng):
+    people = rng.sample(NAMES, rng.randint(2, 4))
+    paid = [_amount(rng, 500, 9000, 100) for _ in people]
+    total = sum(paid)
+    share = total / (len(people) + 1)
+    text = (f"Hum {len(people) + 1} dost {rng.choice(PLACES)} gaye. "
+            + ", ".join(f"{p} ne {a} diye" for p, a in zip(people, paid)) + ". Kisko kitna dena hai?")
+    return text, (f"**Trip ka Hisaab:**\n- **Kul Kharch:** {format_rupees(total)}\n- **Log:** {len(people) + 1}\n"
+                  f"- **Prati Vyakti Hissa:** {format_rupees(share)}")
+
+
+def _budget(rng):
+    salary = _amount(rng, 15000, 150000, 1000)
+    bills = [_amount(rng, 1000, salary // 5, 500) for _ in range(rng.randint(2, 4))]
+    text = f"Meri salary {salary} hai. " + ", ".join(f"{b} ka kharch" for b in bills) + " hota hai. Kitni bachat hoti hai?"
+    return text, (f"**Aapka Maheene ka Hisaab:**\n- **Kul Aamdani (Salary):** {format_rupees(salary)}\n"
+                  f"- **Kul Kharch:** {format_rupees(sum(bills))}\n"
+                  f"- **Isliye, aapki kul bachat {format_rupees(salary - sum(bills))} hai.**")
+
+
+def _compare(rng):
+    item = rng.choice(ITEMS)
+    a = _amount(rng, 100, 50000)
+    b = a + rng.choice([-1, 1]) * _amount(rng, 10, max(10, a // 4))
+    text = f"Ek dukaan par {item} {a} ka hai aur doosri dukaan par {b} ka. Kaunsa sasta hai?"
+    cheaper = "Pehli" if a < b else "Dusri"
+    return text, f"**Cheezon ki Tulna:**\n- {cheaper} dukaan wala sasta hai.\n- **Antar {format_rupees(abs(a - b))} ka hai.**"
+
+
+def _lending(rng):
+    name = rng.choice(NAMES)
+    given = _amount(rng, 500, 50000, 100)
+    back = _amount(rng, 100, given, 100)
+    text = f"Maine {name} ko {given} rupaye udhaar diye the, usne {back} lauta diye. Ab kitne lene baaki hain?"
+    return text, (f"**Udhaari ka Hisaab:**\n- **Kul Udhaar:** {format_rupees(given)}\n- **Vaapas Mile:** {format_rupees(back)}\n"
+                  f"- **Isliye, aapko {name} se abhi {format_rupees(given - back)} aur lene hain.**")
+
+
+def _investment(rng):
+    invested = _amount(rng, 5000, 500000, 1000)
+    now = invested + rng.choice([-1, 1]) * _amount(rng, 500, invested // 2, 500)
+    text = f"Maine {invested} rupaye {rng.choice(ASSETS)} mein lagaye the, ab value {now} hai. Kitna munafa hua?"
+    word = "munafa" if now >= invested else "nuksaan"
+    return text, (f"**Nivesh ka Hisaab:**\n- **Aapka Nivesh:** {format_rupees(invested)}\n- **Abhi ka Value:** {format_rupees(now)}\n"
+                  f"- **Isliye, aapko kul {format_rupees(abs(now - invested))} ka {word} hua hai.**")
+
+
+def _emi(rng):
+    emi = _amount(rng, 1000, 40000, 500)
+    months = rng.choice([6, 12, 18, 24, 36])
+    text = f"Mera loan hai aur har mahine {emi} ki EMI jaati hai. {months} mahine mein kitna chuka dunga?"
+    return text, f"**Loan ka Hisaab:**\n- **Har Mahine ki EMI:** {format_rupees(emi)}\n- **Isliye, aap {months} mahine mein {format_rupees(emi * months)} chuka denge.**"
+
+
+def _balance(rng):
+    start = _amount(rng, 1000, 100000, 100)
+    income = _amount(rng, 1000, 80000, 100)
+    spent = _amount(rng, 100, start + income, 100)
+    text = f"Mere account mein {start} the, {income} salary aayi, phir {spent} ka bill bhara. Ab kitne bache?"
+    return text, (f"**Account ka Hisaab:**\n- **Shuruaati Balance:** {format_rupees(start)}\n- **Salary Aayi:** + {format_rupees(income)}\n"
+                  f"- **Bill Bhara:** - {format_rupees(spent)}\n- **Aapka abhi ka balance {format_rupees(start + income - spent)} hai.**")
+
+
+def _discount(rng):
+    price = _amount(rng, 200, 50000)
+    percent = rng.choice([5, 10, 15, 20, 25, 30, 40, 50])
+    off = price * percent / 100
+    text = f"Ek {rng.choice(ITEMS)} {price} ka hai aur us par {percent}% discount hai. Kitne dene honge?"
+    return text, (f"**Discount ka Hisaab:**\n- **Daam:** {format_rupees(price)}\n- **Discount ({percent}%):** {format_rupees(off)}\n"
+                  f"- **Isliye, aapko {format_rupees(price - off)} dene honge.**")
+
+
+def _salary(rng):
+    daily = _amount(rng, 200, 3000)
+    days = rng.randint(10, 30)
+    text = f"Main din ke {daily} rupaye kamata hoon. Is mahine {days} din kaam kiya. Salary kitni hui?"
+    return text, f"**Salary ka Hisaab:**\n- **Ek Din ki Kamai:** {format_rupees(daily)}\n- **Isliye, aapki salary {format_rupees(daily * days)} hui ({daily} x {days}).**"
+
+
+GENERATORS = {
+    "personal_expense_tracking": _expense,
+    "group_settlement": _group,
+    "monthly_budget_and_savings": _budget,
+    "price_comparison": _compare,
+    "lending_and_borrowing": _lending,
+    "investment_and_profit": _investment,
+    "loan_and_emi": _emi,
+    "income_and_balance": _balance,
+    "discount_and_offers": _discount,
+    "salary_calculation": _salary,
+}
+
+DEVANAGARI_TEMPLATES = [
+    "मेरे पास {a} रुपये थे, मैंने {b} खर्च किए, अब कितने बचे?",
+    "मैंने {name} को {a} रुपये उधार दिए, उसने {b} लौटाए, कितने बाकी हैं?",
+    "{a} रुपये के सामान पर {p} प्रतिशत छूट है, कितना देना होगा?",
+]
+
+
+def generate_examples(n: int, seed: int = 0) -> list:
+    """n synthetic good examples: [{"category", "user_text", "model_response"}], categories round-robin se."""
+    rng = random.Random(seed)
+    categories = list(GENERATORS)
+    examples = []
+    for i in range(n):
+        category = categories[i % len(categories)]
+        text, response = GENERATORS[category](rng)
+        examples.append({"category": category, "user_text": text, "model_response": response})
+    return examples
+
+
+def generate_queries(n: int, seed: int = 1, devanagari_ratio: float = 0.2, repeat_ratio: float = 0.1) -> list:
+    """Load test ke liye user queries: zyaadatar Hinglish, kuch Devanagari (LLM preprocess path),
+    aur kuch pehle wali queries dobara (answer/query cache path)."""
+    rng = random.Random(seed)
+    categories = list(GENERATORS)
+    queries = []
+    for _ in range(n):
+        roll = rng.random()
+        if queries and roll < repeat_ratio:
+            queries.append(rng.choice(queries))
+        elif roll < repeat_ratio + devanagari_ratio:
+            template = rng.choice(DEVANAGARI_TEMPLATES)
+            a = _amount(rng, 500, 50000)
+            queries.append(template.format(a=a, b=_amount(rng, 10, a), p=rng.choice([10, 20, 25]), name=rng.choice(NAMES)))
+        else:
+            queries.append(GENERATORS[rng.choice(categories)](rng)[0])
+    return queries
+
+
+def populate_store(store, examples: list, encode, batch_size: int = 4096):
+    """Examples ko embeddings ke saath store mein bulk likho (batch-wise encode + ek flush per batch)."""
+    flush_batch_size, store.flush_batch_size = store.flush_batch_size, batch_size + 1  # beech mein auto-flush nahi
+    try:
+        for start in range(0, len(examples), batch_size):
+            batch = examples[start:start + batch_size]
+            vectors = encode([e["user_text"] for e in batch])
+            for example, vector in zip(batch, vectors):
+                store.append_good(example["category"], example["user_text"], example["model_response"], vector)
+            store.flush()
+    finally:
+        store.flush_batch_size = flush_batch_size
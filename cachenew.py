@@ -0,0 +1,62 @@
+# cachenew.py - Small thread-safe in-memory caches shared by the pipeline
+import time
+import threading
+from collections import OrderedDict
+
+
+class LRUCache:
+    """Bounded, thread-safe LRU cache with optional TTL and hit/miss counters."""
+
+    def __init__(self, max_size: int = 1024, ttl_seconds: float = None):
+        self.max_size = max(1, max_size)
+        self.ttl_seconds = ttl_seconds
+        self._data = OrderedDict()  # key -> (value, stored_at)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _expired(self, stored_at: float) -> bool:
+        return self.ttl_seconds is not None and time.monotonic() - stored_at > self.ttl_seconds
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None or self._expired(item[1]):
+                if item is not None:
+                    del self._data[key]
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return item[0]
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = (value, time.monotonic())
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def pop(self, key, default=None):
+        with self._lock:
+            item = self._data.pop(key, None)
+            return default if item is None else item[0]
+
+    def items(self) -> list:
+        """Zinda (expire na hue) entries ka snapshot, sabse purane pehle."""
+        with self._lock:
+            return [(k, v) for k, (v, stored_at) in self._data.items() if not self._expired(stored_at)]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {"size": len(self._data), "max_size": self.max_size, "hits": self.hits, "misses": self.misses,
+                "evictions": self.evictions, "hit_ratio": (self.hits / total) if total else 0.0}
@@ -0,0 +1,641 @@
+# calculatornew.py - Deterministic hisaab engine for the simple arithmetic categories
+#
+# Hinglish/Hindi query se amounts ("2 lakh", "20%", "₹1,500", "do hazaar paanch sau",
+# "सवा लाख") nikal kar har amount ko clause ke keywords se ek role diya jaata hai
+# (shuruaati balance, aamdani, kharch, EMI, ...). Solver tabhi jawab deta hai jab
+# har amount ka role saaf ho; zara bhi shak ho to None lautata hai aur pipeline
+# Gemini par jaati hai. Jawab INITIAL_PROMPTS ke model_response jaisa Markdown hai.
+import os
+import re
+import math
+import threading
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# --- Configuration ---
+CALCULATOR_ENABLED = os.getenv("HISSAB_CALCULATOR", "1") != "0"
+SUPPORTED_CATEGORIES = ("income_and_balance", "discount_and_offers", "salary_calculation",
+                        "lending_and_borrowing", "loan_and_emi", "price_comparison")
+
+# --- Vocabulary ---
+_NUMBER_WORDS = {
+    "ek": 1, "do": 2, "teen": 3, "char": 4, "chaar": 4, "paanch": 5, "panch": 5, "chhe": 6, "chhah": 6,
+    "saat": 7, "aath": 8, "nau": 9, "das": 10, "gyarah": 11, "barah": 12, "baarah": 12, "terah": 13,
+    "chaudah": 14, "pandrah": 15, "solah": 16, "satrah": 17, "atharah": 18, "unnis": 19, "bees": 20,
+    "pachees": 25, "pachchis": 25, "tees": 30, "chalis": 40, "chaalis": 40, "pachas": 50, "pachaas": 50,
+    "sattar": 70, "assi": 80, "nabbe": 90,
+    "एक": 1, "दो": 2, "तीन": 3, "चार": 4, "पांच": 5, "पाँच": 5, "छह": 6, "छः": 6, "सात": 7, "आठ": 8,
+    "नौ": 9, "दस": 10, "ग्यारह": 11, "बारह": 12, "तेरह": 13, "चौदह": 14, "पंद्रह": 15, "सोलह": 16,
+    "सत्रह": 17, "अठारह": 18, "उन्नीस": 19, "बीस": 20, "पच्चीस": 25, "तीस": 30, "चालीस": 40,
+    "पचास": 50, "साठ": 60, "सत्तर": 70, "अस्सी": 80, "नब्बे": 90,
+}
+_FRACTION_WORDS = {"dedh": 1.5, "dhai": 2.5, "adhai": 2.5, "डेढ़": 1.5, "ढाई": 2.5}
+_MODIFIER_WORDS = {"sawa": 0.25, "saade": 0.5, "sade": 0.5, "paune": -0.25, "सवा": 0.25, "साढ़े": 0.5, "पौने": -0.25}
+_MULTIPLIERS = {
+    "sau": 100, "सौ": 100,
+    "hazaar": 1000, "hazar": 1000, "hajar": 1000, "hajaar": 1000, "thousand": 1000, "हज़ार": 1000, "हजार": 1000,
+    "lakh": 100000, "lac": 100000, "lakhs": 100000, "laakh": 100000, "लाख": 100000,
+    "crore": 10000000, "karod": 10000000, "karor": 10000000, "cr": 10000000, "करोड़": 10000000, "करोड": 10000000,
+}
+_PERCENT_WORDS = {"%", "percent", "pratishat", "प्रतिशत"}
+_CURRENCY_WORDS = {"₹", "rs", "inr", "rupaye", "rupay", "rupaiye", "rupees", "rupee", "rupya", "रुपये", "रुपए", "रुपया"}
+_DAY_WORDS = {"din", "dino", "dinon", "day", "days", "दिन"}
+_HOUR_WORDS = {"ghante", "ghanta", "ghanton", "hour", "hours", "घंटे", "घंटा"}
+_WEEK_WORDS = {"hafte", "hafta", "week", "weeks", "हफ्ते", "हफ़्ते"}
+_MONTH_WORDS = {"mahine", "mahina", "maheene", "month", "months", "महीने", "महीना"}
+_YEAR_WORDS = {"saal", "sal", "varsh", "year", "years", "साल", "वर्ष"}
+_PEOPLE_WORDS = {"log", "logon", "dost", "doston", "friends", "people", "लोग", "दोस्त"}
+_QUANTITY_WORDS = {"kg", "kilo", "gram", "gm", "litre", "liter", "piece", "pieces", "packet", "dozen", "metre", "meter",
+                   "किलो", "ग्राम", "लीटर", "दर्जन"}
+_COUNT_UNITS = _DAY_WORDS | _HOUR_WORDS | _WEEK_WORDS | _MONTH_WORDS | _YEAR_WORDS | _PEOPLE_WORDS | _QUANTITY_WORDS
+_CLAUSE_BREAKS = {",", ".", "?", "!", ";", "।", "aur", "and", "phir", "fir", "then", "uske", "lekin", "magar", "but",
+                  "और", "फिर", "लेकिन"}
+
+_CREDIT_WORDS = {"mili", "mile", "mila", "aayi", "aaye", "aaya", "aai", "aye", "kamaye", "kamaya", "jama", "credit",
+                 "credited", "received", "मिली", "मिले", "मिला", "आई", "आए", "आया", "जमा"}
+_DEBIT_WORDS = {"kharch", "kharcha", "kharche", "bhara", "bhare", "bhari", "diye", "diya", "di", "gaye", "gaya", "lage",
+                "laga", "lagaye", "kharida", "kharidi", "kharide", "nikale", "nikala", "nikaale", "withdraw", "debit",
+                "paid", "spent", "bheje", "bheja", "खर्च", "भरा", "भरे", "दिए", "दिये", "दिया", "गए", "लगे",
+                "खरीदा", "खरीदी", "निकाले", "भेजे"}
+_SELF_OBJECT = {"mujhe", "muje", "mujhko", "मुझे"}
+_SELF_SUBJECT = {"maine", "mene", "hamne", "humne", "मैंने", "मैने", "हमने"}
+_OTHER_SUBJECT = {"ne", "usne", "unhone", "isne", "inhone", "ने", "उसने", "उन्होंने"}
+_GIVE_WORDS = {"diye", "diya", "di", "दिए", "दिये", "दिया"}
+_QUESTION_WORDS = {"kitna", "kitne", "kitni", "kya", "kaunsa", "kaunsi", "kaun", "kab", "कितना", "कितने", "कितनी",
+                   "क्या", "कौनसा", "कौन"}
+_REMAINING_WORDS = ("baaki", "baki", "bacha", "bache", "bachi", "remaining", "बाकी", "बाक़ी", "बचा", "बचे")
+_EXTRA_CHARGE_WORDS = {"delivery", "shipping", "charge", "charges", "fee", "fees", "plus", "extra", "डिलीवरी"}
+_PRICE_ANCHORS = {"ka", "ki", "ke", "का", "की", "के"}
+_SELF_SOURCE = {"mujhse", "mujhse", "मुझसे"}
+_LOAN_WORDS = {"udhaar", "udhar", "udhari", "udhaari", "karz", "karza", "qarz", "उधार", "कर्ज", "क़र्ज़"}
+_TAKEN_WORDS = {"liye", "liya", "lie", "li", "लिए", "लिये", "लिया"}
+_RETURN_WORDS = {"wapas", "vapas", "vaapas", "waapas", "lauta", "lautaye", "lautaya", "lautai", "chukaye", "chukaya",
+                 "chuka", "returned", "वापस", "लौटा", "लौटाए", "लौटाये", "चुकाए"}
+_RETURNED_WORDS = {"lauta", "lautaye", "lautaya", "lautai", "chukaye", "chukaya", "chuka", "returned", "लौटा", "लौटाए",
+                   "लौटाये", "चुकाए"}
+# "wapas" ke saath yeh verbs hon tabhi paise sach mein lautaye gaye ("wapas kiye", "wapas mile")
+_DONE_VERBS = {"diye", "diya", "di", "kiye", "kiya", "kar", "mile", "mila", "aaye", "aaya", "aa", "दिए", "दिये", "दिया",
+               "किए", "किये", "मिले", "आए"}
+# Maangna ya aage lautana abhi hua hi nahi
+_NOT_RETURNED_WORDS = {"maange", "maanga", "maangi", "mange", "manga", "mangi", "maang", "mang", "dega", "degi", "denge",
+                       "dene", "dena", "lautayega", "lautayegi", "lautana", "karega", "karegi", "karenge", "माँगे",
+                       "मांगे", "माँगा", "मांगा", "देगा", "देंगे", "देना"}
+_DISCOUNT_WORDS = {"discount", "chhoot", "chhut", "chut", "off", "chhooth", "छूट", "डिस्काउंट"}
+_EMI_WORDS = {"emi", "kisht", "kist", "installment", "instalment", "किस्त", "ईएमआई"}
+_INTEREST_WORDS = {"byaj", "byaaj", "interest", "rate", "ब्याज"}
+_SIMPLE_INTEREST_WORDS = {"simple", "flat", "sadharan", "saadharan", "saral", "साधारण"}
+_TOTAL_WORDS = {"total", "kul", "poora", "pura", "कुल"}
+# Kisi dar ("har din 500", "roz", "mahine ka") wala amount ek baar ghataana galat hoga
+_RATE_WORDS = {"har", "roz", "rozana", "daily", "prati", "per", "weekly", "monthly", "हर", "रोज़", "रोज", "प्रति"} \
+    | _DAY_WORDS | _WEEK_WORDS | _MONTH_WORDS
+# Amount ke turant baad yeh ho to woh paisa hai: "1000 rupaye", "500 ka bill", "2000 the", "300 kharch", "25000 salary"
+_MONEY_FOLLOWERS = {"the", "thi", "tha", "hai", "hain", "salary", "bill", "थे", "था", "थी", "है", "हैं"}
+_PAIR_WORDS = {"dono", "pair", "jodi", "jode", "joda", "set", "sets", "दोनों", "जोड़ी"}
+_BLOCKING_WORDS = {"gst", "tax", "cashback", "commission", "byaj", "byaaj", "interest", "ब्याज", "टैक्स"}
+_PLACE_MARKERS = {"par", "pe", "per", "mein", "me", "पर", "में"}
+_GENERIC_PLACES = {"dukaan", "dukan", "shop", "store", "jagah", "market", "दुकान"}
+_STOPWORDS = {"ek", "ka", "ki", "ke", "ko", "se", "ne", "hai", "hain", "tha", "the", "thi", "maine", "mujhe", "usne",
+              "apne", "apni", "mera", "meri", "mere", "wahi", "woh", "wo", "yeh", "ye", "aur", "par", "pe", "mein",
+              "dost", "bhai", "doosri", "dusri", "pehli", "wala", "wali", "rupaye", "rupay", "rs", "₹", "एक", "का",
+              "की", "के", "को", "से", "ने", "है"}
+_ORDINALS = ["Pehli", "Dusri", "Teesri", "Chauthi", "Paanchvi"]
+
+_DEVANAGARI_DIGITS = str.maketrans("०१२३४५६७८९", "0123456789")
+_TOKEN_RE = re.compile(r"₹|%|\d{1,3}(?:,\d{2,3})+(?:\.\d+)?|\d+(?:\.\d+)?k?|[a-z]+|[ऀ-ॿ]+|[,.?!;।]")
+
+
+class Amount:
+    __slots__ = ("value", "percent", "start", "end", "clause")
+
+    def __init__(self, value: float, percent: bool, start: int, end: int, clause: int):
+        self.value = value
+        self.percent = percent
+        self.start = start  # pehla token (index)
+        self.end = end      # aakhri token ke baad ka index
+        self.clause = clause
+
+    def __repr__(self):
+        return f"Amount({self.value}{'%' if self.percent else ''}, clause={self.clause})"
+
+
+def tokenize(text: str) -> list:
+    text = (text or "").lower().translate(_DEVANAGARI_DIGITS)
+    text = re.sub(r"\brs\.?(?=\s*\d)", " ₹ ", text)
+    return _TOKEN_RE.findall(text)
+
+
+def _number_value(token: str):
+    if token[0].isdigit():
+        if token.endswith("k"):
+            return float(token[:-1]) * 1000
+        return float(token.replace(",", ""))
+    return _NUMBER_WORDS.get(token, _FRACTION_WORDS.get(token))
+
+
+def parse_amounts(tokens: list) -> list:
+    """Token list mein saare amounts: digits, multipliers (sau/hazaar/lakh/crore), number words aur %.
+
+    Akele chhote number words ("ek jacket", "de do") tabhi gine jaate hain jab unke baad
+    koi multiplier, currency ya ginti ki unit (din, mahine, log, ...) aaye.
+    """
+    amounts = []
+    clause = 0
+    i = 0
+    while i < len(tokens):
+        token = tokens[i]
+        if token in _CLAUSE_BREAKS:
+            clause += 1
+            i += 1
+            continue
+        start = i
+        total, current, modifier = 0.0, None, 0.0
+        seen_digit = seen_multiplier = False
+        while i < len(tokens):
+            token = tokens[i]
+            value = _number_value(token)
+            if token in _MODIFIER_WORDS and current is None:
+                modifier = _MODIFIER_WORDS[token]
+            elif value is not None and current is None:
+                current = value + modifier
+                seen_digit = seen_digit or token[0].isdigit()
+                modifier = 0.0
+            elif token in _MULTIPLIERS and (current is not None or modifier):
+                multiplier = _MULTIPLIERS[token]
+                base = current if current is not None else 1 + modifier
+                if multiplier == 100:
+                    current = base * 100
+                else:
+                    total += base * multiplier
+                    current = None
+                modifier = 0.0
+                seen_multiplier = True
+            else:
+                break
+            i += 1
+        if i == start:
+            i += 1
+            continue
+        if current is None and total == 0:
+            continue  # sirf "sawa"/"saade" jaisa modifier, koi number nahi
+        value = total + (current or 0.0)
+        next_token = tokens[i] if i < len(tokens) else ""
+        prev_token = tokens[start - 1] if start else ""
+        percent = next_token in _PERCENT_WORDS
+        if not (seen_digit or seen_multiplier or percent or next_token in _COUNT_UNITS
+                or next_token in _CURRENCY_WORDS or prev_token in _CURRENCY_WORDS):
+            continue  # akela number word: shayad article ya verb ("ek", "do")
+        end = i + 1 if percent else i
+        amounts.append(Amount(value, percent, start, end, clause))
+        i = end
+    return amounts
+
+
+def _clauses(tokens: list) -> list:
+    """Har clause ke tokens ka set, parse_amounts ke clause numbering ke hisaab se."""
+    clauses = [set()]
+    for token in tokens:
+        if token in _CLAUSE_BREAKS:
+            clauses.append(set())
+        else:
+            clauses[-1].add(token)
+    return clauses
+
+
+def _clause_tokens(tokens: list, clause: int) -> list:
+    index, current = 0, []
+    for token in tokens:
+        if token in _CLAUSE_BREAKS:
+            if index == clause:
+                return current
+            index += 1
+            current = []
+        else:
+            current.append(token)
+    return current if index == clause else []
+
+
+def _has_prefix(words, prefixes) -> bool:
+    return any(w.startswith(p) for w in words for p in prefixes)
+
+
+def _after(tokens: list, amount: Amount, n: int = 1) -> list:
+    return tokens[amount.end:amount.end + n]
+
+
+def _question_tokens(tokens: list) -> list:
+    """Sawaal wale clauses (kitna/kya/... ya "?" se khatam) ke tokens; sawaal na ho to khaali."""
+    question, current = [], []
+    for token in tokens + ["."]:
+        if token in _CLAUSE_BREAKS:
+            if token == "?" or set(current) & _QUESTION_WORDS:
+                question.extend(current)
+            current = []
+        else:
+            current.append(token)
+    return question
+
+
+def _user_gives(words: list) -> bool:
+    """ "diye/diya" tabhi kharch hai jab dene wala user ho: "maine diye" ya bina kartaa ke "500 diye".
+
+    "Papa ne 500 diye" / "usne diye" mein koi aur de raha hai, isliye yeh kharch nahi.
+    """
+    for token in words:
+        if token in _SELF_SUBJECT:
+            return True
+        if token in _OTHER_SUBJECT:
+            return False
+    return True
+
+
+def _is_money(tokens: list, amount: Amount) -> bool:
+    """Amount rupaye hai ya nahi: pehle ₹/Rs, ya baad mein rupaye/ka/ki/ke, ya seedha koi paise wala role word."""
+    before = tokens[amount.start - 1] if amount.start else ""
+    after = _after(tokens, amount)[:1]
+    after = after[0] if after else ""
+    return before in _CURRENCY_WORDS or after in _CURRENCY_WORDS | _PRICE_ANCHORS | _MONEY_FOLLOWERS \
+        or after in _CREDIT_WORDS or after in _DEBIT_WORDS
+
+
+def _who_acts(words: list):
+    """Clause ka kartaa: "self" (maine), "other" (usne / X ne / mujhe ... ), ya None (saaf nahi)."""
+    for token in words:
+        if token in _SELF_SUBJECT:
+            return "self"
+        if token in _OTHER_SUBJECT or token in _SELF_OBJECT:
+            return "other"
+    return None
+
+
+# --- Formatting ---
+def _indian_group(n: int) -> str:
+    s = str(abs(n))
+    if len(s) > 3:
+        head, tail = s[:-3], s[-3:]
+        groups = []
+        while len(head) > 2:
+            groups.insert(0, head[-2:])
+            head = head[:-2]
+        s = ",".join(([head] if head else []) + groups + [tail])
+    return ("-" if n < 0 else "") + s
+
+
+def format_rupees(value: float) -> str:
+    """₹1,50,000 jaisa Indian grouping; paise hon to do decimal."""
+    value = round(value, 2)
+    if float(value).is_integer():
+        return f"₹{_indian_group(int(value))}"
+    rupees, paise = f"{abs(value):.2f}".split(".")
+    return f"₹{'-' if value < 0 else ''}{_indian_group(int(rupees))}.{paise}"
+
+
+def _plain(value: float) -> str:
+    """Calculation ke bracket wale hisse ke liye: 5000, 12, 2.5"""
+    value = round(value, 2)
+    return str(int(value)) if float(value).is_integer() else f"{value:g}"
+
+
+def _count_word(n: float) -> str:
+    return "ek" if n == 1 else _plain(n)
+
+
+def _label(word: str) -> str:
+    return word[:1].upper() + word[1:]
+
+
+# --- Solvers (har ek: tokens, amounts -> Markdown ya None) ---
+def _solve_income_and_balance(tokens: list, amounts: list):
+    if not amounts or any(a.percent for a in amounts):
+        return None
+    # Jawab sirf balance hai; sawaal kul kharch/kamai ka ho to Gemini
+    if _has_prefix(_question_tokens(tokens), ("kharch", "kamai", "aamdani", "kamaya", "खर्च", "कमाई")):
+        return None
+    if set(tokens) & _RATE_WORDS:
+        return None  # "har din 500 kharch": kitni baar, yeh Gemini samjhega
+    clauses = _clauses(tokens)
+    lines, balance, initial_seen = [], 0.0, False
+    for position, amount in enumerate(amounts):
+        words = clauses[amount.clause]
+        if not _is_money(tokens, amount):
+            return None  # "3 shirt 500 ki": 3 ginti hai, rupaye nahi
+        gives = bool(words & _GIVE_WORDS)
+        if gives and not words & _SELF_OBJECT and not _user_gives(_clause_tokens(tokens, amount.clause)):
+            return None  # kisi aur ne diye: kise diye, saaf nahi
+        credit = bool(words & _CREDIT_WORDS) or bool(words & _SELF_OBJECT and gives)
+        debit = bool(words & _DEBIT_WORDS) and not credit
+        if credit and words & _DEBIT_WORDS - _GIVE_WORDS:
+            return None  # ek hi clause mein aamdani aur kharch dono: role saaf nahi
+        if credit:
+            label = "Salary Aayi" if _has_prefix(words, ("salary", "तनख्वाह", "वेतन")) else "Paise Mile"
+            lines.append(f"- **{label}:** + {format_rupees(amount.value)}")
+            balance += amount.value
+        elif debit:
+            label = "Bill Bhara" if _has_prefix(words, ("bill", "बिल")) else "Kharch"
+            lines.append(f"- **{label}:** - {format_rupees(amount.value)}")
+            balance -= amount.value
+        elif position == 0 and not initial_seen:
+            lines.append(f"- **Shuruaati Balance:** {format_rupees(amount.value)}")
+            balance += amount.value
+            initial_seen = True
+        else:
+            return None
+    if balance < 0 or len(amounts) < 2:
+        return None
+    if _has_prefix(tokens, ("bach", "बच")) and not _has_prefix(tokens, ("account", "khat", "balance", "खात")):
+        lines.append(f"- **Aapke paas ab {format_rupees(balance)} bache hain.**")
+    else:
+        lines.append(f"- **Aapka abhi ka balance {format_rupees(balance)} hai.**")
+    return "**Account ka Hisaab:**\n" + "\n".join(lines)
+
+
+def _solve_discount_and_offers(tokens: list, amounts: list):
+    if not set(tokens) & _DISCOUNT_WORDS or set(tokens) & _BLOCKING_WORDS:
+        return None
+    percents = [a for a in amounts if a.percent]
+    prices = [a for a in amounts if not a.percent]
+    if len(prices) != 1 or not percents or any(not 0 < p.value <= 100 for p in percents):
+        return None
+    # Ginti ("do shirt", "3 piece", "dono") ho to daam ek cheez ka hai ya sabka, saaf nahi
+    in_amounts = {i for a in amounts for i in range(a.start, a.end)}
+    if set(tokens) & (_QUANTITY_WORDS | _PAIR_WORDS) or any(
+            i not in in_amounts and token not in ("ek", "एक") and _number_value(token) is not None
+            for i, token in enumerate(tokens)):
+        return None
+    if any(p.start < prices[0].start for p in percents) and len(percents) > 1:
+        return None
+    item = "Saamaan"
+    for i, token in enumerate(tokens[:prices[0].start]):
+        if token in ("ek", "एक") and i + 1 < prices[0].start and tokens[i + 1] not in _STOPWORDS \
+                and not tokens[i + 1][0].isdigit():
+            item = _label(tokens[i + 1])
+            break
+    price = prices[0].value
+    lines = [f"- **{item} ka Daam:** {format_rupees(price)}"]
+    for n, percent in enumerate(percents):
+        cut = price * percent.value / 100
+        title = "Discount" if n == 0 else "Extra Discount"
+        lines.append(f"- **{title} ({_plain(percent.value)}%):** {format_rupees(cut)} ({_plain(price)} ka {_plain(percent.value)}%)")
+        price -= cut
+    lines.append(f"- **Isliye, aapko {format_rupees(price)} dene honge.**")
+    return "**Discount ka Hisaab:**\n" + "\n".join(lines)
+
+
+_WAGE_UNITS = ((_DAY_WORDS, "Din", "Ek Din ki Kamai", "Kul Kaam ke Din"),
+               (_HOUR_WORDS, "Ghante", "Ek Ghante ki Kamai", "Kul Kaam ke Ghante"),
+               (_WEEK_WORDS, "Hafte", "Ek Hafte ki Kamai", "Kul Hafte"))
+
+
+def _solve_salary_calculation(tokens: list, amounts: list):
+    if len(amounts) != 2 or any(a.percent for a in amounts):
+        return None
+    for unit_words, _, rate_label, count_label in _WAGE_UNITS:
+        counts = [a for a in amounts if _after(tokens, a)[:1] and _after(tokens, a)[0] in unit_words]
+        if len(counts) != 1:
+            continue
+        count = counts[0]
+        rate = amounts[1] if count is amounts[0] else amounts[0]
+        before = tokens[max(0, rate.start - 3):rate.start]
+        after = _after(tokens, rate, 3)
+        per_unit = (set(before) & unit_words and set(before) & {"ke", "ka", "ki", "के", "का", "की"}) \
+            or (set(after) & {"per", "prati", "har", "roz", "rozana", "daily", "hourly", "प्रति", "रोज़"}) \
+            or set(tokens) & {"roz", "rozana", "daily", "hourly", "रोज़", "रोज"}
+        if not per_unit or _after(tokens, rate)[:1] and _after(tokens, rate)[0] in _COUNT_UNITS:
+            return None
+        total = rate.value * count.value
+        period = "is mahine ki" if set(tokens) & _MONTH_WORDS else "kul"
+        count_text = _plain(count.value)
+        return ("**Salary ka Hisaab:**\n"
+                f"- **{rate_label}:** {format_rupees(rate.value)}\n"
+                f"- **{count_label}:** {count_text}\n"
+                f"- **Isliye, aapki {period} salary {format_rupees(total)} hui ({_plain(rate.value)} x {count_text}).**")
+    return None
+
+
+def _person_before(words: list, markers: set):
+    for i, token in enumerate(words):
+        if token in markers and i and words[i - 1] not in _STOPWORDS and not words[i - 1][0].isdigit():
+            return _label(words[i - 1])
+    return None
+
+
+def _solve_lending_and_borrowing(tokens: list, amounts: list):
+    if any(a.percent for a in amounts) or set(tokens) & _BLOCKING_WORDS:
+        return None
+    clauses = _clauses(tokens)
+    principal, returns = None, []
+    for amount in amounts:
+        words = clauses[amount.clause]
+        if words & _RETURN_WORDS and principal is not None:
+            returns.append(amount)
+        elif words & _LOAN_WORDS and principal is None:
+            principal = amount
+        else:
+            return None
+    repaid = sum(a.value for a in returns)
+    if principal is None or repaid > principal.value:
+        return None
+    words = _clause_tokens(tokens, principal.clause)
+    word_set = set(words)
+    if word_set & _TAKEN_WORDS:
+        lent = bool(word_set & _SELF_SOURCE)  # "Rohit ne mujhse udhaar liye" = aapne diye
+        person = _person_before(words, {"ne", "ने"} if lent else {"se", "से"})
+    elif word_set & {"diye", "diya", "di", "दिए", "दिये", "दिया"}:
+        lent = not word_set & _SELF_OBJECT  # "Rohit ne mujhe udhaar diye" = aapne liye
+        person = _person_before(words, {"ko", "को"} if lent else {"ne", "ने"})
+    else:
+        return None
+    for amount in returns:
+        # Lautana poora hua ho ("lauta diye", "wapas kiye"), maanga/aage ka nahi
+        returned = _clause_tokens(tokens, amount.clause)
+        if set(returned) & _NOT_RETURNED_WORDS or not (
+                set(returned) & _RETURNED_WORDS or set(returned) & _DONE_VERBS):
+            return None
+        # Aapne diye the to lautane wala doosra hona chahiye, aapne liye the to aap
+        if _who_acts(returned) == ("self" if lent else "other"):
+            return None
+    remaining = principal.value - repaid
+    lines = [f"- **Kul Udhaar:** {format_rupees(principal.value)}",
+             f"- **{'Vaapas Mile' if lent else 'Vaapas Kiye'}:** {format_rupees(repaid)}"]
+    if remaining == 0:
+        lines.append("- **Isliye, poora udhaar chuk gaya hai; ab kuch baaki nahi hai.**")
+    elif lent:
+        lines.append(f"- **Isliye, aapko {person + ' se ' if person else ''}abhi {format_rupees(remaining)} aur lene hain.**")
+    else:
+        lines.append(f"- **Isliye, aapko {person + ' ko ' if person else ''}abhi {format_rupees(remaining)} aur dene hain.**")
+    return "**Udhaari ka Hisaab:**\n" + "\n".join(lines)
+
+
+def _emi(principal: float, monthly_rate: float, months: int) -> float:
+    if monthly_rate == 0:
+        return principal / months
+    growth = (1 + monthly_rate) ** months
+    return principal * monthly_rate * growth / (growth - 1)
+
+
+def _duration_text(months: int) -> tuple:
+    """(heading, sentence) jaise ("Ek Saal (12 Mahine)", "ek saal") ya ("8 Mahine", "8 mahine")."""
+    if months % 12 == 0:
+        years = months // 12
+        return f"{_label(_count_word(years))} Saal ({months} Mahine)", f"{_count_word(years)} saal"
+    return f"{months} Mahine", f"{months} mahine"
+
+
+def _solve_loan_and_emi(tokens: list, amounts: list):
+    # Simple/flat byaj ka hisaab EMI formula se alag hai; woh Gemini karega
+    if set(tokens) & _SIMPLE_INTEREST_WORDS:
+        return None
+    question = _question_tokens(tokens)
+    if set(question) & _INTEREST_WORDS:
+        return None  # sawaal byaj ka hai, EMI/bhugtaan ka nahi
+    clauses = _clauses(tokens)
+    principal = emi = months = rate = None
+    monthly_rate = False
+    for amount in amounts:
+        unit = _after(tokens, amount)[:1]
+        unit = unit[0] if unit else ""
+        words = clauses[amount.clause]
+        if amount.percent:
+            if rate is not None:
+                return None
+            rate = amount.value
+            monthly_rate = bool(set(_after(tokens, amount, 3)) & _MONTH_WORDS)
+        elif unit in _YEAR_WORDS and months is None:
+            months = amount.value * 12
+        elif unit in _MONTH_WORDS and months is None:
+            months = amount.value
+        elif unit in _COUNT_UNITS:
+            return None
+        elif words & _EMI_WORDS and emi is None:
+            emi = amount.value
+        elif principal is None and ("loan" in words or words & {"लोन", "कर्ज"} or words & _LOAN_WORDS):
+            principal = amount.value
+        else:
+            return None
+    if months is not None and (months <= 0 or not float(months).is_integer()):
+        return None
+    # Bacha hua loan (baaki) EMI ke byaj hisse ke bina nahi nikalta; woh Gemini karega
+    if _has_prefix(question, _REMAINING_WORDS):
+        return None
+    if emi is not None and months is not None and rate is None:
+        months = int(months)
+        heading, sentence = _duration_text(months)
+        total = emi * months
+        if principal is not None and total > principal:
+            return None  # loan se zyada bhugtaan: byaj/avadhi ka matlab saaf nahi
+        return ("**Loan ka Hisaab:**\n"
+                + (f"- **Loan Rashi:** {format_rupees(principal)}\n" if principal is not None else "")
+                + f"- **Har Mahine ki EMI:** {format_rupees(emi)}\n"
+                f"- **{heading} mein Kul Bhugtaan:** {format_rupees(total)} ({_plain(emi)} x {months})\n"
+                f"- **Isliye, aap {sentence} mein {format_rupees(total)} chuka denge.**")
+    # Yeh branch sirf EMI batati hai, isliye sawaal EMI ka hi ho (kul bhugtaan ka nahi)
+    if principal is not None and rate is not None and months is not None and emi is None and 0 < rate <= 60 \
+            and set(question) & _EMI_WORDS and not set(question) & _TOTAL_WORDS:
+        months = int(months)
+        heading, _ = _duration_text(months)
+        monthly = rate / 100 if monthly_rate else rate / 1200
+        installment = round(_emi(principal, monthly, months))
+        total = installment * months
+        return ("**Loan ka Hisaab:**\n"
+                f"- **Loan Rashi:** {format_rupees(principal)}\n"
+                f"- **Byaj Dar:** {_plain(rate)}% {'mahina' if monthly_rate else 'saalana'}\n"
+                f"- **Avadhi:** {heading}\n"
+                f"- **Har Mahine ki EMI:** {format_rupees(installment)}\n"
+                f"- **Kul Bhugtaan:** {format_rupees(total)} (Byaj: {format_rupees(total - principal)})\n"
+                f"- **Isliye, aapki EMI {format_rupees(installment)} hogi.**")
+    if principal is not None and emi is not None and months is None and rate is None \
+            and not set(tokens) & _INTEREST_WORDS and set(tokens) & _MONTH_WORDS and 0 < emi <= principal:
+        needed = math.ceil(principal / emi)
+        return ("**Loan ka Hisaab:**\n"
+                f"- **Loan Rashi:** {format_rupees(principal)}\n"
+                f"- **Har Mahine ki EMI:** {format_rupees(emi)}\n"
+                f"- **Isliye, loan chukane mein {needed} mahine lagenge ({_plain(principal)} / {_plain(emi)}).**")
+    return None
+
+
+def _solve_price_comparison(tokens: list, amounts: list):
+    if len(amounts) < 2 or any(a.percent for a in amounts) \
+            or set(tokens) & (_QUANTITY_WORDS | _BLOCKING_WORDS | _EXTRA_CHARGE_WORDS):
+        return None
+    if any(_after(tokens, a)[:1] and _after(tokens, a)[0] in _COUNT_UNITS for a in amounts):
+        return None
+    if len({a.clause for a in amounts}) != len(amounts):
+        return None  # ek clause mein do amounts: daam + koi charge ho sakta hai
+    places = []
+    for amount in amounts:
+        before = _clause_tokens(tokens, amount.clause)
+        place = None
+        for i, token in enumerate(before):
+            if token in _PLACE_MARKERS and i and before[i - 1] not in _STOPWORDS:
+                place = before[i - 1]
+        # Daam tabhi jab jagah ("Flipkart par") ya cheez ("15000 ka") ka anchor ho
+        if place is None and not set(_after(tokens, amount)) & _PRICE_ANCHORS:
+            return None
+        places.append(place)
+    by_place = None not in places and len(set(places)) == len(places) and not set(places) & _GENERIC_PLACES
+    item = "saamaan"
+    first = amounts[0].start
+    if first and tokens[first - 1] not in _STOPWORDS and tokens[first - 1] not in _CURRENCY_WORDS \
+            and not tokens[first - 1][0].isdigit():
+        item = tokens[first - 1]
+    shop = "dukaan" if _has_prefix(tokens, ("dukaan", "dukan", "shop", "store", "दुकान")) else "jagah"
+
+    def name(index: int) -> str:
+        if by_place:
+            return f"{_label(places[index])} par {item}"
+        ordinal = _ORDINALS[index] if index < len(_ORDINALS) else f"{index + 1}vi"
+        return f"{ordinal} {shop} wala {item}"
+
+    values = [a.value for a in amounts]
+    cheapest = min(range(len(values)), key=values.__getitem__)
+    spread = max(values) - min(values)
+    if spread == 0:
+        return f"**Cheezon ki Tulna:**\n- Sabka daam barabar hai ({format_rupees(values[0])}).\n- **Koi antar nahi hai.**"
+    if len(values) == 2:
+        return (f"**Cheezon ki Tulna:**\n- {name(cheapest)} sasta hai.\n"
+                f"- **Dono ke beech {format_rupees(spread)} ka antar hai.**")
+    return (f"**Cheezon ki Tulna:**\n- {name(cheapest)} sabse sasta hai ({format_rupees(values[cheapest])}).\n"
+            f"- **Sabse saste aur sabse mehenge ke beech {format_rupees(spread)} ka antar hai.**")
+
+
+_SOLVERS = {
+    "income_and_balance": _solve_income_and_balance,
+    "discount_and_offers": _solve_discount_and_offers,
+    "salary_calculation": _solve_salary_calculation,
+    "lending_and_borrowing": _solve_lending_and_borrowing,
+    "loan_and_emi": _solve_loan_and_emi,
+    "price_comparison": _solve_price_comparison,
+}
+
+
+class HisaabCalculator:
+    """Category ke hisaab se deterministic solver; har category ke solved/escalated counters ke saath."""
+
+    def __init__(self, enabled: bool = CALCULATOR_ENABLED):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self.stats = {c: {"solved": 0, "escalated": 0} for c in SUPPORTED_CATEGORIES}
+
+    def solve(self, text: str, category: str):
+        """Markdown jawab, ya None (parse nahi hua / category supported nahi) -> Gemini."""
+        if not self.enabled or category not in _SOLVERS:
+            return None
+        try:
+            tokens = tokenize(text)
+            answer = _SOLVERS[category](tokens, parse_amounts(tokens))
+        except Exception as e:
+            print(f"Calculator error ({category}): {e}")
+            answer = None
+        with self._lock:
+            self.stats[category]["solved" if answer else "escalated"] += 1
+        return answer
+
+    def metrics(self) -> dict:
+        with self._lock:
+            stats = {c: dict(s) for c, s in self.stats.items()}
+        solved = sum(s["solved"] for s in stats.values())
+        total = solved + sum(s["escalated"] for s in stats.values())
+        return {"per_category": stats, "solved": solved, "solve_ratio": solved / total if total else 0.0}
+
+
+calculator = HisaabCalculator()
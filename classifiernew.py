@@ -0,0 +1,120 @@
+# classifiernew.py - Local embedding-based category classifier (Groq preprocess ka fast path)
+#
+# Nearest-centroid model: har category ka centroid = us category ke good examples
+# ke normalized embeddings ka mean, jismein category description bhi
+# DESCRIPTION_WEIGHT examples ke barabar gini jaati hai. Startup par examples ke sums
+# store se aate hain (shards load nahi hote); naya 👍 example aate hi centroid
+# incremental taur par update hota hai.
+import os
+import threading
+import numpy as np
+from dotenv import load_dotenv
+
+from annnew import normalize_rows
+
+load_dotenv()
+
+# --- Configuration ---
+CLASSIFIER_MIN_SCORE = float(os.getenv("HISSAB_CLASSIFIER_MIN_SCORE", "0.55"))
+CLASSIFIER_MIN_MARGIN = float(os.getenv("HISSAB_CLASSIFIER_MIN_MARGIN", "0.08"))
+DESCRIPTION_WEIGHT = 3.0
+_DEVANAGARI = range(0x0900, 0x0980)
+
+
+def is_romanized(text: str) -> bool:
+    """Text Latin script (Hinglish) mein hai ya nahi; Devanagari ko Groq se transliterate karna padta hai."""
+    letters = [ch for ch in text if ch.isalpha()]
+    if not letters:
+        return False
+    devanagari = sum(1 for ch in letters if ord(ch) in _DEVANAGARI)
+    return devanagari / len(letters) < 0.1
+
+
+class CentroidClassifier:
+    """Nearest-centroid classifier over sentence embeddings, incremental updates ke saath."""
+
+    def __init__(self, categories: list, dim: int):
+        self.categories = list(categories)
+        self._index = {c: i for i, c in enumerate(self.categories)}
+        self._sums = np.zeros((len(self.categories), dim), dtype=np.float64)
+        self._counts = np.zeros(len(self.categories), dtype=np.float64)
+        self._centroids = np.zeros((len(self.categories), dim), dtype=np.float32)
+        self._lock = threading.Lock()
+        self.stats = {"fast_path": 0, "llm_fallback": 0, "shadow_compared": 0, "shadow_agreed": 0}
+
+    @classmethod
+    def from_store(cls, category_embeddings: dict, store=None) -> "CentroidClassifier":
+        """Category descriptions + store ke saare good examples (per-shard sums) se train karo."""
+        categories = list(category_embeddings.keys())
+        dim = len(next(iter(category_embeddings.values())))
+        model = cls(categories, dim)
+        for category, embedding in category_embeddings.items():
+            model._add(category, normalize_rows(embedding) * DESCRIPTION_WEIGHT, DESCRIPTION_WEIGHT)
+        if store is not None:
+            for category, (vector_sum, count) in store.shard_vector_sums().items():
+                model._add(category, vector_sum, count)
+        model._recompute()
+        return model
+
+    def _add(self, category: str, vector_sum, count: float):
+        if category not in self._index:
+            return  # LLM ne koi anjaan category di; usse classifier nahi seekhta
+        i = self._index[category]
+        self._sums[i] += vector_sum
+        self._counts[i] += count
+
+    def _recompute(self):
+        with np.errstate(invalid="ignore", divide="ignore"):
+            self._centroids = normalize_rows((self._sums / np.maximum(self._counts, 1)[:, None]).astype(np.float32))
+
+    def partial_fit(self, embeddings, categories: list):
+        """Naye 👍 examples se centroids update karo."""
+        embeddings = normalize_rows(np.atleast_2d(embeddings))
+        with self._lock:
+            for embedding, category in zip(embeddings, categories):
+                self._add(category, embedding, 1.0)
+            self._recompute()
+
+    def predict(self, embedding):
+        """(category, score, margin): score = top cosine, margin = top1 - top2."""
+        scores = self._centroids @ normalize_rows(embedding)
+        top2 = np.argsort(scores)[-2:][::-1]
+        margin = float(scores[top2[0]] - scores[top2[1]]) if len(top2) > 1 else float(scores[top2[0]])
+        return self.categories[top2[0]], float(scores[top2[0]]), margin
+
+    @staticmethod
+    def is_confident(category: str, score: float, margin: float) -> bool:
+        return category != "unknown" and score >= CLASSIFIER_MIN_SCORE and margin >= CLASSIFIER_MIN_MARGIN
+
+    # --- Metrics ---
+    def record(self, fast_path: bool, local_category: str = None, llm_category: str = None):
+        """Fast path / fallback ginti, aur fallback par local vs LLM (shadow) agreement."""
+        with self._lock:
+            self.stats["fast_path" if fast_path else "llm_fallback"] += 1
+            if not fast_path and local_category and llm_category:
+                self.stats["shadow_compared"] += 1
+                self.stats["shadow_agreed"] += int(local_category == llm_category)
+
+    def metrics(self) -> dict:
+        s = dict(self.stats)
+        total = s["fast_path"] + s["llm_fallback"]
+        s["fast_path_ratio"] = s["fast_path"] / total if total else 0.0
+        s["shadow_agreement"] = s["shadow_agreed"] / s["shadow_compared"] if s["shadow_compared"] else 0.0
+        return s
+
+    def evaluate(self, embeddings, labels: list) -> dict:
+        """Held-out set par coverage (kitne confident) aur confident predictions ki LLM label se agreement."""
+        confident = agreed = correct = 0
+        for embedding, label in zip(embeddings, labels):
+            category, score, margin = self.predict(embedding)
+            correct += int(category == label)
+            if self.is_confident(category, score, margin):
+                confident += 1
+                agreed += int(category == label)
+        total = len(labels)
+        return {
+            "held_out": total,
+            "coverage": confident / total if total else 0.0,
+            "confident_agreement": agreed / confident if confident else 0.0,
+            "overall_accuracy": correct / total if total else 0.0,
+        }
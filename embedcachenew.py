@@ -0,0 +1,108 @@
+# embedcachenew.py - Persistent embedding cache keyed by (model key, text hash)
+#
+# Category descriptions, seed prompts aur re-embedding jobs ek hi text ko baar
+# baar encode na karein, isliye vectors yahan SQLite mein rakhe jaate hain.
+# Key mein model name + backend + EMBED_CACHE_VERSION hota hai, isliye model
+# badalne par purane vectors apne aap invalid ho jaate hain; description badalne
+# par uska text hash badal jaata hai.
+import os
+import time
+import hashlib
+import sqlite3
+import threading
+import numpy as np
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# --- Configuration ---
+EMBED_CACHE_PATH = os.getenv("HISSAB_EMBED_CACHE", "hissab_embed_cache.db")
+EMBED_CACHE_VERSION = 1  # encode/normalization logic badle to ise badhao
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS embeddings (
+    model_key TEXT NOT NULL,
+    text_hash TEXT NOT NULL,
+    vector BLOB NOT NULL,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (model_key, text_hash)
+) WITHOUT ROWID;
+"""
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def make_model_key(model_name: str, backend: str) -> str:
+    return f"{model_name}|{backend}|v{EMBED_CACHE_VERSION}"
+
+
+class EmbeddingCache:
+    """(model_key, sha256(text)) -> float32 vector, processes ke beech shared."""
+
+    def __init__(self, path: str = EMBED_CACHE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+
+    def get_many(self, model_key: str, texts: list) -> dict:
+        """{index: vector} jo texts cache mein mile."""
+        hashes = [text_hash(t) for t in texts]
+        found = {}
+        with self._lock:
+            for start in range(0, len(hashes), 500):
+                chunk = hashes[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                for h, blob in self._conn.execute(
+                        f"SELECT text_hash, vector FROM embeddings WHERE model_key = ? AND text_hash IN ({placeholders})",
+                        [model_key, *chunk]):
+                    found[h] = np.frombuffer(blob, dtype=np.float32)
+        return {i: found[h] for i, h in enumerate(hashes) if h in found}
+
+    def put_many(self, model_key: str, texts: list, vectors):
+        now = time.time()
+        rows = [(model_key, text_hash(t), np.asarray(v, dtype=np.float32).tobytes(), now) for t, v in zip(texts, vectors)]
+        with self._lock:
+            self._conn.executemany("INSERT OR REPLACE INTO embeddings VALUES (?, ?, ?, ?)", rows)
+
+    def prune(self, keep_model_key: str) -> int:
+        """Isi model + backend ke purane EMBED_CACHE_VERSION wale vectors hatao.
+
+        Doosre models/backends ke vectors rehte hain, taaki backend wapas badalne par cache garam mile.
+        """
+        prefix = keep_model_key.rsplit("|", 1)[0] + "|"
+        with self._lock:
+            deleted = self._conn.execute(
+                "DELETE FROM embeddings WHERE substr(model_key, 1, ?) = ? AND model_key != ?",
+                (len(prefix), prefix, keep_model_key)).rowcount
+        return deleted
+
+    def encode(self, encode_fn, model_key: str, texts: list) -> np.ndarray:
+        """Cache se vectors lo; sirf missing texts ko `encode_fn` se ek batch mein encode karo.
+
+        encode_fn sirf miss par chalta hai, isliye poora cache hit hone par model load hi nahi hota.
+        """
+        texts = list(texts)
+        cached = self.get_many(model_key, texts)
+        missing = [i for i in range(len(texts)) if i not in cached]
+        if missing:
+            fresh = np.asarray(encode_fn([texts[i] for i in missing]), dtype=np.float32)
+            self.put_many(model_key, [texts[i] for i in missing], fresh)
+            cached.update(zip(missing, fresh))
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+        return np.vstack([cached[i] for i in range(len(texts))])
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_embedding_cache() -> EmbeddingCache:
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = EmbeddingCache()
+        return _cache
@@ -0,0 +1,281 @@
+# jobsnew.py - Durable local job queue (SQLite) + worker pool for background work
+#
+# Feedback clicks (👍/👎) sirf ek job row likhte hain aur turant laut aate hain; embedding,
+# DB persistence, error analysis, index refresh aur compaction worker threads karte hain.
+# Jobs hissab_jobs.db (WAL, synchronous=FULL) mein rehte hain, isliye process restart
+# ke baad bhi bache rehte hain: "running" job ka lease khatam hote hi woh dobara uthaya
+# jaata hai (at-least-once), isliye handlers idempotent-ish hone chahiye. claim() ka
+# lease_until hi claim token hai: complete/fail sirf tab likhte hain jab job abhi bhi
+# usi lease par chal raha ho, taaki expire hua purana worker naye claim ka result na
+# bigaade. Fail hone par
+# exponential backoff ke saath retry; max_attempts ke baad status "failed" (dead letter).
+# Kai processes (Streamlit + batch) ek hi queue file share kar sakte hain.
+import os
+import json
+import time
+import random
+import sqlite3
+import threading
+from dotenv import load_dotenv
+
+from tracingnew import metrics, span
+
+load_dotenv()
+
+# --- Configuration ---
+JOBS_DB_PATH = os.getenv("HISSAB_JOBS_DB", "hissab_jobs.db")
+JOB_WORKERS = int(os.getenv("HISSAB_JOB_WORKERS", "2"))
+JOB_LEASE_SECONDS = float(os.getenv("HISSAB_JOB_LEASE_SECONDS", "120"))
+JOB_MAX_ATTEMPTS = 5
+JOB_RETRY_BASE_SECONDS = 2.0
+JOB_POLL_SECONDS = 0.5        # doosre processes ke enqueue kiye jobs itni der mein dikhte hain
+DONE_JOB_RETENTION_SECONDS = 24 * 3600.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'queued',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    run_after REAL NOT NULL,
+    lease_until REAL,
+    dedupe_key TEXT,
+    result TEXT,
+    last_error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_ready ON jobs(status, run_after);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_jobs_dedupe ON jobs(dedupe_key) WHERE dedupe_key IS NOT NULL AND status IN ('queued', 'running');
+"""
+
+JOBS_TOTAL = metrics.counter("hissab_jobs_total", "Background jobs by kind and outcome.", ("kind", "outcome"))
+JOB_QUEUE_SECONDS = metrics.histogram("hissab_job_queue_seconds", "Time a job waited in the queue before running.", ("kind",))
+
+
+class JobQueue:
+    """SQLite-backed queue. enqueue() ek chhota transaction hai (~ms); claim() lease ke saath job deta hai."""
+
+    def __init__(self, db_path: str = JOBS_DB_PATH, lease_seconds: float = JOB_LEASE_SECONDS):
+        self.db_path = db_path
+        self.lease_seconds = lease_seconds
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition()
+        self._conn = sqlite3.connect(db_path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=FULL")
+        self._conn.executescript(_SCHEMA)
+
+    # --- Producer side ---
+    def enqueue(self, kind: str, payload: dict = None, delay: float = 0.0, max_attempts: int = JOB_MAX_ATTEMPTS,
+                dedupe_key: str = None) -> int:
+        """Job likho aur id lautao. Same dedupe_key ka job pehle se queued/running ho to wahi id milti hai."""
+        now = time.time()
+        data = json.dumps(payload or {}, ensure_ascii=False, default=str)
+        with self._lock:
+            try:
+                cursor = self._conn.execute(
+                    "INSERT INTO jobs (kind, payload, max_attempts, run_after, dedupe_key, created_at, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)", (kind, data, max_attempts, now + delay, dedupe_key, now, now))
+                job_id = cursor.lastrowid
+            except sqlite3.IntegrityError:
+                return self._conn.execute(
+                    "SELECT id FROM jobs WHERE dedupe_key = ? AND status IN ('queued', 'running')", (dedupe_key,)).fetchone()[0]
+        JOBS_TOTAL.inc((kind, "enqueued"))
+        with self._wakeup:
+            self._wakeup.notify()
+        return job_id
+
+    def get(self, job_id: int) -> dict:
+        """{"status", "result", "last_error", "attempts"} ya None (job hi nahi / prune ho gaya)."""
+        with self._lock:
+            row = self._conn.execute("SELECT kind, status, result, last_error, attempts FROM jobs WHERE id = ?",
+                                     (job_id,)).fetchone()
+        if row is None:
+            return None
+        kind, status, result, last_error, attempts = row
+        return {"kind": kind, "status": status, "result": json.loads(result) if result else None,
+                "last_error": last_error, "attempts": attempts}
+
+    # --- Worker side ---
+    def claim(self):
+        """Sabse purana ready job (ya jiska lease expire ho gaya) lease ke saath:
+        (id, kind, payload, created_at, lease_token). lease_token complete()/fail() ko dena hota hai."""
+        now = time.time()
+        lease_until = now + self.lease_seconds
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT id, kind, payload, created_at FROM jobs "
+                    "WHERE (status = 'queued' AND run_after <= ?) OR (status = 'running' AND lease_until < ?) "
+                    "ORDER BY run_after, id LIMIT 1", (now, now)).fetchone()
+                if row is not None:
+                    self._conn.execute(
+                        "UPDATE jobs SET status = 'running', attempts = attempts + 1, lease_until = ?, updated_at = ? "
+                        "WHERE id = ?", (lease_until, now, row[0]))
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        if row is None:
+            return None
+        return row[0], row[1], json.loads(row[2]), row[3], lease_until
+
+    def complete(self, job_id: int, kind: str, lease_token: float, result=None) -> bool:
+        """Job 'done'; lease kisi aur ke paas chala gaya ho to kuch nahi likhta aur False."""
+        now = time.time()
+        with self._lock:
+            updated = self._conn.execute(
+                "UPDATE jobs SET status = 'done', result = ?, lease_until = NULL, updated_at = ? "
+                "WHERE id = ? AND status = 'running' AND lease_until = ?",
+                (json.dumps(result, ensure_ascii=False, default=str) if result is not None else None,
+                 now, job_id, lease_token)).rowcount
+        JOBS_TOTAL.inc((kind, "done" if updated else "lease_lost"))
+        return updated == 1
+
+    def fail(self, job_id: int, kind: str, lease_token: float, error: str) -> bool:
+        """Retry (full-jitter exponential backoff) ya attempts khatam hone par 'failed'; lease kho gaya ho to False."""
+        now = time.time()
+        owned = "WHERE id = ? AND status = 'running' AND lease_until = ?"
+        with self._lock:
+            row = self._conn.execute(f"SELECT attempts, max_attempts FROM jobs {owned}", (job_id, lease_token)).fetchone()
+            if row is None:
+                outcome = "lease_lost"
+            elif row[0] >= row[1]:
+                outcome = "failed" if self._conn.execute(
+                    f"UPDATE jobs SET status = 'failed', last_error = ?, lease_until = NULL, updated_at = ? {owned}",
+                    (error, now, job_id, lease_token)).rowcount else "lease_lost"
+            else:
+                delay = random.uniform(0, JOB_RETRY_BASE_SECONDS * 2 ** (row[0] - 1))
+                outcome = "retried" if self._conn.execute(
+                    f"UPDATE jobs SET status = 'queued', last_error = ?, run_after = ?, lease_until = NULL, updated_at = ? "
+                    f"{owned}", (error, now + delay, now, job_id, lease_token)).rowcount else "lease_lost"
+        JOBS_TOTAL.inc((kind, outcome))
+        return outcome != "lease_lost"
+
+    def wait_for_work(self, timeout: float):
+        with self._wakeup:
+            self._wakeup.wait(timeout)
+
+    # --- Maintenance ---
+    def prune(self, older_than: float = DONE_JOB_RETENTION_SECONDS) -> int:
+        """Purane 'done' jobs hatao (failed jobs jaanch ke liye rehte hain)."""
+        with self._lock:
+            cursor = self._conn.execute("DELETE FROM jobs WHERE status = 'done' AND updated_at < ?", (time.time() - older_than,))
+            self._conn.execute("PRAGMA wal_checkpoint(PASSIVE)")
+        return cursor.rowcount
+
+    def requeue_failed(self, kind: str = None) -> int:
+        """Dead-letter jobs ko dobara queue mein daalo (jaise provider outage ke baad)."""
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = 'queued', attempts = 0, run_after = ?, updated_at = ? "
+                "WHERE status = 'failed' AND (? IS NULL OR kind = ?)", (now, now, kind, kind))
+        return cursor.rowcount
+
+    def counts(self) -> dict:
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return dict(rows)
+
+
+class WorkerPool:
+    """Handlers: kind -> fn(payload) -> JSON-serializable result. Periodic jobs scheduler thread enqueue karta hai."""
+
+    def __init__(self, queue: JobQueue, workers: int = JOB_WORKERS):
+        self.queue = queue
+        self.workers = max(1, workers)
+        self._handlers = {}
+        self._periodic = []  # (kind, interval_seconds)
+        self._threads = []
+        self._stopped = threading.Event()
+
+    def register(self, kind: str, handler):
+        self._handlers[kind] = handler
+
+    def every(self, kind: str, interval_seconds: float):
+        """`kind` job har interval par (ek waqt mein ek hi pending, dedupe_key se)."""
+        self._periodic.append((kind, interval_seconds))
+
+    def run_one(self) -> bool:
+        """Ek ready job chalao; koi na mile to False."""
+        job = self.queue.claim()
+        if job is None:
+            return False
+        job_id, kind, payload, created_at, lease_token = job
+        JOB_QUEUE_SECONDS.observe(max(0.0, time.time() - created_at), (kind,))
+        handler = self._handlers.get(kind)
+        if handler is None:
+            # Kisi naye version ka job ho sakta hai; retries ke beech woh process ise utha sakta hai
+            self.queue.fail(job_id, kind, lease_token, f"'{kind}' ka handler registered nahi hai")
+            return True
+        try:
+            with span(f"job_{kind}"):
+                result = handler(payload)
+        except Exception as e:
+            print(f"Job {job_id} ({kind}) fail hua: {e}")
+            self.queue.fail(job_id, kind, lease_token, f"{type(e).__name__}: {e}")
+        else:
+            if not self.queue.complete(job_id, kind, lease_token, result):
+                print(f"Job {job_id} ({kind}) ka lease expire ho gaya tha; result kisi aur claim ke liye chhoda gaya.")
+        return True
+
+    def _work(self):
+        while not self._stopped.is_set():
+            try:
+                if not self.run_one():
+                    self.queue.wait_for_work(JOB_POLL_SECONDS)
+            except Exception as e:  # queue DB locked/IO error: thoda ruk kar phir
+                print(f"Job worker error: {e}")
+                time.sleep(JOB_POLL_SECONDS)
+
+    def _schedule(self):
+        next_run = {kind: time.monotonic() + interval for kind, interval in self._periodic}
+        while not self._stopped.wait(1.0):
+            now = time.monotonic()
+            for kind, interval in self._periodic:
+                if now >= next_run[kind]:
+                    self.queue.enqueue(kind, dedupe_key=f"periodic:{kind}", max_attempts=1)
+                    next_run[kind] = now + interval
+
+    def start(self):
+        if self._threads:
+            return
+        self._stopped.clear()
+        targets = [self._work] * self.workers + ([self._schedule] if self._periodic else [])
+        for n, target in enumerate(targets):
+            thread = threading.Thread(target=target, daemon=True, name=f"hissab-jobs-{n}")
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout: float = 5.0):
+        self._stopped.set()
+        with self.queue._wakeup:
+            self.queue._wakeup.notify_all()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def drain(self, timeout: float = 30.0) -> bool:
+        """Abhi ready saare jobs isi thread mein chalao (tests/batch/shutdown). True = queue khaali."""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if not self.run_one():
+                return True
+        return False
+
+
+_queue = None
+_queue_lock = threading.Lock()
+
+def get_job_queue() -> JobQueue:
+    """Process-wide queue (HISSAB_JOBS_DB)."""
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = JobQueue()
+        return _queue
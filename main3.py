@@ -1,147 +1,442 @@
-import os
-import uuid
-import google.generativeai as genai
-from groq import Groq # Groq ko import karein
-from gtts import gTTS
-import json
-from dotenv import load_dotenv
-
-from ragnew import get_enhanced_prompt
-from vectordbnew import (
-    setup_vector_db, add_user_prompt_to_db,
-    setup_bad_prompts_db, add_to_bad_prompts_db,
-    is_bad_prompts_db_empty, get_all_categories, find_semantic_categories, 
-    find_random_examples_from_category
-)
-
-load_dotenv()
-setup_vector_db()
-setup_bad_prompts_db()
-
-# --- NAYA CHANGE: Dono API Clients ko initialize karein ---
-try:
-    gemini_api_key = os.getenv("GOOGLE_API_KEY")
-    groq_api_key = os.getenv("GROQ_API_KEY")
-    
-    genai.configure(api_key=gemini_api_key)
-    groq_client = Groq(api_key=groq_api_key)
-    print("✅ Gemini and Groq clients initialized successfully.")
-except Exception as e:
-    print(f"API Key initialization error: {e}")
-    groq_client = None # Error hone par client ko None set karein
-
-# --- Prompts (No changes here) ---
-PROMPT_PREPROCESS_CLASSIFY = """
-You MUST return a single, valid JSON object with "hinglish_text" and "category".
-Available Categories: {categories}
-User's Hindi Query: "{hindi_text}"
-JSON Output:
-"""
-PROMPT_SUMMARY = "Create a single, concise summary sentence in Hindi for this text: \"{detailed_text}\""
-PROMPT_ERROR_ANALYSIS = "User marked this as 'Bad'. Find the mistake in the response. Query: '{user_story}', Response: '{model_response}'. Analysis (in Hindi):"
-
-# --- Main Processing Pipeline ---
-def process_query_stream(hindi_user_story: str):
-    """The main processing pipeline that orchestrates calls to different LLMs."""
-    context = {"user_hindi_query": hindi_user_story}
-
-    try:
-        # --- NAYA CHANGE: Step 1 (Pre-processing) ab Groq ka istemal karega ---
-        print("Step 1: Pre-processing with Groq...")
-        categories = get_all_categories()
-        prompt = PROMPT_PREPROCESS_CLASSIFY.format(categories=categories, hindi_text=hindi_user_story)
-        
-        chat_completion = groq_client.chat.completions.create(
-            messages=[{"role": "user", "content": prompt}],
-            model="llama3-8b-8192", # Groq ka fast model
-        )
-        json_data = json.loads(chat_completion.choices[0].message.content.strip().replace("```json", "").replace("```", ""))
-        
-        hinglish_story = json_data.get("hinglish_text", hindi_user_story)
-        primary_category = json_data.get("category", "unknown")
-        context.update({"hinglish_story": hinglish_story, "primary_category": primary_category})
-        print(f"✅ Groq Pre-processing Complete. Category: {primary_category}")
-
-        # Step 2: Semantic Category Search (No LLM call)
-        semantic_categories = find_semantic_categories(hinglish_story, top_k=2)
-        context["semantic_categories"] = semantic_categories
-        print(f"✅ Semantic Search Complete. Top 2: {semantic_categories}")
-
-        # Step 3: Random Example Retrieval (No LLM call)
-        examples_by_category = {}
-        for cat in semantic_categories:
-            examples = find_random_examples_from_category(cat, max_examples=5, min_examples=1)
-            if examples: examples_by_category[cat] = examples
-        context["retrieved_examples"] = examples_by_category
-        print(f"✅ Retrieved {sum(len(v) for v in examples_by_category.values())} examples.")
-
-        # Step 4: Generate the Final Prompt (No LLM call)
-        enhanced_prompt = get_enhanced_prompt(hinglish_story, primary_category, semantic_categories, examples_by_category)
-        
-        # --- NAYA CHANGE: Step 5 (Final Calculation) Gemini ka istemal karega ---
-        print("Step 5: Final calculation with Gemini...")
-        model_flash = genai.GenerativeModel('gemini-1.5-flash')
-        response_stream = model_flash.generate_content(enhanced_prompt, stream=True)
-        
-        yield from response_stream
-        return context
-
-    except Exception as e:
-        yield f"⚠️ Hisaab lagate samay error aaya: {e}"
-        return context
-
-# --- Feedback Handling (No changes in logic) ---
-def save_good_prompt(context: dict, model_response: str):
-    add_user_prompt_to_db(
-        hinglish_prompt=context.get("hinglish_story"),
-        model_response=model_response,
-        primary_category=context.get("primary_category")
-    )
-
-def save_bad_prompt(context: dict, model_response: str):
-    log_data = {**context, "model_response": model_response}
-    add_to_bad_prompts_db(log_data=log_data)
-
-# --- NAYA CHANGE: Error Analysis Gemini Pro ka istemal karega ---
-def analyze_bad_response(context: dict, model_response: str) -> str:
-    try:
-        model_pro = genai.GenerativeModel('gemini-pro')
-        prompt = PROMPT_ERROR_ANALYSIS.format(user_story=context.get("hinglish_story"), model_response=model_response)
-        response = model_pro.generate_content(prompt)
-        return response.text.strip()
-    except Exception as e:
-        print(f"Gemini Pro error analysis failed: {e}")
-        return None
-
-# --- NAYA CHANGE: Audio Summary Groq ka istemal karega ---
-def generate_audio_summary(detailed_text: str, error_analysis: str = None):
-    try:
-        summary_request = PROMPT_SUMMARY.format(detailed_text=detailed_text)
-        chat_completion = groq_client.chat.completions.create(
-            messages=[{"role": "user", "content": summary_request}],
-            model="llama3-8b-8192",
-        )
-        summary_text = chat_completion.choices[0].message.content.strip()
-
-        final_audio_text = f"Galti ka vishleshan: {error_analysis}. {summary_text}" if error_analysis else summary_text
-        
-        audio_file_path = f"response_{uuid.uuid4().hex}.mp3"
-        tts = gTTS(text=final_audio_text, lang="hi", slow=False)
-        tts.save(audio_file_path)
-        cleanup_old_audio_files(keep=3)
-        return audio_file_path
-    except Exception as e:
-        print(f"Groq audio summary/gTTS error: {e}")
-        return None
-
-def cleanup_old_audio_files(keep=3):
-    try:
-        files = [f for f in os.listdir('.') if f.startswith("response_") and f.endswith(".mp3")]
-        files.sort(key=os.path.getmtime, reverse=True)
-        for f in files[keep:]: os.remove(f)
-    except Exception as e:
-        print(f"Purani audio files delete karte samay error aaya: {e}")
-
-
-
-
+import io
+import os
+import asyncio
+import time
+import threading
+from gtts import gTTS
+import json
+from dotenv import load_dotenv
+
+import vectordbnew
+from ragnew import build_prompt, CANDIDATE_EXAMPLES_PER_CATEGORY
+from classifiernew import is_romanized
+from responsecachenew import response_cache, extract_numbers
+from providersnew import get_llm
+from calculatornew import calculator
+from audiocachenew import get_audio_cache
+from tracingnew import span, record, start_trace, start_exporters, metrics, REQUESTS
+from jobsnew import get_job_queue, WorkerPool
+from storenew import get_store
+from vectordbnew import (
+    setup_vector_db, add_user_prompt_to_db,
+    setup_bad_prompts_db, add_to_bad_prompts_db,
+    is_bad_prompts_db_empty, get_all_categories, find_semantic_categories, 
+    find_random_examples_from_category, find_similar_examples, encode_query,
+    classify_locally, find_approved_answers
+)
+
+load_dotenv()
+# "similar" = query ke nearest-neighbour examples, "random" = purana random sampling
+RETRIEVAL_MODE = os.getenv("HISSAB_RETRIEVAL_MODE", "similar")
+# "1" = feedback/DB writes/error analysis job queue se worker threads mein; "0" = queue karke turant isi thread mein
+BACKGROUND_JOBS = os.getenv("HISSAB_BACKGROUND_JOBS", "1") != "0"
+COMPACT_INTERVAL_SECONDS = float(os.getenv("HISSAB_COMPACT_INTERVAL", "3600"))
+
+# --- DB setup ab import par nahi, pehli zaroorat par hota hai ---
+_ready = False
+_ready_lock = threading.Lock()
+
+def ensure_ready():
+    """Vector DB, Bad DB aur embedding model ko ek hi baar (per process) taiyaar karo."""
+    global _ready
+    if _ready: return
+    with _ready_lock:
+        if _ready: return
+        setup_vector_db()
+        setup_bad_prompts_db()
+        # 👎 wale jawab process restart ke baad bhi (aur doosre processes ke bhi) cache se serve na hon
+        response_cache.set_blocked_source(get_store().bad_responses_since)
+        start_exporters()
+        if BACKGROUND_JOBS:
+            _get_workers().start()  # pichhle run ke bache jobs bhi yahin se chalte hain
+        _ready = True
+
+def warm_up():
+    """Background thread mein ensure_ready() chalao taaki pehli query ko wait na karna pade."""
+    threading.Thread(target=ensure_ready, daemon=True).start()
+
+# --- LLM calls providersnew ke router se jaati hain ---
+# Har stage ("preprocess", "calculate", "summary", "error_analysis") ka provider/model
+# route wahin configure hota hai (HISSAB_ROUTE_<STAGE>, HISSAB_LLM_PROVIDER=stub);
+# clients process mein ek hi baar bante hain aur deadlines/retries/fallbacks router sambhalta hai.
+
+# --- Prompts (No changes here) ---
+PROMPT_PREPROCESS_CLASSIFY = """
+You MUST return a single, valid JSON object with "hinglish_text" and "category".
+Available Categories: {categories}
+User's Hindi Query: "{hindi_text}"
+JSON Output:
+"""
+PROMPT_SUMMARY = "Create a single, concise summary sentence in Hindi for this text: \"{detailed_text}\""
+PROMPT_ERROR_ANALYSIS = "User marked this as 'Bad'. Find the mistake in the response. Query: '{user_story}', Response: '{model_response}'. Analysis (in Hindi):"
+
+# --- Main Processing Pipeline ---
+def preprocess_with_groq(hindi_user_story: str):
+    """Groq se Hindi query ka Hinglish text aur category lo."""
+    categories = get_all_categories()
+    prompt = PROMPT_PREPROCESS_CLASSIFY.format(categories=categories, hindi_text=hindi_user_story)
+    completion = get_llm().complete("preprocess", prompt)
+    return _parse_preprocess_output(completion.text, hindi_user_story)
+
+async def preprocess_with_groq_async(hindi_user_story: str):
+    categories = get_all_categories()
+    prompt = PROMPT_PREPROCESS_CLASSIFY.format(categories=categories, hindi_text=hindi_user_story)
+    completion = await get_llm().acomplete("preprocess", prompt)
+    return _parse_preprocess_output(completion.text, hindi_user_story)
+
+def _parse_preprocess_output(content: str, hindi_user_story: str):
+    json_data = json.loads(content.strip().replace("```json", "").replace("```", ""))
+    return json_data.get("hinglish_text", hindi_user_story), json_data.get("category", "unknown")
+
+def _local_classification(hindi_user_story: str, context: dict = None):
+    # Hinglish input par pehle local classifier; woh confident na ho
+    # (ya input Devanagari ho) tabhi Groq call hoti hai.
+    ensure_ready()
+    if not is_romanized(hindi_user_story): return None, False
+    with span("embed", context):
+        query_embedding = encode_query(hindi_user_story)
+    with span("classify", context) as attrs:
+        category, confident = classify_locally(hindi_user_story, query_embedding=query_embedding)
+        attrs.update(category=category, confident=confident)
+    return category, confident
+
+def _record_classification(context: dict, hinglish_story: str, primary_category: str, local_category, confident: bool):
+    if vectordbnew.category_classifier is not None:
+        vectordbnew.category_classifier.record(confident, local_category, primary_category)
+    context.update({"hinglish_story": hinglish_story, "primary_category": primary_category,
+                    "classified_by": "local" if confident else "llm"})
+
+def _prepare_generation(context: dict):
+    """Steps 2-4 (koi LLM call nahi). (cached_response, None) ya (None, enhanced_prompt) lautata hai."""
+    hinglish_story, primary_category = context["hinglish_story"], context["primary_category"]
+
+    # Step 2: Semantic Category Search (No LLM call)
+    # Query embedding ek hi baar banta hai; retrieval aur 👍 save dono isi ko reuse karte hain
+    # (Hinglish input ka embedding local classifier ke waqt ban chuka hota hai — yahan cache hit)
+    with span("embed", context):
+        query_embedding = encode_query(hinglish_story)
+    context["query_embedding"] = query_embedding
+    with span("semantic_search", context) as attrs:
+        semantic_categories = find_semantic_categories(hinglish_story, top_k=2, query_embedding=query_embedding)
+        attrs["categories"] = semantic_categories
+    context["semantic_categories"] = semantic_categories
+
+    # Step 2a: Deterministic calculator — seedha hisaab (balance, discount, EMI, ...) bina LLM ke
+    with span("calculator", context) as attrs:
+        calculated = calculator.solve(hinglish_story, primary_category)
+        attrs["solved"] = bool(calculated) and not response_cache.is_blocked(calculated)
+    if attrs["solved"]:
+        context["response_source"] = "calculator"
+        return calculated, None
+
+    # Step 2b: Semantic Answer Cache — near-identical query (same numbers) ka jawab pehle se ho to Gemini skip
+    with span("answer_cache", context) as attrs:
+        context["query_numbers"] = extract_numbers(hinglish_story)
+        cached = response_cache.lookup(query_embedding, context["query_numbers"], approved_lookup=find_approved_answers)
+        attrs["hit"] = cached is not None
+    if cached:
+        cached_response, context["response_source"] = cached
+        return cached_response, None
+
+    # Step 3: Example Retrieval (No LLM call)
+    with span("retrieval", context, mode=RETRIEVAL_MODE) as attrs:
+        if RETRIEVAL_MODE == "similar":
+            examples_by_category = find_similar_examples(hinglish_story, semantic_categories,
+                                                         max_examples=CANDIDATE_EXAMPLES_PER_CATEGORY,
+                                                         query_embedding=query_embedding)
+        else:
+            examples_by_category = {}
+            for cat in semantic_categories:
+                examples = find_random_examples_from_category(cat, max_examples=CANDIDATE_EXAMPLES_PER_CATEGORY,
+                                                              min_examples=1)
+                if examples: examples_by_category[cat] = examples
+        attrs["examples"] = sum(len(v) for v in examples_by_category.values())
+    context["retrieved_examples"] = examples_by_category
+
+    # Step 4: Generate the Final Prompt (No LLM call) — static prefix + token budget ke andar best examples
+    with span("prompt_build", context) as attrs:
+        prompt = build_prompt(hinglish_story, primary_category, semantic_categories, examples_by_category)
+        attrs.update(tokens=prompt.tokens, examples=prompt.examples_used, dropped=prompt.examples_dropped)
+    context["prompt_tokens"] = prompt.tokens
+    return None, prompt.text
+
+def _finish_request(context: dict, request_started: float):
+    """Poori request ka time aur jawab ka source (calculator/cache/gemini/error) darj karo."""
+    source = "error" if context.get("error") else context.get("response_source", "unknown")
+    record("request", time.perf_counter() - request_started, context, context.get("error"), source=source)
+    REQUESTS.inc((source,))
+
+def _finish_generation(context: dict, response_text: str, generation_started: float):
+    context["response_source"] = "gemini"
+    response_cache.observe_generation(time.perf_counter() - generation_started)
+    response_cache.store(context["hinglish_story"], context["query_embedding"], context["query_numbers"], response_text)
+
+def process_query_stream(hindi_user_story: str, context: dict = None):
+    """The main processing pipeline that orchestrates calls to different LLMs."""
+    context = {} if context is None else context
+    context["user_hindi_query"] = hindi_user_story
+    start_trace(context)
+    request_started = time.perf_counter()
+
+    try:
+        # Step 1: Pre-processing (local classifier ya Groq)
+        local_category, confident = _local_classification(hindi_user_story, context)
+        if confident:
+            hinglish_story, primary_category = hindi_user_story, local_category
+        else:
+            with span("preprocess", context):
+                hinglish_story, primary_category = preprocess_with_groq(hindi_user_story)
+        _record_classification(context, hinglish_story, primary_category, local_category, confident)
+
+        cached_response, enhanced_prompt = _prepare_generation(context)
+        if cached_response is not None:
+            yield cached_response
+            return context
+        
+        # --- NAYA CHANGE: Step 5 (Final Calculation) Gemini ka istemal karega ---
+        generation_started = time.perf_counter()
+        response_parts = []
+        for text in get_llm().stream("calculate", enhanced_prompt):
+            if not response_parts: record("llm_ttft", time.perf_counter() - generation_started, context)
+            response_parts.append(text)
+            yield text
+        record("llm_generate", time.perf_counter() - generation_started, context, chunks=len(response_parts))
+        _finish_generation(context, "".join(response_parts), generation_started)
+        return context
+
+    except Exception as e:
+        context["error"] = str(e)
+        yield f"⚠️ Hisaab lagate samay error aaya: {e}"
+        return context
+    finally:
+        _finish_request(context, request_started)
+
+async def process_query_stream_async(hindi_user_story: str, context: dict = None):
+    """process_query_stream ka asyncio version: Gemini ke chunks aate hi yield hote hain.
+
+    Blocking kaam (embedding, retrieval, DB) worker threads mein chalta hai, isliye
+    ek hi event loop par kai requests saath-saath chal sakti hain. Async generator
+    value return nahi kar sakta, isliye pipeline ki jaankari `context` dict mein bhari jaati hai.
+    """
+    context = {} if context is None else context
+    context["user_hindi_query"] = hindi_user_story
+    start_trace(context)
+    request_started = time.perf_counter()
+
+    try:
+        local_category, confident = await asyncio.to_thread(_local_classification, hindi_user_story, context)
+        if confident:
+            hinglish_story, primary_category = hindi_user_story, local_category
+        else:
+            with span("preprocess", context):
+                hinglish_story, primary_category = await preprocess_with_groq_async(hindi_user_story)
+        _record_classification(context, hinglish_story, primary_category, local_category, confident)
+
+        cached_response, enhanced_prompt = await asyncio.to_thread(_prepare_generation, context)
+        if cached_response is not None:
+            yield cached_response
+            return
+
+        generation_started = time.perf_counter()
+        response_parts = []
+        async for text in get_llm().astream("calculate", enhanced_prompt):
+            if not response_parts: record("llm_ttft", time.perf_counter() - generation_started, context)
+            response_parts.append(text)
+            yield text
+        record("llm_generate", time.perf_counter() - generation_started, context, chunks=len(response_parts))
+        _finish_generation(context, "".join(response_parts), generation_started)
+
+    except Exception as e:
+        context["error"] = str(e)
+        yield f"⚠️ Hisaab lagate samay error aaya: {e}"
+    finally:
+        _finish_request(context, request_started)
+
+# --- Sync code (Streamlit) se async pipeline chalana ---
+# Async provider clients apne event loop se bandhe hote hain, isliye poore
+# process ke liye ek hi background loop rakha jaata hai.
+_loop = None
+_loop_lock = threading.Lock()
+
+def _get_loop():
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, daemon=True).start()
+        return _loop
+
+def run_async(coro):
+    """Coroutine ko background loop par chalao aur result ka wait karo."""
+    return asyncio.run_coroutine_threadsafe(coro, _get_loop()).result()
+
+def iter_async_stream(async_gen):
+    """Async generator ko sync iterator banao; har chunk aate hi mil jaata hai."""
+    loop = _get_loop()
+    try:
+        while True:
+            try:
+                yield asyncio.run_coroutine_threadsafe(async_gen.__anext__(), loop).result()
+            except StopAsyncIteration:
+                return
+    finally:
+        asyncio.run_coroutine_threadsafe(async_gen.aclose(), loop).result()
+
+def get_pipeline_metrics() -> dict:
+    """Pipeline ke caches aur fast paths ke counters (monitoring ke liye)."""
+    return {
+        "query_embedding_cache": vectordbnew.query_cache_stats(),
+        "local_classifier": vectordbnew.category_classifier.metrics() if vectordbnew.category_classifier else {},
+        "response_cache": response_cache.metrics(),
+        "calculator": calculator.metrics(),
+        "audio_cache": get_audio_cache().metrics(),
+        "llm": get_llm().metrics(),
+        "jobs": get_job_queue().counts(),
+    }
+
+def _collect_pipeline_gauges() -> list:
+    """get_pipeline_metrics() ko Prometheus gauges mein badlo (hit ratios, fast paths, breaker states)."""
+    pipeline = get_pipeline_metrics()
+    audio = pipeline["audio_cache"]
+    caches = {"query_embedding": pipeline["query_embedding_cache"], "response": pipeline["response_cache"],
+              "audio_summary": audio["summary_cache"], "audio_memory": audio["audio_memory_cache"]}
+    gauges = [("hissab_cache_hit_ratio", "Cache hit ratio since process start.", {"cache": name}, stats["hit_ratio"])
+              for name, stats in caches.items()]
+    if pipeline["local_classifier"]:
+        gauges.append(("hissab_classifier_fast_path_ratio", "Queries classified locally without an LLM call.", {},
+                       pipeline["local_classifier"]["fast_path_ratio"]))
+    gauges.append(("hissab_calculator_solve_ratio", "Queries answered by the deterministic calculator.", {},
+                   pipeline["calculator"]["solve_ratio"]))
+    for target, state in pipeline["llm"]["breakers"].items():
+        gauges.append(("hissab_llm_breaker_open", "1 if the circuit breaker for a provider:model is open.",
+                       {"target": target}, float(state == "open")))
+    for status, count in pipeline["jobs"].items():
+        gauges.append(("hissab_jobs", "Background jobs in the durable queue by status.", {"status": status}, count))
+    return gauges
+
+metrics.register_collector(_collect_pipeline_gauges)
+
+# --- Background jobs (jobsnew) ---
+# Feedback click sirf job row likhta hai; encode, store write + flush (jisse ExampleIndex,
+# ANN aur local classifier listeners se update hote hain), error analysis aur compaction
+# worker threads mein chalte hain. Payloads JSON hain, isliye embedding nahi jaata:
+# worker encode_query() se leta hai (same process mein query cache hit).
+def _job_save_good(payload: dict):
+    ensure_ready()
+    with span("db_write_good"):
+        added = add_user_prompt_to_db(
+            hinglish_prompt=payload["hinglish_story"],
+            model_response=payload["model_response"],
+            primary_category=payload["primary_category"],
+            embedding=encode_query(payload["hinglish_story"])
+        )
+        get_store().flush()
+    return {"deduplicated": not added}
+
+def _job_save_bad(payload: dict):
+    ensure_ready()
+    with span("db_write_bad"):
+        add_to_bad_prompts_db(log_data=payload)
+        get_store().flush()
+
+def _job_error_analysis(payload: dict) -> str:
+    # Worker thread se async analysis background loop par; exception aage jaata hai, taaki queue retry kare
+    return run_async(analyze_bad_response_async({"hinglish_story": payload["hinglish_story"]},
+                                                payload["model_response"]))
+
+def _job_compact(payload: dict) -> dict:
+    ensure_ready()
+    store = get_store()
+    store.flush()
+    compacted = store.maybe_compact()
+    vectordbnew.hissab_db.refresh(force=True)  # sirf compact hue shards reload, ANN zaroorat ho to dobara banta hai
+    return {"compacted_shards": compacted, "pruned_jobs": get_job_queue().prune(), "good_rows": store.count_good()}
+
+_JOB_HANDLERS = {"save_good": _job_save_good, "save_bad": _job_save_bad,
+                 "error_analysis": _job_error_analysis, "compact": _job_compact}
+_workers = None
+_workers_lock = threading.Lock()
+
+def _get_workers() -> WorkerPool:
+    global _workers
+    with _workers_lock:
+        if _workers is None:
+            _workers = WorkerPool(get_job_queue())
+            for kind, handler in _JOB_HANDLERS.items():
+                _workers.register(kind, handler)
+            _workers.every("compact", COMPACT_INTERVAL_SECONDS)
+        return _workers
+
+def _submit(kind: str, payload: dict) -> int:
+    """Job queue mein daalo aur id lautao; HISSAB_BACKGROUND_JOBS=0 par caller ke thread mein hi chala do."""
+    ensure_ready()
+    job_id = get_job_queue().enqueue(kind, payload)
+    if not BACKGROUND_JOBS:
+        _get_workers().drain()
+    return job_id
+
+def get_job(job_id: int) -> dict:
+    """Background job ka haal: {"status": queued/running/done/failed, "result", ...} ya None."""
+    return get_job_queue().get(job_id)
+
+def drain_jobs(timeout: float = 30.0) -> bool:
+    """Queue ke ready jobs abhi isi thread mein chalao (batch ke end/tests mein)."""
+    return _get_workers().drain(timeout)
+
+# --- Feedback Handling ---
+def save_good_prompt(context: dict, model_response: str):
+    """👍: example DB mein jaata hai (background job). Job id lautata hai."""
+    return _submit("save_good", {"hinglish_story": context.get("hinglish_story"), "model_response": model_response,
+                                 "primary_category": context.get("primary_category")})
+
+def save_bad_prompt(context: dict, model_response: str):
+    """👎: structured log Bad DB mein (background job). Answer cache turant saaf hota hai."""
+    log_data = {**{k: v for k, v in context.items() if k != "query_embedding"}, "model_response": model_response}
+    # Galat jawab answer cache se hatao taaki kisi aur user ko dobara na mile
+    response_cache.invalidate(model_response)
+    return _submit("save_bad", json.loads(json.dumps(log_data, ensure_ascii=False, default=str)))
+
+def request_error_analysis(context: dict, model_response: str):
+    """Error analysis job queue mein; get_job(id)["result"] mein analysis aata hai (retries ke saath)."""
+    return _submit("error_analysis", {"hinglish_story": context.get("hinglish_story"), "model_response": model_response})
+
+# --- NAYA CHANGE: Error Analysis Gemini Pro ka istemal karega ---
+async def analyze_bad_response_async(context: dict, model_response: str) -> str:
+    """👎 jawab ka vishleshan. Error pakda nahi jaata: job queue usi par retry karti hai."""
+    prompt = PROMPT_ERROR_ANALYSIS.format(user_story=context.get("hinglish_story"), model_response=model_response)
+    with span("error_analysis", context):
+        return (await get_llm().acomplete("error_analysis", prompt)).text.strip()
+
+# --- NAYA CHANGE: Audio Summary Groq ka istemal karega ---
+# Summary (detailed_text se) aur mp3 (bole jaane wale text se) dono content-addressed
+# cache mein rehte hain, isliye har rerun par dobara Groq/gTTS call nahi hoti.
+async def summarize_for_audio_async(detailed_text: str) -> str:
+    cache = get_audio_cache()
+    summary = cache.get_summary(detailed_text)
+    if summary is None:
+        summary_request = PROMPT_SUMMARY.format(detailed_text=detailed_text)
+        with span("tts_summary"):
+            summary = (await get_llm().acomplete("summary", summary_request)).text.strip()
+        cache.put_summary(detailed_text, summary)
+    return summary
+
+def _tts_bytes(text: str) -> bytes:
+    buffer = io.BytesIO()
+    with span("tts_synthesis", chars=len(text)):
+        gTTS(text=text, lang="hi", slow=False).write_to_fp(buffer)
+    return buffer.getvalue()
+
+def synthesize_audio(summary_text: str, error_analysis: str = None, session_id: str = None) -> bytes:
+    """Bole jaane wale text ka mp3 (bytes). Same text dobara aaye to cache se; koi file cwd mein nahi banti."""
+    final_audio_text = f"Galti ka vishleshan: {error_analysis}. {summary_text}" if error_analysis else summary_text
+    return get_audio_cache().get_or_create_audio(final_audio_text, _tts_bytes, session_id=session_id)
+
+async def generate_audio_summary_async(detailed_text: str, error_analysis: str = None, summary_text: str = None,
+                                       session_id: str = None):
+    try:
+        if summary_text is None:
+            summary_text = await summarize_for_audio_async(detailed_text)
+        return await asyncio.to_thread(synthesize_audio, summary_text, error_analysis, session_id)
+    except Exception as e:
+        print(f"Groq audio summary/gTTS error: {e}")
+        return None
@@ -0,0 +1,188 @@
+# maintenancenew.py - Good/Bad prompt DBs ki maintenance: duplicates ki report/collapse, shard stats, rebuild
+#
+# Insert-time dedup (vectordbnew.add_user_prompt_to_db) sirf naye 👍 ko rokta hai; purane
+# DB mein pehle se jama near-duplicates yahan se collapse hote hain. Har category shard
+# alag process hota hai: rows ko use_count (phir sabse purana) ke order mein dekha jaata
+# hai, aur har bachi row apne se >= threshold cosine wali baaki rows ko nigal leti hai
+# (unka use_count survivor mein judta hai). Good rows sirf tab merge hoti hain jab unke
+# amounts (extract_numbers, same order) bhi same hon, warna alag jawab kho jaata.
+# Bad logs ke liye query text (hinglish_story)
+# encode hota hai aur grouping (primary_category, model_response) ke andar hoti hai: ek hi
+# sawaal ke alag-alag galat jawab error analysis ke liye alag rehte hain.
+#
+# Usage (repo root se; bina --apply sirf report):
+#   python maintenancenew.py dedup --threshold 0.97 --json dedup_report.json
+#   python maintenancenew.py dedup --apply
+#   python maintenancenew.py shards
+#   python maintenancenew.py rebuild --category group_settlement
+import json
+import time
+import argparse
+import numpy as np
+
+import vectordbnew
+from storenew import get_store, shard_name
+from responsecachenew import extract_numbers
+from annnew import ANN_MIN_ROWS, normalize_rows
+
+# --- Configuration ---
+SIMILARITY_BLOCK_ROWS = 256   # itni rows ek saath poore shard se compare hoti hain (memory = block x shard)
+REPORT_GROUPS_PER_CATEGORY = 3
+BAD_LOG_TEXT_FIELDS = ("hinglish_story", "user_hindi_query", "hindi_story")
+
+
+def find_duplicate_groups(vectors: np.ndarray, priority: list, threshold: float) -> list:
+    """Greedy grouping: priority order mein har abhi tak bachi row survivor banti hai aur
+    uske >= threshold cosine wali bachi rows uske duplicates. [(keep, [duplicates]), ...] positions mein."""
+    if not len(vectors):
+        return []
+    normalized = normalize_rows(vectors)
+    taken = np.zeros(len(normalized), dtype=bool)
+    groups = []
+    for start in range(0, len(priority), SIMILARITY_BLOCK_ROWS):
+        block = np.asarray(priority[start:start + SIMILARITY_BLOCK_ROWS], dtype=np.int64)
+        similarities = normalized[block] @ normalized.T
+        for keep, row_similarities in zip(block, similarities):
+            if taken[keep]:
+                continue
+            taken[keep] = True
+            duplicates = np.flatnonzero((row_similarities >= threshold) & ~taken)
+            if len(duplicates):
+                taken[duplicates] = True
+                groups.append((int(keep), duplicates.tolist()))
+    return groups
+
+
+def find_keyed_duplicate_groups(vectors: np.ndarray, priority: list, keys: list, threshold: float) -> list:
+    """find_duplicate_groups, par sirf same key wali rows aapas mein merge hoti hain."""
+    groups = []
+    for key in set(keys):
+        members = [i for i in priority if keys[i] == key]
+        groups.extend((members[keep], [members[d] for d in duplicates]) for keep, duplicates in
+                      find_duplicate_groups(vectors[members], list(range(len(members))), threshold))
+    return groups
+
+
+def _category_report(rows: int, groups: list, samples: list) -> dict:
+    return {"rows": rows, "duplicate_rows": sum(len(d) for _, d in groups), "groups": len(groups),
+            "largest_groups": samples}
+
+
+def dedup_good(store, threshold: float, apply: bool = False) -> dict:
+    """Har good shard ke near-duplicates; apply=True par merge + sirf badle shards ki compaction."""
+    report = {}
+    for category in sorted(store.category_counts()):
+        rows = store.shard_rows(category)  # [(id, emb_row, use_count)]
+        matrix = store.embedding_matrix(category)
+        vectors = np.asarray(matrix[[emb_row for _, emb_row, _ in rows]]) if rows else matrix[:0]
+        texts = [e["user_text"] for e in store.get_examples(category, [emb_row for _, emb_row, _ in rows])]
+        priority = sorted(range(len(rows)), key=lambda i: (-rows[i][2], rows[i][0]))
+        groups = find_keyed_duplicate_groups(vectors, priority, [extract_numbers(t) for t in texts], threshold)
+        largest = sorted(groups, key=lambda g: -len(g[1]))[:REPORT_GROUPS_PER_CATEGORY]
+        samples = [{"user_text": texts[keep], "merged": len(duplicates)} for keep, duplicates in largest]
+        report[category] = _category_report(len(rows), groups, samples)
+        if apply and groups:
+            for keep, duplicates in groups:
+                store.merge_good(rows[keep][0], [rows[i][0] for i in duplicates])
+            store.compact(category)
+    return report
+
+
+def _bad_log_text(log_data: dict) -> str:
+    for field in BAD_LOG_TEXT_FIELDS:
+        if log_data.get(field):
+            return " ".join(str(log_data[field]).split())
+    return None
+
+
+def dedup_bad(store, threshold: float, apply: bool = False) -> dict:
+    """Bad logs ke near-duplicates: same primary_category, same model_response aur milta-julta query text."""
+    by_category = {}
+    for row_id, log_data, use_count in store.bad_rows():
+        text = _bad_log_text(log_data)
+        if text:
+            response = " ".join(str(log_data.get("model_response") or "").split())
+            by_category.setdefault(log_data.get("primary_category") or "unknown", []).append(
+                (row_id, text, use_count, response))
+    report = {}
+    for category, rows in sorted(by_category.items()):
+        vectors = vectordbnew.encode_cached([row[1] for row in rows])
+        priority = sorted(range(len(rows)), key=lambda i: (-rows[i][2], rows[i][0]))
+        groups = find_keyed_duplicate_groups(vectors, priority, [row[3] for row in rows], threshold)
+        largest = sorted(groups, key=lambda g: -len(g[1]))[:REPORT_GROUPS_PER_CATEGORY]
+        report[category] = _category_report(
+            len(rows), groups, [{"user_text": rows[keep][1], "merged": len(d)} for keep, d in largest])
+        if apply:
+            for keep, duplicates in groups:
+                store.merge_bad(rows[keep][0], [rows[i][0] for i in duplicates])
+    return report
+
+
+def shard_stats(store) -> dict:
+    counts, dead, generations = store.category_counts(), store.shard_dead_ratios(), store.shard_generations()
+    return {category: {"shard": shard_name(category), "live_rows": counts.get(category, 0),
+                       "dead_ratio": round(dead[category], 3), "generation": generations.get(category, 0)}
+            for category in sorted(dead)}
+
+
+def rebuild(store, category: str = None) -> dict:
+    """Shard(s) compact karo aur bade shards ka ANN index dobara train karo; baaki shards chhue nahi jaate."""
+    categories = [category] if category else sorted(store.category_counts())
+    results = {}
+    for name in categories:
+        t0 = time.perf_counter()
+        store.compact(name)
+        shard = vectordbnew.CategoryShard(store, name).ensure_loaded()
+        while shard.ann_building:
+            time.sleep(0.05)
+        if shard.ann is None and len(shard) >= ANN_MIN_ROWS:
+            shard.rebuild_ann()
+        results[name] = {"rows": len(shard), "ann": shard.ann is not None,
+                         "seconds": round(time.perf_counter() - t0, 3)}
+    return results
+
+
+def _print_dedup(title: str, report: dict):
+    total = sum(r["duplicate_rows"] for r in report.values())
+    print(f"{title}: {sum(r['rows'] for r in report.values())} rows, {total} near-duplicates")
+    for category, result in report.items():
+        if not result["groups"]:
+            continue
+        print(f"  {category}: {result['duplicate_rows']}/{result['rows']} duplicates in {result['groups']} groups")
+        for sample in result["largest_groups"]:
+            print(f"    +{sample['merged']}: {sample['user_text'][:80]}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Good/Bad prompt DB maintenance.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    dedup = commands.add_parser("dedup", help="near-duplicates ki report (aur --apply par collapse)")
+    dedup.add_argument("--threshold", type=float, default=vectordbnew.DEDUP_THRESHOLD)
+    dedup.add_argument("--apply", action="store_true", help="duplicates ko survivor row mein merge karo")
+    dedup.add_argument("--skip-bad", action="store_true", help="bad logs ke liye embedding model load na karo")
+    dedup.add_argument("--json", help="report ko is file mein likho")
+    commands.add_parser("shards", help="har category shard ka size, dead ratio aur generation")
+    rebuild_parser = commands.add_parser("rebuild", help="shard compaction + ANN rebuild")
+    rebuild_parser.add_argument("--category", help="sirf yeh shard (default: saare)")
+    args = parser.parse_args()
+
+    store = get_store()
+    if args.command == "dedup":
+        report = {"threshold": args.threshold, "applied": args.apply, "good": dedup_good(store, args.threshold, args.apply)}
+        _print_dedup("Good DB", report["good"])
+        if not args.skip_bad:
+            report["bad"] = dedup_bad(store, args.threshold, args.apply)
+            _print_dedup("Bad DB", report["bad"])
+        if args.json:
+            with open(args.json, "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=2, ensure_ascii=False)
+        if not args.apply:
+            print("Sirf report; collapse karne ke liye --apply ke saath chalayein.")
+    elif args.command == "shards":
+        print(json.dumps(shard_stats(store), indent=2, ensure_ascii=False))
+    else:
+        print(json.dumps(rebuild(store, args.category), indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,678 @@
+# providersnew.py - Pluggable LLM provider layer (Groq, Gemini, offline stub)
+#
+# Pipeline ke har stage ("preprocess", "calculate", "summary", "error_analysis")
+# ka ek route hota hai: "provider:model" targets ki list, pehla primary aur
+# baaki fallbacks. LLMRouter har call par deadline lagata hai, transient errors
+# (network/timeout, 429, 5xx) par jittered backoff ke saath retry karta hai, unse
+# bar-bar fail hone wale target ko circuit breaker se kuch der ke liye band karta
+# hai, aur (optional) slow primary ke saath secondary ko hedge karta hai. Har provider ka client process mein ek hi baar banta hai.
+import os
+import json
+import time
+import random
+import asyncio
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from dotenv import load_dotenv
+
+from tracingnew import metrics
+
+load_dotenv()
+
+# --- Configuration ---
+DEFAULT_ROUTES = {
+    "preprocess": "groq:llama3-8b-8192,gemini:gemini-1.5-flash",
+    "calculate": "gemini:gemini-1.5-flash,groq:llama3-70b-8192",
+    "summary": "groq:llama3-8b-8192,gemini:gemini-1.5-flash",
+    "error_analysis": "gemini:gemini-pro,groq:llama3-70b-8192",
+}
+STAGE_TIMEOUTS = {"preprocess": 8.0, "calculate": 30.0, "summary": 10.0, "error_analysis": 20.0}
+LLM_PROVIDER_OVERRIDE = os.getenv("HISSAB_LLM_PROVIDER")  # "stub" = saare stages offline stub par
+MAX_RETRIES = int(os.getenv("HISSAB_LLM_MAX_RETRIES", "2"))
+BACKOFF_BASE_SECONDS = 0.2
+BACKOFF_MAX_SECONDS = 2.0
+HEDGE_AFTER_SECONDS = float(os.getenv("HISSAB_LLM_HEDGE_AFTER", "0"))  # 0 = hedging band
+BREAKER_FAILURE_THRESHOLD = 5
+BREAKER_RESET_SECONDS = 30.0
+# Sirf yeh dobara koshish se theek ho sakte hain: network/timeout, 429 aur 5xx. Auth (401/403)
+# ya bad request (400) na retry hote hain, na breaker mein gine jaate hain (fallback phir bhi hota hai).
+_RETRYABLE_STATUS = {408, 409, 429}
+_RETRYABLE_ERROR_NAMES = ("timeout", "connect", "ratelimit", "internalserver", "serviceunavailable", "unavailable",
+                          "deadlineexceeded", "resourceexhausted", "overloaded")
+
+LLM_SECONDS = metrics.histogram("hissab_llm_call_seconds", "Successful LLM call latency (full response).", ("stage", "target"))
+LLM_CALLS = metrics.counter("hissab_llm_calls_total", "LLM call attempts by outcome.", ("stage", "target", "outcome"))
+LLM_TOKENS = metrics.counter("hissab_llm_tokens_total", "Tokens reported by the provider.", ("stage", "target", "kind"))
+
+
+class LLMError(Exception):
+    """Kisi stage ke saare targets fail ho gaye."""
+
+
+class ProviderError(LLMError):
+    """Provider ka HTTP-style error (status_code ke saath); StubProvider isse failures simulate karta hai."""
+
+    def __init__(self, message: str, status_code: int = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def _status_code(error):
+    for source in (error, getattr(error, "response", None)):
+        code = getattr(source, "status_code", None)
+        if isinstance(code, int):
+            return code
+    code = getattr(error, "code", None)  # google.api_core exceptions HTTP code yahan rakhte hain
+    return code if isinstance(code, int) else None
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Kya yeh error dobara koshish se theek ho sakta hai? Network/timeout, 429 aur 5xx haan; auth/bad request nahi."""
+    if isinstance(error, (TimeoutError, asyncio.TimeoutError, ConnectionError)):
+        return True
+    status = _status_code(error)
+    if status is not None:
+        return status in _RETRYABLE_STATUS or status >= 500
+    name = type(error).__name__.lower()
+    return any(part in name for part in _RETRYABLE_ERROR_NAMES)
+
+
+class Completion:
+    __slots__ = ("text", "prompt_tokens", "completion_tokens", "target")
+
+    def __init__(self, text: str, prompt_tokens: int = 0, completion_tokens: int = 0, target: str = ""):
+        self.text = text
+        self.prompt_tokens = prompt_tokens
+        self.completion_tokens = completion_tokens
+        self.target = target
+
+
+def _fill_usage(usage, prompt_tokens, completion_tokens):
+    if usage is not None:
+        usage["prompt_tokens"] = prompt_tokens or 0
+        usage["completion_tokens"] = completion_tokens or 0
+
+
+# --- Providers ---
+class LLMProvider:
+    """Provider interface: sync + async, complete + stream. Streaming text chunks yield karta hai."""
+    name = "base"
+
+    def complete(self, model: str, prompt: str, timeout: float) -> Completion:
+        raise NotImplementedError
+
+    def stream(self, model: str, prompt: str, timeout: float, usage: dict = None):
+        """Text chunks yield karo; provider token counts de to `usage` dict mein bharo."""
+        completion = self.complete(model, prompt, timeout)
+        _fill_usage(usage, completion.prompt_tokens, completion.completion_tokens)
+        yield completion.text
+
+    async def acomplete(self, model: str, prompt: str, timeout: float) -> Completion:
+        return await asyncio.to_thread(self.complete, model, prompt, timeout)
+
+    async def astream(self, model: str, prompt: str, timeout: float, usage: dict = None):
+        completion = await self.acomplete(model, prompt, timeout)
+        _fill_usage(usage, completion.prompt_tokens, completion.completion_tokens)
+        yield completion.text
+
+
+class GroqProvider(LLMProvider):
+    name = "groq"
+
+    def __init__(self, api_key: str = None):
+        from groq import Groq, AsyncGroq
+        api_key = api_key or os.getenv("GROQ_API_KEY")
+        self.client = Groq(api_key=api_key)
+        self.async_client = AsyncGroq(api_key=api_key)
+
+    @staticmethod
+    def _completion(response, model: str) -> Completion:
+        usage = getattr(response, "usage", None)
+        return Completion(response.choices[0].message.content, getattr(usage, "prompt_tokens", 0) or 0,
+                          getattr(usage, "completion_tokens", 0) or 0, f"groq:{model}")
+
+    def complete(self, model, prompt, timeout):
+        response = self.client.chat.completions.create(
+            messages=[{"role": "user", "content": prompt}], model=model, timeout=timeout)
+        return self._completion(response, model)
+
+    @staticmethod
+    def _chunk_usage(chunk, usage):
+        # Groq stream ke aakhri chunk mein x_groq.usage aata hai
+        chunk_usage = getattr(getattr(chunk, "x_groq", None), "usage", None)
+        if chunk_usage is not None:
+            _fill_usage(usage, chunk_usage.prompt_tokens, chunk_usage.completion_tokens)
+
+    def stream(self, model, prompt, timeout, usage=None):
+        for chunk in self.client.chat.completions.create(
+                messages=[{"role": "user", "content": prompt}], model=model, timeout=timeout, stream=True):
+            self._chunk_usage(chunk, usage)
+            text = chunk.choices[0].delta.content if chunk.choices else None
+            if text:
+                yield text
+
+    async def acomplete(self, model, prompt, timeout):
+        response = await self.async_client.chat.completions.create(
+            messages=[{"role": "user", "content": prompt}], model=model, timeout=timeout)
+        return self._completion(response, model)
+
+    async def astream(self, model, prompt, timeout, usage=None):
+        response = await self.async_client.chat.completions.create(
+            messages=[{"role": "user", "content": prompt}], model=model, timeout=timeout, stream=True)
+        async for chunk in response:
+            self._chunk_usage(chunk, usage)
+            text = chunk.choices[0].delta.content if chunk.choices else None
+            if text:
+                yield text
+
+
+class GeminiProvider(LLMProvider):
+    name = "gemini"
+
+    def __init__(self, api_key: str = None):
+        import google.generativeai as genai
+        self.genai = genai
+        genai.configure(api_key=api_key or os.getenv("GOOGLE_API_KEY"))
+        self._models = {}
+        self._lock = threading.Lock()
+
+    def _model(self, model: str):
+        # GenerativeModel har call par naya banane ki bajaye model name ke hisaab se reuse
+        with self._lock:
+            if model not in self._models:
+                self._models[model] = self.genai.GenerativeModel(model)
+            return self._models[model]
+
+    @staticmethod
+    def _completion(response, model: str) -> Completion:
+        usage = getattr(response, "usage_metadata", None)
+        return Completion(response.text, getattr(usage, "prompt_token_count", 0) or 0,
+                          getattr(usage, "candidates_token_count", 0) or 0, f"gemini:{model}")
+
+    def complete(self, model, prompt, timeout):
+        response = self._model(model).generate_content(prompt, request_options={"timeout": timeout})
+        return self._completion(response, model)
+
+    @staticmethod
+    def _chunk_usage(chunk, usage):
+        chunk_usage = getattr(chunk, "usage_metadata", None)  # har chunk par ab tak ka kul
+        if chunk_usage is not None:
+            _fill_usage(usage, chunk_usage.prompt_token_count, chunk_usage.candidates_token_count)
+
+    def stream(self, model, prompt, timeout, usage=None):
+        for chunk in self._model(model).generate_content(prompt, stream=True, request_options={"timeout": timeout}):
+            self._chunk_usage(chunk, usage)
+            yield chunk.text
+
+    async def acomplete(self, model, prompt, timeout):
+        response = await self._model(model).generate_content_async(prompt, request_options={"timeout": timeout})
+        return self._completion(response, model)
+
+    async def astream(self, model, prompt, timeout, usage=None):
+        response = await self._model(model).generate_content_async(
+            prompt, stream=True, request_options={"timeout": timeout})
+        async for chunk in response:
+            self._chunk_usage(chunk, usage)
+            yield chunk.text
+
+
+class StubProvider(LLMProvider):
+    """Deterministic in-process provider: offline load tests aur benchmarks ke liye.
+
+    Jawab sirf prompt par depend karta hai; latency (first token, per chunk,
+    non-streaming completion) configurable hai taaki asli providers jaisa load bane.
+    """
+    name = "stub"
+    _CATEGORY_KEYWORDS = [
+        ("discount", "discount_and_offers"), ("emi", "loan_and_emi"), ("loan", "loan_and_emi"),
+        ("udhaar", "lending_and_borrowing"), ("salary", "salary_calculation"), ("sasta", "price_comparison"),
+        ("munafa", "investment_and_profit"), ("dost", "group_settlement"), ("bachat", "monthly_budget_and_savings"),
+        ("bache", "income_and_balance"), ("kharch", "personal_expense_tracking"),
+        ("छूट", "discount_and_offers"), ("उधार", "lending_and_borrowing"), ("वेतन", "salary_calculation"),
+        ("बचे", "income_and_balance"), ("खर्च", "personal_expense_tracking"),
+    ]
+
+    def __init__(self, first_token_seconds: float = 0.0, chunk_seconds: float = 0.0,
+                 completion_seconds: float = 0.0, chunks: int = 8, failure_rate: float = 0.0):
+        self.first_token_seconds = first_token_seconds
+        self.chunk_seconds = chunk_seconds
+        self.completion_seconds = completion_seconds
+        self.chunks = chunks
+        self.failure_rate = failure_rate
+
+    def _maybe_fail(self, prompt: str):
+        if self.failure_rate and int(hashlib.md5(prompt.encode("utf-8")).hexdigest(), 16) % 1000 < self.failure_rate * 1000:
+            raise ProviderError("stub provider: simulated failure", status_code=503)
+
+    def respond(self, prompt: str) -> str:
+        if "JSON Output" in prompt:
+            query = prompt.split('User\'s Hindi Query: "', 1)[-1].split('"', 1)[0]
+            lowered = query.lower()
+            category = next((c for word, c in self._CATEGORY_KEYWORDS if word in lowered), "unknown")
+            return json.dumps({"hinglish_text": query, "category": category}, ensure_ascii=False)
+        if "summary sentence" in prompt:
+            return "Aapka hisaab taiyaar hai."
+        if "Find the mistake" in prompt:
+            return "Jawab mein calculation ki galti ho sakti hai."
+        digest = hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:8]
+        return f"**Hisaab (stub {digest}):**\n- Yeh ek offline stub jawab hai.\n- **Kul: ₹{int(digest, 16) % 100000:,}**"
+
+    def _parts(self, prompt: str) -> list:
+        text = self.respond(prompt)
+        size = max(1, len(text) // self.chunks + 1)
+        return [text[i:i + size] for i in range(0, len(text), size)]
+
+    def complete(self, model, prompt, timeout):
+        self._maybe_fail(prompt)
+        time.sleep(self.completion_seconds)
+        text = self.respond(prompt)
+        return Completion(text, len(prompt.split()), len(text.split()), f"stub:{model}")
+
+    def stream(self, model, prompt, timeout, usage=None):
+        self._maybe_fail(prompt)
+        parts = self._parts(prompt)
+        for i, part in enumerate(parts):
+            time.sleep(self.first_token_seconds if i == 0 else self.chunk_seconds)
+            yield part
+        _fill_usage(usage, len(prompt.split()), len("".join(parts).split()))
+
+    async def acomplete(self, model, prompt, timeout):
+        self._maybe_fail(prompt)
+        await asyncio.sleep(self.completion_seconds)
+        text = self.respond(prompt)
+        return Completion(text, len(prompt.split()), len(text.split()), f"stub:{model}")
+
+    async def astream(self, model, prompt, timeout, usage=None):
+        self._maybe_fail(prompt)
+        parts = self._parts(prompt)
+        for i, part in enumerate(parts):
+            await asyncio.sleep(self.first_token_seconds if i == 0 else self.chunk_seconds)
+            yield part
+        _fill_usage(usage, len(prompt.split()), len("".join(parts).split()))
+
+
+_PROVIDER_FACTORIES = {"groq": GroqProvider, "gemini": GeminiProvider, "stub": StubProvider}
+
+
+# --- Resilience ---
+class CircuitBreaker:
+    """closed -> (lagataar failures) -> open -> (reset time baad) half-open -> ek success par closed."""
+
+    def __init__(self, failure_threshold: int = BREAKER_FAILURE_THRESHOLD, reset_seconds: float = BREAKER_RESET_SECONDS):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at = None
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            return time.monotonic() - self.opened_at >= self.reset_seconds  # half-open: ek koshish
+
+    def record_success(self):
+        with self._lock:
+            self.failures, self.opened_at = 0, None
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        return "half_open" if time.monotonic() - self.opened_at >= self.reset_seconds else "open"
+
+
+def _backoff(attempt: int) -> float:
+    """Full-jitter exponential backoff."""
+    return random.uniform(0, min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * (2 ** attempt)))
+
+
+def _parse_route(route: str) -> list:
+    targets = []
+    for item in route.split(","):
+        provider, _, model = item.strip().partition(":")
+        if provider:
+            targets.append((provider, model))
+    return targets
+
+
+class RateLimiter:
+    """Token bucket: `rate` calls/second, `burst` tak ek saath. reserve() batata hai kitna rukna hai."""
+
+    def __init__(self, rate: float, burst: float = None):
+        self.rate = rate
+        self.burst = burst or max(1.0, rate)
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1.0  # negative = aage ke slot pehle se book
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+
+class LLMRouter:
+    """Stage-wise routing + deadlines + retries + circuit breakers + optional hedging."""
+
+    def __init__(self, routes: dict = None, providers: dict = None, max_retries: int = MAX_RETRIES,
+                 hedge_after_seconds: float = HEDGE_AFTER_SECONDS):
+        routes = dict(routes or DEFAULT_ROUTES)
+        for stage in list(routes):
+            routes[stage] = os.getenv(f"HISSAB_ROUTE_{stage.upper()}", routes[stage])
+        self.routes = {stage: _parse_route(route) for stage, route in routes.items()}
+        self.max_retries = max_retries
+        self.hedge_after_seconds = hedge_after_seconds
+        self._providers = dict(providers or {})
+        self._breakers = {}
+        self._limiters = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="llm-hedge")
+        self.stats = {"calls": 0, "retries": 0, "fallbacks": 0, "hedges": 0, "hedge_wins": 0, "failures": 0}
+
+    def provider(self, name: str) -> LLMProvider:
+        with self._lock:
+            if name not in self._providers:
+                self._providers[name] = _PROVIDER_FACTORIES[name]()
+            return self._providers[name]
+
+    def set_rate_limit(self, provider: str, calls_per_second: float, burst: float = None):
+        """Provider ki saari calls (sab stages milakar) is rate tak seemit karo; 0/None = koi limit nahi."""
+        with self._lock:
+            if calls_per_second:
+                self._limiters[provider] = RateLimiter(calls_per_second, burst)
+            else:
+                self._limiters.pop(provider, None)
+
+    def _rate_wait(self, provider: str) -> float:
+        limiter = self._limiters.get(provider)
+        return limiter.reserve() if limiter else 0.0
+
+    def _breaker(self, target: tuple) -> CircuitBreaker:
+        with self._lock:
+            return self._breakers.setdefault(target, CircuitBreaker())
+
+    def _targets(self, stage: str) -> list:
+        targets = [t for t in self.routes.get(stage, []) if self._breaker(t).allow()]
+        if not targets:
+            raise LLMError(f"Stage '{stage}' ke saare providers abhi circuit-breaker se band hain.")
+        return targets
+
+    def _count(self, key: str, amount: int = 1):
+        with self._lock:
+            self.stats[key] += amount
+
+    @staticmethod
+    def _observe(stage: str, target: tuple, seconds: float = None, prompt_tokens: int = 0, completion_tokens: int = 0):
+        """Ek attempt ka metric: seconds=None matlab attempt fail hua."""
+        name = f"{target[0]}:{target[1]}"
+        LLM_CALLS.inc((stage, name, "error" if seconds is None else "ok"))
+        if seconds is not None:
+            LLM_SECONDS.observe(seconds, (stage, name))
+            LLM_TOKENS.inc((stage, name, "prompt"), prompt_tokens)
+            LLM_TOKENS.inc((stage, name, "completion"), completion_tokens)
+
+    # --- Non-streaming ---
+    def _call_with_retries(self, stage: str, target: tuple, prompt: str, deadline: float) -> Completion:
+        provider, model = target
+        breaker = self._breaker(target)
+        for attempt in range(self.max_retries + 1):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutError(f"{stage}: deadline khatam")
+            try:
+                time.sleep(self._rate_wait(provider))
+                started = time.perf_counter()
+                result = self.provider(provider).complete(model, prompt, timeout=remaining)
+                breaker.record_success()
+                self._observe(stage, target, time.perf_counter() - started, result.prompt_tokens, result.completion_tokens)
+                return result
+            except Exception as e:
+                self._observe(stage, target)
+                if not is_retryable(e):
+                    raise  # auth/bad request: retry se nahi sudhrega, aur provider ki sehat ka sawaal nahi
+                breaker.record_failure()
+                if attempt == self.max_retries or not breaker.allow():
+                    raise
+                self._count("retries")
+                print(f"LLM {provider}:{model} ({stage}) fail hua, retry {attempt + 1}: {e}")
+                time.sleep(min(_backoff(attempt), max(0.0, deadline - time.monotonic())))
+
+    def complete(self, stage: str, prompt: str) -> Completion:
+        """Stage ke route par prompt chalao; fallbacks aur (optional) hedging ke saath."""
+        self._count("calls")
+        targets = self._targets(stage)
+        deadline = time.monotonic() + STAGE_TIMEOUTS.get(stage, 30.0)
+        if self.hedge_after_seconds > 0 and len(targets) > 1:
+            return self._complete_hedged(stage, targets, prompt, deadline)
+        last_error = None
+        for i, target in enumerate(targets):
+            if i:
+                self._count("fallbacks")
+            try:
+                return self._call_with_retries(stage, target, prompt, deadline)
+            except Exception as e:
+                last_error = e
+        self._count("failures")
+        raise LLMError(f"Stage '{stage}' fail hua: {last_error}") from last_error
+
+    def _complete_hedged(self, stage, targets, prompt, deadline):
+        """Primary ko hedge_after_seconds tak jawab na aaye to secondary bhi shuru; jo pehle aaye woh jeete."""
+        primary = self._executor.submit(self._call_with_retries, stage, targets[0], prompt, deadline)
+        done, _ = wait([primary], timeout=self.hedge_after_seconds)
+        if done and primary.exception() is None:
+            return primary.result()
+        self._count("hedges")
+        secondary = self._executor.submit(self._call_with_retries, stage, targets[1], prompt, deadline)
+        pending = {primary, secondary}
+        last_error = None
+        while pending:
+            done, pending = wait(pending, timeout=max(0.0, deadline - time.monotonic()), return_when=FIRST_COMPLETED)
+            if not done:
+                break
+            for future in done:
+                if future.exception() is None:
+                    if future is secondary:
+                        self._count("hedge_wins")
+                    return future.result()
+                last_error = future.exception()
+        self._count("failures")
+        raise LLMError(f"Stage '{stage}' (hedged) fail hua: {last_error}")
+
+    async def _acall_with_retries(self, stage, target, prompt, deadline) -> Completion:
+        provider, model = target
+        breaker = self._breaker(target)
+        for attempt in range(self.max_retries + 1):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutError(f"{stage}: deadline khatam")
+            try:
+                await asyncio.sleep(self._rate_wait(provider))
+                started = time.perf_counter()
+                result = await asyncio.wait_for(self.provider(provider).acomplete(model, prompt, remaining), remaining)
+                breaker.record_success()
+                self._observe(stage, target, time.perf_counter() - started, result.prompt_tokens, result.completion_tokens)
+                return result
+            except Exception as e:
+                self._observe(stage, target)
+                if not is_retryable(e):
+                    raise  # auth/bad request: retry se nahi sudhrega, aur provider ki sehat ka sawaal nahi
+                breaker.record_failure()
+                if attempt == self.max_retries or not breaker.allow():
+                    raise
+                self._count("retries")
+                print(f"LLM {provider}:{model} ({stage}) fail hua, retry {attempt + 1}: {e}")
+                await asyncio.sleep(min(_backoff(attempt), max(0.0, deadline - time.monotonic())))
+
+    async def acomplete(self, stage: str, prompt: str) -> Completion:
+        self._count("calls")
+        targets = self._targets(stage)
+        deadline = time.monotonic() + STAGE_TIMEOUTS.get(stage, 30.0)
+        if self.hedge_after_seconds > 0 and len(targets) > 1:
+            return await self._acomplete_hedged(stage, targets, prompt, deadline)
+        last_error = None
+        for i, target in enumerate(targets):
+            if i:
+                self._count("fallbacks")
+            try:
+                return await self._acall_with_retries(stage, target, prompt, deadline)
+            except Exception as e:
+                last_error = e
+        self._count("failures")
+        raise LLMError(f"Stage '{stage}' fail hua: {last_error}") from last_error
+
+    async def _acomplete_hedged(self, stage, targets, prompt, deadline):
+        primary = asyncio.ensure_future(self._acall_with_retries(stage, targets[0], prompt, deadline))
+        done, _ = await asyncio.wait({primary}, timeout=self.hedge_after_seconds)
+        if done and primary.exception() is None:
+            return primary.result()
+        self._count("hedges")
+        secondary = asyncio.ensure_future(self._acall_with_retries(stage, targets[1], prompt, deadline))
+        pending = {primary, secondary} - done
+        last_error = primary.exception() if done else None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, timeout=max(0.0, deadline - time.monotonic()),
+                                                   return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    break
+                for task in done:
+                    if task.exception() is None:
+                        if task is secondary:
+                            self._count("hedge_wins")
+                        return task.result()
+                    last_error = task.exception()
+        finally:
+            for task in pending:
+                task.cancel()
+        self._count("failures")
+        raise LLMError(f"Stage '{stage}' (hedged) fail hua: {last_error}")
+
+    # --- Streaming (retry/fallback sirf pehle chunk se pehle) ---
+    def stream(self, stage: str, prompt: str):
+        self._count("calls")
+        deadline = time.monotonic() + STAGE_TIMEOUTS.get(stage, 30.0)
+        last_error = None
+        for i, target in enumerate(self._targets(stage)):
+            if i:
+                self._count("fallbacks")
+            provider, model = target
+            breaker = self._breaker(target)
+            for attempt in range(self.max_retries + 1):
+                started = False
+                time.sleep(self._rate_wait(provider))
+                call_started, usage = time.perf_counter(), {}
+                try:
+                    for text in self.provider(provider).stream(model, prompt, max(0.1, deadline - time.monotonic()), usage):
+                        started = True
+                        yield text
+                        if time.monotonic() > deadline:
+                            raise TimeoutError(f"{stage}: stream deadline khatam")
+                    breaker.record_success()
+                    self._observe(stage, target, time.perf_counter() - call_started,
+                                  usage.get("prompt_tokens", 0), usage.get("completion_tokens", 0))
+                    return
+                except Exception as e:
+                    retryable = is_retryable(e)
+                    if retryable:
+                        breaker.record_failure()
+                    self._observe(stage, target)
+                    if started:
+                        raise  # user ko aadha jawab dikh chuka hai; dobara shuru nahi kar sakte
+                    last_error = e
+                    if not retryable or attempt == self.max_retries or not breaker.allow() \
+                            or time.monotonic() > deadline:
+                        break
+                    self._count("retries")
+                    time.sleep(_backoff(attempt))
+        self._count("failures")
+        raise LLMError(f"Stage '{stage}' stream fail hua: {last_error}") from last_error
+
+    async def astream(self, stage: str, prompt: str):
+        self._count("calls")
+        deadline = time.monotonic() + STAGE_TIMEOUTS.get(stage, 30.0)
+        last_error = None
+        for i, target in enumerate(self._targets(stage)):
+            if i:
+                self._count("fallbacks")
+            provider, model = target
+            breaker = self._breaker(target)
+            for attempt in range(self.max_retries + 1):
+                started = False
+                await asyncio.sleep(self._rate_wait(provider))
+                call_started, usage = time.perf_counter(), {}
+                stream = self.provider(provider).astream(model, prompt, max(0.1, deadline - time.monotonic()), usage)
+                try:
+                    while True:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            raise TimeoutError(f"{stage}: stream deadline khatam")
+                        try:
+                            text = await asyncio.wait_for(stream.__anext__(), remaining)
+                        except StopAsyncIteration:
+                            break
+                        started = True
+                        yield text
+                    breaker.record_success()
+                    self._observe(stage, target, time.perf_counter() - call_started,
+                                  usage.get("prompt_tokens", 0), usage.get("completion_tokens", 0))
+                    return
+                except Exception as e:
+                    retryable = is_retryable(e)
+                    if retryable:
+                        breaker.record_failure()
+                    self._observe(stage, target)
+                    if started:
+                        raise
+                    last_error = e
+                    if not retryable or attempt == self.max_retries or not breaker.allow() \
+                            or time.monotonic() > deadline:
+                        break
+                    self._count("retries")
+                    await asyncio.sleep(_backoff(attempt))
+                finally:
+                    await stream.aclose()
+        self._count("failures")
+        raise LLMError(f"Stage '{stage}' stream fail hua: {last_error}") from last_error
+
+    def metrics(self) -> dict:
+        with self._lock:
+            stats = dict(self.stats)
+            stats["breakers"] = {f"{p}:{m}": b.state for (p, m), b in self._breakers.items()}
+        return stats
+
+
+_llm = None
+_llm_lock = threading.Lock()
+
+def get_llm() -> LLMRouter:
+    """Process-wide router (long-lived clients). HISSAB_LLM_PROVIDER=stub par saare stages stub par."""
+    global _llm
+    with _llm_lock:
+        if _llm is None:
+            if LLM_PROVIDER_OVERRIDE == "stub":
+                _llm = make_stub_router()
+            else:
+                _llm = LLMRouter()
+        return _llm
+
+def make_stub_router(stub: StubProvider = None, **kwargs) -> LLMRouter:
+    """Saare stages ek StubProvider par (bina API keys ke load testing)."""
+    routes = {stage: f"stub:{stage}" for stage in DEFAULT_ROUTES}
+    return LLMRouter(routes=routes, providers={"stub": stub or StubProvider()}, **kwargs)
+
+def set_llm(router: LLMRouter):
+    """Custom router inject karo (load tests / benchmarks)."""
+    global _llm
+    with _llm_lock:
+        _llm = router
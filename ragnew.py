@@ -1,68 +1,220 @@
-# ragnew.py
-
-from typing import List, Dict
-
-MAX_EXAMPLES_PER_CATEGORY = 5  # Optional: cap examples per category
-
-def sanitize_text(text: str) -> str:
-    """Sanitize risky characters like triple quotes."""
-    return text.replace('"""', '\"\"\"')
-
-def format_examples(examples_by_category: Dict[str, List[Dict[str, str]]]) -> List[str]:
-    """Format examples grouped by category with continuous numbering."""
-    lines = []
-    example_counter = 1
-
-    for category, examples in examples_by_category.items():
-        lines.append(f"\n--- EXAMPLES FROM CATEGORY: {category} ---")
-        for example in examples[:MAX_EXAMPLES_PER_CATEGORY]:
-            lines.append(f"--- EXAMPLE {example_counter} ---")
-            lines.append(f'User Text: "{example["user_text"]}"')
-            lines.append("Your Response:")
-            lines.append(example["model_response"])
-            lines.append("")  # spacing
-            example_counter += 1
-
-    return lines
-
-def get_enhanced_prompt(
-    hinglish_user_story: str,
-    primary_category: str,
-    semantic_categories: List[str],
-    examples_by_category: Dict[str, List[Dict[str, str]]]
-) -> str:
-    """
-    Formats all retrieved information into a final prompt for HissabGPT.
-    """
-    hinglish_user_story = sanitize_text(hinglish_user_story)
-
-    prompt_lines = [
-        "You are 'HissabGPT', an AI expert specializing in Indian personal and group finance calculations.",
-        "",
-        "**User's Query Analysis:**",
-        f'- User\'s Query (Hinglish): "{hinglish_user_story}"',
-        f"- Primary Identified Category: {primary_category}",
-        f"- Top 2 Semantically Similar Categories: {', '.join(semantic_categories)}",
-        "",
-        "**Critical Instructions:**",
-        "1.  Your ONLY task is to act as a calculator based on the user's query.",
-        "2.  The text may have voice-to-text errors (e.g., 'bachche' for 'bache'). You MUST interpret based on financial context and NEVER comment on the errors.",
-        "3.  Use the provided examples from the semantically similar categories to understand the required Hindi output format.",
-        "4.  Provide a clear, step-by-step summary. Bold the final result.",
-        "",
-        "**Reference Examples:**"
-    ]
-
-    if examples_by_category:
-        prompt_lines.extend(format_examples(examples_by_category))
-    else:
-        prompt_lines.append("No relevant examples found. Analyze the query based on general knowledge.")
-
-    prompt_lines.extend([
-        "--- USER'S FINAL TASK ---",
-        "Analyze the User's Query and provide the financial summary in simple Hindi.",
-        "Your Response:"
-    ])
-
-    final_prompt = "\n".join(prompt_lines)
-    return final_prompt
+# ragnew.py
+
+import os
+import re
+import math
+import hashlib
+from functools import lru_cache
+from typing import List, Dict
+from dotenv import load_dotenv
+
+from tracingnew import metrics
+
+load_dotenv()
+
+# --- Configuration ---
+MAX_EXAMPLES_PER_CATEGORY = 5  # Optional: cap examples per category
+# Retrieval itne candidates laata hai; budget aur dedup ke baad MAX_EXAMPLES_PER_CATEGORY tak bachte hain
+CANDIDATE_EXAMPLES_PER_CATEGORY = int(os.getenv("HISSAB_CANDIDATE_EXAMPLES", "8"))
+# Poore prompt (prefix + query + examples) ka estimated token budget
+PROMPT_TOKEN_BUDGET = int(os.getenv("HISSAB_PROMPT_TOKEN_BUDGET", "1800"))
+MAX_EXAMPLE_TOKENS = int(os.getenv("HISSAB_MAX_EXAMPLE_TOKENS", "400"))  # isse lamba example kabhi nahi
+DEDUP_JACCARD = float(os.getenv("HISSAB_PROMPT_DEDUP_JACCARD", "0.8"))  # user_text shingles itne same = duplicate
+
+PROMPT_TOKENS = metrics.histogram("hissab_prompt_tokens", "Estimated tokens per assembled generation prompt.",
+                                  buckets=(128, 256, 512, 768, 1024, 1536, 2048, 3072, 4096, 8192))
+PROMPT_EXAMPLES = metrics.counter("hissab_prompt_examples_total", "Candidate examples by prompt-builder decision.",
+                                  ("decision",))
+
+# Static system preamble: har query ke liye byte-for-byte same, isliye prompt ka
+# shuruaati hissa hai. Providers (Gemini implicit caching, Groq prompt caching)
+# same prefix ko cache karke dobara process nahi karte.
+STATIC_PREAMBLE = "\n".join([
+    "You are 'HissabGPT', an AI expert specializing in Indian personal and group finance calculations.",
+    "",
+    "**Critical Instructions:**",
+    "1.  Your ONLY task is to act as a calculator based on the user's query.",
+    "2.  The text may have voice-to-text errors (e.g., 'bachche' for 'bache'). You MUST interpret based on financial context and NEVER comment on the errors.",
+    "3.  Use the provided examples from the semantically similar categories to understand the required Hindi output format.",
+    "4.  Provide a clear, step-by-step summary. Bold the final result.",
+]) + "\n\n"
+PREAMBLE_VERSION = hashlib.sha256(STATIC_PREAMBLE.encode("utf-8")).hexdigest()[:12]
+
+_TOKEN_RE = re.compile(r"[A-Za-z]+|\d+|[ऀ-ॿ]+|\S")
+
+
+def count_tokens(text: str) -> int:
+    """Provider-independent token estimate (BPE jaisa): Latin words ~4 chars/token,
+    digits ~3/token, Devanagari ~2 chars/token, baaki har symbol ek token."""
+    tokens = 0
+    for piece in _TOKEN_RE.findall(text):
+        if piece[0].isascii() and piece[0].isalpha():
+            tokens += math.ceil(len(piece) / 4)
+        elif piece[0].isdigit():
+            tokens += math.ceil(len(piece) / 3)
+        elif len(piece) > 1:
+            tokens += math.ceil(len(piece) / 2)
+        else:
+            tokens += 1
+    return tokens
+
+
+# Examples aur category headers baar-baar aate hain; unka count yaad rakho
+_cached_tokens = lru_cache(maxsize=8192)(count_tokens)
+PREAMBLE_TOKENS = count_tokens(STATIC_PREAMBLE)
+
+
+class AssembledPrompt:
+    __slots__ = ("prefix", "body", "tokens", "prefix_tokens", "examples_used", "examples_dropped")
+
+    def __init__(self, prefix: str, body: str, prefix_tokens: int, body_tokens: int,
+                 examples_used: int, examples_dropped: int):
+        self.prefix = prefix
+        self.body = body
+        self.prefix_tokens = prefix_tokens
+        self.tokens = prefix_tokens + body_tokens
+        self.examples_used = examples_used
+        self.examples_dropped = examples_dropped
+
+    @property
+    def text(self) -> str:
+        return self.prefix + self.body
+
+
+def sanitize_text(text: str) -> str:
+    """Sanitize risky characters like triple quotes."""
+    return text.replace('"""', '\"\"\"')
+
+
+def _shingles(text: str) -> frozenset:
+    words = re.findall(r"\w+", text.lower())
+    return frozenset(zip(words, words[1:])) or frozenset(words)
+
+
+def _is_near_duplicate(shingles: frozenset, kept: list) -> bool:
+    for other in kept:
+        union = len(shingles | other)
+        if union and len(shingles & other) / union >= DEDUP_JACCARD:
+            return True
+    return False
+
+
+def _format_example(number: int, example: Dict[str, str]) -> str:
+    return "\n".join([
+        f"--- EXAMPLE {number} ---",
+        f'User Text: "{example["user_text"]}"',
+        "Your Response:",
+        example["model_response"],
+        "",  # spacing
+    ])
+
+
+def select_examples(examples_by_category: Dict[str, List[Dict[str, str]]], token_budget: int,
+                    primary_category: str = None) -> tuple:
+    """Rank candidates by similarity score (primary category first on ties; unscored examples
+    keep retrieval order), drop near-duplicates and pack greedily into token_budget.
+
+    Returns ({category: [examples]} in rank order, dropped_count).
+    """
+    ranked = []
+    for category, examples in examples_by_category.items():
+        for position, example in enumerate(examples):
+            ranked.append((-example.get("score", 0.0), category != primary_category, position, category, example))
+    ranked.sort(key=lambda item: item[:3])
+
+    selected, kept_shingles, per_category = {}, [], {}
+    used, dropped, number = 0, 0, 1
+    for *_, category, example in ranked:
+        if per_category.get(category, 0) >= MAX_EXAMPLES_PER_CATEGORY:
+            PROMPT_EXAMPLES.inc(("category_cap",))
+            dropped += 1
+            continue
+        shingles = _shingles(example["user_text"])
+        if _is_near_duplicate(shingles, kept_shingles):
+            PROMPT_EXAMPLES.inc(("duplicate",))
+            dropped += 1
+            continue
+        # Numbering ka farq (1 vs 12) budget mein nahi ginte; header har category ka ek baar
+        cost = _cached_tokens(_format_example(number, example))
+        if category not in selected:
+            cost += _cached_tokens(f"\n--- EXAMPLES FROM CATEGORY: {category} ---")
+        if cost > MAX_EXAMPLE_TOKENS or used + cost > token_budget:
+            PROMPT_EXAMPLES.inc(("over_budget",))
+            dropped += 1
+            continue
+        selected.setdefault(category, []).append(example)
+        kept_shingles.append(shingles)
+        per_category[category] = per_category.get(category, 0) + 1
+        used += cost
+        number += 1
+        PROMPT_EXAMPLES.inc(("used",))
+    return selected, dropped
+
+
+def format_examples(examples_by_category: Dict[str, List[Dict[str, str]]]) -> List[str]:
+    """Format examples grouped by category with continuous numbering."""
+    lines = []
+    example_counter = 1
+
+    for category, examples in examples_by_category.items():
+        lines.append(f"\n--- EXAMPLES FROM CATEGORY: {category} ---")
+        for example in examples[:MAX_EXAMPLES_PER_CATEGORY]:
+            lines.append(_format_example(example_counter, example))
+            example_counter += 1
+
+    return lines
+
+
+def build_prompt(
+    hinglish_user_story: str,
+    primary_category: str,
+    semantic_categories: List[str],
+    examples_by_category: Dict[str, List[Dict[str, str]]],
+    token_budget: int = PROMPT_TOKEN_BUDGET
+) -> AssembledPrompt:
+    """
+    Assembles the final HissabGPT prompt as STATIC_PREAMBLE (cacheable prefix) + per-query body,
+    filling whatever the budget leaves after the query section with the best examples.
+    """
+    hinglish_user_story = sanitize_text(hinglish_user_story)
+
+    query_lines = [
+        "**User's Query Analysis:**",
+        f'- User\'s Query (Hinglish): "{hinglish_user_story}"',
+        f"- Primary Identified Category: {primary_category}",
+        f"- Top 2 Semantically Similar Categories: {', '.join(semantic_categories)}",
+        "",
+        "**Reference Examples:**",
+    ]
+    tail_lines = [
+        "--- USER'S FINAL TASK ---",
+        "Analyze the User's Query and provide the financial summary in simple Hindi.",
+        "Your Response:",
+    ]
+    fixed_tokens = PREAMBLE_TOKENS + count_tokens("\n".join(query_lines + tail_lines))
+
+    selected, dropped = select_examples(examples_by_category, max(0, token_budget - fixed_tokens), primary_category)
+    body_lines = list(query_lines)
+    if selected:
+        body_lines.extend(format_examples(selected))
+    else:
+        body_lines.append("No relevant examples found. Analyze the query based on general knowledge.")
+    body_lines.extend(tail_lines)
+
+    body = "\n".join(body_lines)
+    prompt = AssembledPrompt(STATIC_PREAMBLE, body, PREAMBLE_TOKENS, count_tokens(body),
+                             sum(len(v) for v in selected.values()), dropped)
+    PROMPT_TOKENS.observe(prompt.tokens)
+    return prompt
+
+
+def get_enhanced_prompt(
+    hinglish_user_story: str,
+    primary_category: str,
+    semantic_categories: List[str],
+    examples_by_category: Dict[str, List[Dict[str, str]]]
+) -> str:
+    """
+    Formats all retrieved information into a final prompt for HissabGPT.
+    """
+    return build_prompt(hinglish_user_story, primary_category, semantic_categories, examples_by_category).text
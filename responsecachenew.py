@@ -0,0 +1,168 @@
+# responsecachenew.py - Semantic answer cache in front of the Gemini calculation step
+#
+# Lagbhag ek jaise hisaab sawaalon ka jawab dobara Gemini se nahi banwana padta.
+# Cache key = query embedding + query mein aaye numbers: embedding bahut
+# similar ho AUR numbers bilkul same hon, usi order mein, tabhi purana jawab reuse hota
+# hai ("1000 mein se 300" aur "1000 mein se 400", ya "2000 diye, 500 lautaye" aur
+# "500 diye, 2000 lautaye" kabhi match nahi hote).
+# Pehle 👍-approved examples (hissab_db) dekhe jaate hain, phir recent Gemini jawab.
+# 👎 mile jawab Bad DB (durable) se block list mein aate hain, isliye restart ke baad
+# aur doosre processes (batch, aur workers) mein bhi dobara serve nahi hote.
+import os
+import time
+import hashlib
+import threading
+import numpy as np
+from dotenv import load_dotenv
+
+from cachenew import LRUCache
+from annnew import normalize_rows
+from calculatornew import tokenize, parse_amounts
+
+load_dotenv()
+
+# --- Configuration ---
+RESPONSE_CACHE_SIZE = int(os.getenv("HISSAB_RESPONSE_CACHE_SIZE", "1024"))
+RESPONSE_CACHE_TTL_SECONDS = float(os.getenv("HISSAB_RESPONSE_CACHE_TTL", str(24 * 3600)))
+RESPONSE_CACHE_MIN_SIMILARITY = float(os.getenv("HISSAB_RESPONSE_CACHE_MIN_SIMILARITY", "0.97"))
+BLOCKLIST_REFRESH_SECONDS = float(os.getenv("HISSAB_BLOCKLIST_REFRESH", "5"))  # doosre processes ke 👎 itni der mein
+
+
+def extract_numbers(text: str) -> tuple:
+    """Query ke saare amounts (calculator ke parser se: "2 lakh", "do hazaar", "20%"), text ke order mein (cache key ka hissa).
+
+    Order rakha jaata hai kyunki har amount ka role (udhaar/wapas, balance/kharch) usi se
+    tay hota hai. Percent wale amounts "%" ke saath string hote hain, taaki "20%" aur "20" alag key banein.
+    """
+    numbers = []
+    for amount in parse_amounts(tokenize(text)):
+        value = int(amount.value) if float(amount.value).is_integer() else round(amount.value, 4)
+        numbers.append(f"{value}%" if amount.percent else value)
+    return tuple(numbers)
+
+
+def _response_hash(response: str) -> str:
+    return hashlib.sha256(" ".join((response or "").split()).encode("utf-8")).hexdigest()
+
+
+class SemanticResponseCache:
+    """Near-duplicate queries ke liye model_response cache (LRU + TTL + bad-feedback invalidation)."""
+
+    def __init__(self, max_size: int = RESPONSE_CACHE_SIZE, ttl_seconds: float = RESPONSE_CACHE_TTL_SECONDS,
+                 min_similarity: float = RESPONSE_CACHE_MIN_SIMILARITY):
+        self.min_similarity = min_similarity
+        self._entries = LRUCache(max_size, ttl_seconds)
+        self._blocked = set()  # 👎 mile hue responses ke hashes; inhe kabhi serve nahi karna
+        self._lock = threading.Lock()
+        self._generation_seconds = None  # Gemini generation time ka moving average
+        self._blocked_source = None       # fetch_since(last_id) -> [(id, response)], dekhein set_blocked_source
+        self._blocked_last_id = 0
+        self._blocked_synced = 0.0
+        self.counters = {"approved_hits": 0, "cache_hits": 0, "misses": 0, "invalidations": 0,
+                         "latency_saved_seconds": 0.0}
+
+    def lookup(self, query_embedding, numbers: tuple, approved_lookup=None):
+        """(response, source) ya None. source = "approved" (hissab_db) ya "cache"."""
+        started = time.perf_counter()
+        self._sync_blocked()
+        query = normalize_rows(np.asarray(query_embedding, dtype=np.float32))
+        result = None
+        if approved_lookup is not None:
+            for response, score in approved_lookup(query, numbers):
+                if score >= self.min_similarity and _response_hash(response) not in self._blocked:
+                    result = (response, "approved")
+                    break
+        if result is None:
+            result = self._lookup_recent(query, numbers)
+        with self._lock:
+            if result is None:
+                self.counters["misses"] += 1
+            else:
+                self.counters["approved_hits" if result[1] == "approved" else "cache_hits"] += 1
+                if self._generation_seconds is not None:
+                    saved = self._generation_seconds - (time.perf_counter() - started)
+                    self.counters["latency_saved_seconds"] += max(0.0, saved)
+        return result
+
+    def _lookup_recent(self, query, numbers: tuple):
+        candidates = [entry for _, entry in self._entries.items() if entry["numbers"] == numbers]
+        if not candidates:
+            return None
+        scores = np.vstack([entry["embedding"] for entry in candidates]) @ query
+        best = int(np.argmax(scores))
+        if scores[best] < self.min_similarity:
+            return None
+        entry = candidates[best]
+        self._entries.get(entry["key"])  # LRU order update
+        return entry["response"], "cache"
+
+    def store(self, query_text: str, query_embedding, numbers: tuple, response: str):
+        if not response or _response_hash(response) in self._blocked:
+            return
+        key = hashlib.sha256(f"{' '.join(query_text.split())}|{numbers}".encode("utf-8")).hexdigest()
+        self._entries.put(key, {"key": key, "numbers": numbers, "response": response,
+                                "embedding": normalize_rows(np.asarray(query_embedding, dtype=np.float32))})
+
+    def observe_generation(self, seconds: float):
+        """Har asli Gemini generation ka time; 'latency saved' isi average se nikalta hai."""
+        with self._lock:
+            if self._generation_seconds is None:
+                self._generation_seconds = seconds
+            else:
+                self._generation_seconds = 0.9 * self._generation_seconds + 0.1 * seconds
+
+    def set_blocked_source(self, fetch_since):
+        """Durable 👎 source jodo (Bad DB): abhi saare purane 👎 jawab block, phir naye throttled sync se."""
+        self._blocked_source = fetch_since
+        self._sync_blocked(force=True)
+
+    def _sync_blocked(self, force: bool = False):
+        if self._blocked_source is None:
+            return
+        now = time.monotonic()
+        with self._lock:
+            if not force and now - self._blocked_synced < BLOCKLIST_REFRESH_SECONDS:
+                return
+            self._blocked_synced = now
+            last_id = self._blocked_last_id
+        try:
+            rows = self._blocked_source(last_id)
+        except Exception as e:  # DB busy ho to purani list se kaam chalao, agli baar phir
+            print(f"Bad DB se block list sync nahi hui: {e}")
+            return
+        for row_id, response in rows:
+            if response:
+                self.invalidate(response)
+            with self._lock:
+                self._blocked_last_id = max(self._blocked_last_id, row_id)
+
+    def invalidate(self, response: str):
+        """👎 mila jawab cache se hatao aur aage kabhi serve mat karo (approved DB se bhi nahi)."""
+        response_hash = _response_hash(response)
+        with self._lock:
+            self._blocked.add(response_hash)
+        removed = 0
+        for key, entry in self._entries.items():
+            if _response_hash(entry["response"]) == response_hash:
+                self._entries.pop(key)
+                removed += 1
+        with self._lock:
+            self.counters["invalidations"] += removed
+
+    def is_blocked(self, response: str) -> bool:
+        """Kya is jawab par 👎 mil chuka hai (calculator ke jawab bhi isi se check hote hain)."""
+        self._sync_blocked()
+        with self._lock:
+            return _response_hash(response) in self._blocked
+
+    def metrics(self) -> dict:
+        with self._lock:
+            counters = dict(self.counters)
+        lookups = counters["approved_hits"] + counters["cache_hits"] + counters["misses"]
+        counters["hit_ratio"] = (counters["approved_hits"] + counters["cache_hits"]) / lookups if lookups else 0.0
+        counters["size"] = len(self._entries)
+        counters["evictions"] = self._entries.evictions
+        return counters
+
+
+response_cache = SemanticResponseCache()
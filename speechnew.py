@@ -0,0 +1,252 @@
+# speechnew.py - Voice input: in-memory decoding, VAD chunking aur pluggable recognizer
+#
+# Mic ke bytes kabhi disk par nahi jaate: WAV seedha memory mein padha jaata hai,
+# baaki formats (webm/ogg/mp3) ffmpeg ke stdin -> stdout pipe se 16 kHz mono PCM
+# bante hain. Phir energy-based voice activity detection awaaz ko bolne ke
+# tukdon mein baant-ta hai; har tukda alag se (saath-saath) recognize hota hai,
+# isliye lambi recording ka pehla hissa jaldi screen par aa jaata hai.
+# Recognizer backend: "google" (default), "vosk" (offline) ya "fake" (tests).
+import os
+import io
+import json
+import wave
+import threading
+import subprocess
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# --- Configuration ---
+SAMPLE_RATE = 16000
+RECOGNIZER_BACKEND = os.getenv("HISSAB_RECOGNIZER", "google")
+RECOGNIZER_LANGUAGE = os.getenv("HISSAB_RECOGNIZER_LANGUAGE", "hi-IN")
+VOSK_MODEL_PATH = os.getenv("HISSAB_VOSK_MODEL", "vosk-model-small-hi")
+RECOGNIZER_WORKERS = 4
+
+
+# --- Decoding (sab memory mein) ---
+def _resample(samples: np.ndarray, from_rate: int, to_rate: int) -> np.ndarray:
+    if from_rate == to_rate or not len(samples):
+        return samples
+    duration = len(samples) / from_rate
+    target = np.linspace(0, duration, int(round(duration * to_rate)), endpoint=False)
+    return np.interp(target, np.arange(len(samples)) / from_rate, samples)
+
+
+def _decode_wav(audio_bytes: bytes, sample_rate: int):
+    try:
+        with wave.open(io.BytesIO(audio_bytes)) as wav:
+            if wav.getsampwidth() != 2:
+                return None  # 8/24/32-bit WAV ffmpeg sambhal lega
+            channels, rate = wav.getnchannels(), wav.getframerate()
+            frames = wav.readframes(wav.getnframes())
+    except (wave.Error, EOFError):
+        return None  # float/extensible WAV, RIFF par WAVE nahi, ya kata hua header: ffmpeg try karega
+    frames = frames[:len(frames) - len(frames) % (2 * channels)]  # beech mein kati recording ka adhura frame
+    samples = np.frombuffer(frames, dtype="<i2").astype(np.float32)
+    if channels > 1:
+        samples = samples.reshape(-1, channels).mean(axis=1)
+    samples = _resample(samples, rate, sample_rate)
+    return np.clip(np.round(samples), -32768, 32767).astype("<i2").tobytes()
+
+
+def _decode_ffmpeg(audio_bytes: bytes, sample_rate: int) -> bytes:
+    result = subprocess.run(
+        ["ffmpeg", "-hide_banner", "-loglevel", "error", "-i", "pipe:0",
+         "-f", "s16le", "-acodec", "pcm_s16le", "-ac", "1", "-ar", str(sample_rate), "pipe:1"],
+        input=audio_bytes, capture_output=True, check=False)
+    if result.returncode != 0:
+        raise ValueError(f"Audio decode nahi hua: {result.stderr.decode('utf-8', 'replace').strip()}")
+    return result.stdout
+
+
+def decode_to_pcm(audio_bytes: bytes, sample_rate: int = SAMPLE_RATE) -> bytes:
+    """Kisi bhi recorded format ko 16-bit mono PCM (little-endian) mein badlo, bina temp file ke."""
+    if audio_bytes[:4] == b"RIFF":
+        pcm = _decode_wav(audio_bytes, sample_rate)
+        if pcm is not None:
+            return pcm
+    return _decode_ffmpeg(audio_bytes, sample_rate)
+
+
+# --- Voice activity detection ---
+class VoiceActivitySegmenter:
+    """PCM ko incremental taur par bolne ke tukdon mein baanto.
+
+    Har frame ka RMS ek adaptive noise floor se compare hota hai. min_silence_ms ki
+    chuppi par tukda band ho jaata hai (max_segment_seconds par zabardasti). feed()
+    live stream ke saath bhi chal sakta hai: jo tukde poore ho gaye woh turant milte hain.
+    """
+
+    def __init__(self, sample_rate: int = SAMPLE_RATE, frame_ms: int = 30, min_silence_ms: int = 400,
+                 min_speech_ms: int = 250, padding_ms: int = 150, max_segment_seconds: float = 15.0,
+                 threshold_ratio: float = 3.0, min_rms: float = 200.0):
+        self.frame_bytes = int(sample_rate * frame_ms / 1000) * 2
+        self.min_silence_frames = max(1, min_silence_ms // frame_ms)
+        self.min_speech_frames = max(1, min_speech_ms // frame_ms)
+        self.padding_frames = max(0, padding_ms // frame_ms)
+        self.max_frames = int(max_segment_seconds * 1000 / frame_ms)
+        self.threshold_ratio = threshold_ratio
+        self.min_rms = min_rms
+        self._pending = b""
+        self._noise_floor = None
+        self._preroll = deque(maxlen=self.padding_frames or 1)
+        self._segment = None
+        self._speech_frames = 0
+        self._silence_run = 0
+
+    def _is_speech(self, frame: bytes) -> bool:
+        samples = np.frombuffer(frame, dtype="<i2").astype(np.float32)
+        rms = float(np.sqrt(np.mean(samples * samples)))
+        if self._noise_floor is None or rms < self._noise_floor:
+            self._noise_floor = rms
+        speech = rms > max(self.min_rms, self._noise_floor * self.threshold_ratio)
+        if not speech:
+            self._noise_floor = 0.95 * self._noise_floor + 0.05 * rms
+        return speech
+
+    def _close(self) -> list:
+        segment, speech_frames = self._segment, self._speech_frames
+        self._segment, self._speech_frames, self._silence_run = None, 0, 0
+        self._preroll.clear()
+        if speech_frames < self.min_speech_frames:
+            return []
+        trailing = max(0, len(segment) - (self._last_speech_index + 1) - self.padding_frames)
+        return [b"".join(segment[:len(segment) - trailing])]
+
+    def feed(self, pcm: bytes) -> list:
+        """Naye PCM bytes do; jo tukde ab poore ho gaye unki list lautao."""
+        data = self._pending + pcm
+        usable = len(data) - len(data) % self.frame_bytes
+        self._pending = data[usable:]
+        finished = []
+        for offset in range(0, usable, self.frame_bytes):
+            frame = data[offset:offset + self.frame_bytes]
+            speech = self._is_speech(frame)
+            if self._segment is None:
+                if speech:
+                    self._segment = list(self._preroll) + [frame]
+                    self._last_speech_index = len(self._segment) - 1
+                    self._speech_frames, self._silence_run = 1, 0
+                elif self.padding_frames:
+                    self._preroll.append(frame)
+                continue
+            self._segment.append(frame)
+            if speech:
+                self._speech_frames += 1
+                self._silence_run = 0
+                self._last_speech_index = len(self._segment) - 1
+            else:
+                self._silence_run += 1
+            if self._silence_run >= self.min_silence_frames or len(self._segment) >= self.max_frames:
+                finished.extend(self._close())
+        return finished
+
+    def flush(self) -> list:
+        """Stream khatam: adhoora tukda bhi lautao."""
+        return self._close() if self._segment is not None else []
+
+
+def split_speech(pcm: bytes, sample_rate: int = SAMPLE_RATE) -> list:
+    """Poori recording ke tukde. Kuch detect na ho (bahut dheemi awaaz) to poori clip ek tukda."""
+    segmenter = VoiceActivitySegmenter(sample_rate)
+    segments = segmenter.feed(pcm) + segmenter.flush()
+    return segments or ([pcm] if pcm else [])
+
+
+# --- Recognizer backends ---
+class SpeechRecognizer:
+    """Backend interface: ek PCM tukda -> text ("" agar kuch samajh na aaye)."""
+    name = "base"
+
+    def recognize(self, pcm: bytes, sample_rate: int = SAMPLE_RATE) -> str:
+        raise NotImplementedError
+
+
+class GoogleRecognizer(SpeechRecognizer):
+    name = "google"
+
+    def __init__(self, language: str = RECOGNIZER_LANGUAGE):
+        import speech_recognition as sr
+        self.sr = sr
+        self.language = language
+        self._recognizer = sr.Recognizer()
+
+    def recognize(self, pcm, sample_rate=SAMPLE_RATE):
+        audio = self.sr.AudioData(pcm, sample_rate, 2)  # seedha memory se, koi AudioFile nahi
+        try:
+            return self._recognizer.recognize_google(audio, language=self.language)
+        except self.sr.UnknownValueError:
+            return ""
+
+
+class VoskRecognizer(SpeechRecognizer):
+    """Offline recognizer (air-gapped deployments). `pip install vosk` + HISSAB_VOSK_MODEL chahiye."""
+    name = "vosk"
+
+    def __init__(self, model_path: str = VOSK_MODEL_PATH):
+        from vosk import Model
+        self._model = Model(model_path)
+
+    def recognize(self, pcm, sample_rate=SAMPLE_RATE):
+        from vosk import KaldiRecognizer
+        recognizer = KaldiRecognizer(self._model, sample_rate)
+        recognizer.AcceptWaveform(pcm)
+        return json.loads(recognizer.FinalResult()).get("text", "")
+
+
+class FakeRecognizer(SpeechRecognizer):
+    """Tests ke liye: diye gaye transcripts kram se lautata hai, warna tukde ki lambai."""
+    name = "fake"
+
+    def __init__(self, transcripts: list = None):
+        self._transcripts = deque(transcripts or [])
+        self._lock = threading.Lock()
+        self.calls = 0
+
+    def recognize(self, pcm, sample_rate=SAMPLE_RATE):
+        with self._lock:
+            self.calls += 1
+            if self._transcripts:
+                return self._transcripts.popleft()
+        return f"[{len(pcm) / (2 * sample_rate):.1f}s]"
+
+
+_RECOGNIZER_FACTORIES = {"google": GoogleRecognizer, "vosk": VoskRecognizer, "fake": FakeRecognizer}
+_recognizer = None
+_recognizer_lock = threading.Lock()
+
+def get_recognizer() -> SpeechRecognizer:
+    """Process-wide recognizer (HISSAB_RECOGNIZER se chuna gaya)."""
+    global _recognizer
+    with _recognizer_lock:
+        if _recognizer is None:
+            _recognizer = _RECOGNIZER_FACTORIES[RECOGNIZER_BACKEND]()
+        return _recognizer
+
+def set_recognizer(recognizer: SpeechRecognizer):
+    global _recognizer
+    with _recognizer_lock:
+        _recognizer = recognizer
+
+
+_executor = ThreadPoolExecutor(max_workers=RECOGNIZER_WORKERS, thread_name_prefix="speech")
+
+def transcribe(audio_bytes: bytes, recognizer: SpeechRecognizer = None, on_partial=None) -> str:
+    """Recording -> text. Tukde saath-saath recognize hote hain; jaise hi shuru se lagataar
+    tukde taiyaar hon, on_partial(ab_tak_ka_text) caller ke thread par bulaya jaata hai
+    (Streamlit widgets update karne ke liye safe)."""
+    recognizer = recognizer or get_recognizer()
+    pcm = decode_to_pcm(audio_bytes)
+    futures = [_executor.submit(recognizer.recognize, segment, SAMPLE_RATE) for segment in split_speech(pcm)]
+    texts = []
+    for future in futures:  # kram mein: aage ke tukde peeche wale ke saath hi chal rahe hote hain
+        text = future.result().strip()
+        if text:
+            texts.append(text)
+            if on_partial is not None and len(futures) > 1:
+                on_partial(" ".join(texts))
+    return " ".join(texts)
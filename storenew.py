@@ -0,0 +1,625 @@
+# storenew.py - Append-only storage engine for the Good/Bad prompt DBs
+#
+# Rows live in a SQLite database (WAL mode, so multiple Streamlit processes can
+# read while one writes) and embeddings live in contiguous float32 files, one
+# shard per category (emb_row = row inside that category's file). Each shard has
+# its own generation, so one category can be loaded, compacted or rebuilt without
+# touching the others. Writes are buffered and flushed in batches; every flush is
+# a single transaction, so a crash can never leave a half-written DB.
+import os
+import re
+import json
+import hashlib
+import time
+import atexit
+import sqlite3
+import threading
+import numpy as np
+import pandas as pd
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# --- Configuration ---
+STORE_DB_PATH = os.getenv("HISSAB_STORE_DB", "hissab_store.db")
+EMBEDDINGS_PREFIX = os.getenv("HISSAB_EMBEDDINGS_PREFIX", "hissab_embeddings")
+FLUSH_BATCH_SIZE = int(os.getenv("HISSAB_FLUSH_BATCH_SIZE", "16"))
+FLUSH_INTERVAL_SECONDS = float(os.getenv("HISSAB_FLUSH_INTERVAL", "1.0"))
+COMPACT_CHECK_EVERY = 50       # flushes ke baad ek baar compaction check
+COMPACT_DEAD_RATIO = 0.25      # kisi shard mein itne % rows deleted hon to us shard ki compaction
+_COPY_CHUNK_ROWS = 65536
+
+_GOOD_TABLE = """
+CREATE TABLE IF NOT EXISTS {name} (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    category TEXT NOT NULL,
+    user_text TEXT NOT NULL,
+    model_response TEXT NOT NULL,
+    emb_row INTEGER NOT NULL,
+    deleted INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    use_count INTEGER NOT NULL DEFAULT 1,
+    last_used_at REAL,
+    UNIQUE (category, emb_row)
+)"""
+_GOOD_INDEX = "CREATE INDEX IF NOT EXISTS idx_good_category_rows ON good_prompts(category, deleted, emb_row)"
+
+_SCHEMA = _GOOD_TABLE.format(name="good_prompts") + """;
+DROP INDEX IF EXISTS idx_good_category;
+""" + _GOOD_INDEX + """;
+CREATE TABLE IF NOT EXISTS bad_prompts (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    log_data TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    use_count INTEGER NOT NULL DEFAULT 1
+);
+CREATE TABLE IF NOT EXISTS shard_sums (
+    category TEXT PRIMARY KEY,
+    vector_sum BLOB NOT NULL,
+    rows INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+_SHARD_NAME_RE = re.compile(r"^[a-z0-9_]{1,48}$")
+
+
+def shard_name(category: str) -> str:
+    """Category ka file-safe naam (embedding/ANN shard files ke liye)."""
+    if _SHARD_NAME_RE.match(category):
+        return category
+    return "c" + hashlib.sha1(category.encode("utf-8")).hexdigest()[:16]
+
+
+def _normalized_sum(vectors: np.ndarray) -> np.ndarray:
+    """Rows ko unit length par la kar unka float64 sum (classifier centroids isi se bante hain)."""
+    vectors = np.asarray(vectors, dtype=np.float64)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return (vectors / np.where(norms == 0, 1.0, norms)).sum(axis=0)
+
+
+def _copy_rows(out, source: np.ndarray, rows) -> np.ndarray:
+    """source (memmap) ki diye gaye rows ko chunks mein `out` file mein likho; unka normalized sum lautao."""
+    vector_sum = np.zeros(source.shape[1], dtype=np.float64)
+    for start in range(0, len(rows), _COPY_CHUNK_ROWS):
+        chunk = np.ascontiguousarray(source[rows[start:start + _COPY_CHUNK_ROWS]])
+        out.write(chunk.tobytes())
+        vector_sum += _normalized_sum(chunk)
+    return vector_sum
+
+
+def _chunked_sum(source: np.ndarray, rows) -> np.ndarray:
+    vector_sum = np.zeros(source.shape[1], dtype=np.float64)
+    for start in range(0, len(rows), _COPY_CHUNK_ROWS):
+        vector_sum += _normalized_sum(source[rows[start:start + _COPY_CHUNK_ROWS]])
+    return vector_sum
+
+
+class ExampleStore:
+    """Append-only store for good examples (rows + per-category embedding shards) and bad-prompt logs."""
+
+    def __init__(self, db_path: str = STORE_DB_PATH, embeddings_prefix: str = EMBEDDINGS_PREFIX,
+                 flush_batch_size: int = FLUSH_BATCH_SIZE, flush_interval: float = FLUSH_INTERVAL_SECONDS):
+        self.db_path = db_path
+        self.embeddings_prefix = embeddings_prefix
+        self.flush_batch_size = max(1, flush_batch_size)
+        self.flush_interval = flush_interval
+        self._lock = threading.RLock()
+        self._pending_good = []
+        self._pending_bad = []
+        self._flush_timer = None
+        self._flush_count = 0
+        self._listeners = []
+        self._conn = sqlite3.connect(db_path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=FULL")
+        self._conn.executescript(_SCHEMA)
+        self._migrate_layout()
+        self._cleanup_orphan_files()
+        atexit.register(self.close)
+
+    # --- Meta helpers ---
+    def _get_meta(self, key: str, default=None):
+        row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def _set_meta(self, key: str, value):
+        self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, str(value)))
+
+    def shard_generation(self, category: str) -> int:
+        """Shard ki compaction ke baad badhta hai; readers isse stale embeddings detect karte hain."""
+        return int(self._get_meta(f"generation:{category}", 0))
+
+    def shard_generations(self) -> dict:
+        """category -> generation, sirf un shards ke liye jinki kabhi compaction hui (baaki 0)."""
+        return {key[len("generation:"):]: int(value) for key, value in self._conn.execute(
+            "SELECT key, value FROM meta WHERE key LIKE 'generation:%'")}
+
+    @property
+    def dim(self):
+        value = self._get_meta("dim")
+        return int(value) if value is not None else None
+
+    def embeddings_path(self, category: str, generation: int = None) -> str:
+        generation = self.shard_generation(category) if generation is None else generation
+        return f"{self.embeddings_prefix}.{shard_name(category)}.{generation}.f32"
+
+    def _migrate_layout(self):
+        """Purana layout (ek global embeddings file, bina use_count) ko category shards mein badlo."""
+        if "use_count" not in {r[1] for r in self._conn.execute("PRAGMA table_info(bad_prompts)")}:
+            self._conn.execute("ALTER TABLE bad_prompts ADD COLUMN use_count INTEGER NOT NULL DEFAULT 1")
+        if "use_count" in {r[1] for r in self._conn.execute("PRAGMA table_info(good_prompts)")}:
+            return
+        self._conn.execute("BEGIN IMMEDIATE")
+        old_path = f"{self.embeddings_prefix}.{int(self._get_meta('generation', 0))}.f32"
+        new_paths = []
+        try:
+            dim = self.dim
+            live = self._conn.execute(
+                "SELECT id, category, user_text, model_response, emb_row, created_at FROM good_prompts "
+                "WHERE deleted = 0 ORDER BY category, emb_row").fetchall()
+            old = np.memmap(old_path, dtype=np.float32, mode="r").reshape(-1, dim) \
+                if live and dim and os.path.exists(old_path) else None
+            self._conn.execute(_GOOD_TABLE.format(name="good_prompts_sharded"))
+            by_category = {}
+            for row in live:
+                by_category.setdefault(row[1], []).append(row)
+            for category, rows in by_category.items():
+                path = self.embeddings_path(category, 0)
+                new_paths.append(path)
+                with open(path, "wb") as out:
+                    if old is not None:
+                        _copy_rows(out, old, np.fromiter((r[4] for r in rows), dtype=np.int64, count=len(rows)))
+                    out.flush()
+                    os.fsync(out.fileno())
+                self._conn.executemany(
+                    "INSERT INTO good_prompts_sharded (id, category, user_text, model_response, emb_row, created_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)", [(r[0], r[1], r[2], r[3], i, r[5]) for i, r in enumerate(rows)])
+            del old
+            self._conn.execute("DROP TABLE good_prompts")
+            self._conn.execute("ALTER TABLE good_prompts_sharded RENAME TO good_prompts")
+            self._conn.execute(_GOOD_INDEX)
+            self._conn.execute("DELETE FROM meta WHERE key = 'generation'")
+            self._conn.execute("COMMIT")
+        except Exception:
+            self._conn.execute("ROLLBACK")
+            for path in new_paths:
+                if os.path.exists(path):
+                    os.remove(path)
+            raise
+        if os.path.exists(old_path):
+            os.remove(old_path)
+        print(f"Store ko category shards mein badla gaya: {len(live)} examples, {len(by_category)} shards.")
+
+    def _cleanup_orphan_files(self):
+        """Compaction se pehle ki purani shard embedding files hatao."""
+        directory = os.path.dirname(os.path.abspath(self.embeddings_prefix))
+        base = os.path.basename(self.embeddings_prefix) + "."
+        current = {shard_name(c): g for c, g in self.shard_generations().items()}
+        for name in os.listdir(directory):
+            if not (name.startswith(base) and name.endswith(".f32")):
+                continue
+            shard, _, generation = name[len(base):-len(".f32")].rpartition(".")
+            # Sirf purani generations; current + 1 kisi chalti compaction ki ho sakti hai
+            if generation.isdigit() and int(generation) < current.get(shard, 0):
+                try:
+                    os.remove(os.path.join(directory, name))
+                except OSError:
+                    pass
+
+    # --- Writes ---
+    def append_good(self, category: str, user_text: str, model_response: str, embedding):
+        with self._lock:
+            self._pending_good.append((category, user_text, model_response, np.asarray(embedding, dtype=np.float32)))
+            self._schedule_flush()
+
+    def append_bad(self, log_data: dict):
+        with self._lock:
+            self._pending_bad.append(json.dumps(log_data, ensure_ascii=False, default=str))
+            self._schedule_flush()
+
+    def _schedule_flush(self):
+        if len(self._pending_good) + len(self._pending_bad) >= self.flush_batch_size:
+            self.flush()
+        elif self._flush_timer is None:
+            self._flush_timer = threading.Timer(self.flush_interval, self.flush)
+            self._flush_timer.daemon = True
+            self._flush_timer.start()
+
+    def flush(self):
+        """Buffered rows ko ek hi transaction mein disk par likho."""
+        with self._lock:
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+            good, bad = self._pending_good, self._pending_bad
+            if not good and not bad:
+                return
+            self._pending_good, self._pending_bad = [], []
+            inserted = []
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                if good:
+                    inserted = self._write_good_batch(good)
+                if bad:
+                    now = time.time()
+                    self._conn.executemany("INSERT INTO bad_prompts (log_data, created_at) VALUES (?, ?)",
+                                           [(log, now) for log in bad])
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                # Data kho na jaaye, agli flush mein dobara koshish hogi
+                self._pending_good = good + self._pending_good
+                self._pending_bad = bad + self._pending_bad
+                raise
+            self._flush_count += 1
+            if inserted:
+                for listener in self._listeners:
+                    listener(inserted)
+            if self._flush_count % COMPACT_CHECK_EVERY == 0:
+                self.maybe_compact()
+
+    def add_flush_listener(self, callback):
+        """callback([(id, category, emb_row), ...]) har committed good batch ke baad chalta hai."""
+        self._listeners.append(callback)
+
+    def _write_good_batch(self, batch):
+        matrix = np.vstack([item[3] for item in batch]).astype(np.float32)
+        dim = self.dim
+        if dim is None:
+            dim = matrix.shape[1]
+            self._set_meta("dim", dim)
+        if matrix.shape[1] != dim:
+            raise ValueError(f"Embedding dimension {matrix.shape[1]} store ke dimension {dim} se match nahi karta.")
+        last_id = self.max_good_id()
+        by_category = {}
+        for position, item in enumerate(batch):
+            by_category.setdefault(item[0], []).append(position)
+        row_bytes = dim * 4
+        now = time.time()
+        values = []
+        for category, positions in by_category.items():
+            next_row = self.committed_rows(category)
+            path = self.embeddings_path(category)
+            # Embeddings pehle likho aur fsync karo; rows baad mein commit hoti hain.
+            # Crash hone par commit se aage ka tail agli flush mein truncate ho jaata hai.
+            with open(path, "r+b" if os.path.exists(path) else "w+b") as f:
+                f.truncate(next_row * row_bytes)
+                f.seek(next_row * row_bytes)
+                f.write(matrix[positions].tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+            values.extend((category, batch[p][1], batch[p][2], next_row + i, now) for i, p in enumerate(positions))
+            self._add_shard_sum(category, matrix[positions], next_row)
+        self._conn.executemany(
+            "INSERT INTO good_prompts (category, user_text, model_response, emb_row, created_at) VALUES (?, ?, ?, ?, ?)",
+            values
+        )
+        return self._conn.execute(
+            "SELECT id, category, emb_row FROM good_prompts WHERE id > ? ORDER BY id", (last_id,)).fetchall()
+
+    def delete_good(self, ids):
+        """Rows ko tombstone karo; asli jagah compaction mein khaali hoti hai."""
+        with self._lock:
+            self.flush()
+            self._conn.executemany("UPDATE good_prompts SET deleted = 1 WHERE id = ?", [(int(i),) for i in ids])
+
+    # --- Usage counters / duplicate collapse ---
+    def record_use(self, category: str, emb_row: int, generation: int) -> bool:
+        """Near-duplicate 👍 par nayi row ki jagah maujooda row ka use_count badhao.
+
+        generation woh hai jisme caller ne emb_row dekha tha; beech mein shard compact ho
+        gaya ho to False (caller tab normal append kare).
+        """
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                updated = 0
+                if self.shard_generation(category) == generation:
+                    updated = self._conn.execute(
+                        "UPDATE good_prompts SET use_count = use_count + 1, last_used_at = ? "
+                        "WHERE category = ? AND emb_row = ? AND deleted = 0",
+                        (time.time(), category, int(emb_row))).rowcount
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return updated == 1
+
+    def merge_good(self, keep_id: int, duplicate_ids) -> int:
+        """Duplicates ke use_count keep_id row mein jodo aur unhe tombstone karo."""
+        return self._merge("good_prompts", keep_id, duplicate_ids,
+                           "UPDATE good_prompts SET deleted = 1 WHERE id = ? AND deleted = 0")
+
+    def merge_bad(self, keep_id: int, duplicate_ids) -> int:
+        """Bad logs ke liye wahi; inki embeddings nahi hoti, isliye rows seedhe delete."""
+        return self._merge("bad_prompts", keep_id, duplicate_ids, "DELETE FROM bad_prompts WHERE id = ?")
+
+    def _merge(self, table: str, keep_id: int, duplicate_ids, remove_sql: str) -> int:
+        duplicate_ids = [int(i) for i in duplicate_ids if int(i) != int(keep_id)]
+        if not duplicate_ids:
+            return 0
+        with self._lock:
+            self.flush()
+            placeholders = ",".join("?" * len(duplicate_ids))
+            live = " AND deleted = 0" if table == "good_prompts" else ""
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                extra = self._conn.execute(f"SELECT COALESCE(SUM(use_count), 0) FROM {table} "
+                                           f"WHERE id IN ({placeholders}){live}", duplicate_ids).fetchone()[0]
+                self._conn.execute(f"UPDATE {table} SET use_count = use_count + ? WHERE id = ?", (extra, int(keep_id)))
+                removed = sum(self._conn.execute(remove_sql, (i,)).rowcount for i in duplicate_ids)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return removed
+
+    # --- Per-shard embedding sums ---
+    # Har shard ke saare emb_rows (tombstones samet) ke normalized embeddings ka sum, rows ke
+    # saath usi transaction mein update hota hai aur compaction par live rows se dobara banta
+    # hai. Classifier centroids isse bante hain, shards memory mein load kiye bina.
+    def _add_shard_sum(self, category: str, vectors: np.ndarray, first_row: int):
+        row = self._conn.execute("SELECT vector_sum, rows FROM shard_sums WHERE category = ?", (category,)).fetchone()
+        if row is None and first_row != 0:
+            return  # purana store: pehli baar padhne par poora sum ban jaayega
+        if row is not None and row[1] != first_row:
+            self._conn.execute("DELETE FROM shard_sums WHERE category = ?", (category,))
+            return
+        vector_sum = _normalized_sum(vectors)
+        if row is not None:
+            vector_sum += np.frombuffer(row[0], dtype=np.float64)
+        self._conn.execute("INSERT OR REPLACE INTO shard_sums (category, vector_sum, rows) VALUES (?, ?, ?)",
+                           (category, vector_sum.tobytes(), first_row + len(vectors)))
+
+    def shard_vector_sums(self) -> dict:
+        """category -> (live rows ke normalized embeddings ka float64 sum, live count).
+
+        Stored sum mein se sirf tombstoned rows (compaction tak thodi hi) memmap se ghatayi
+        jaati hain; jis shard ka sum na ho (purana store) uska ek baar chunks mein ban jaata hai.
+        """
+        with self._lock:
+            self.flush()
+            dim = self.dim
+            if dim is None:
+                return {}
+            result = {}
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                stored = {category: (blob, rows) for category, blob, rows in self._conn.execute(
+                    "SELECT category, vector_sum, rows FROM shard_sums")}
+                for category in self.category_counts():
+                    committed = self.committed_rows(category)
+                    matrix = self.embedding_matrix(category)
+                    blob, rows = stored.get(category, (None, None))
+                    if rows == committed:
+                        vector_sum = np.frombuffer(blob, dtype=np.float64).copy()
+                    else:
+                        vector_sum = _chunked_sum(matrix, np.arange(len(matrix)))
+                        self._conn.execute("INSERT OR REPLACE INTO shard_sums (category, vector_sum, rows) "
+                                           "VALUES (?, ?, ?)", (category, vector_sum.tobytes(), committed))
+                    dead = np.fromiter((r[0] for r in self._conn.execute(
+                        "SELECT emb_row FROM good_prompts WHERE category = ? AND deleted = 1 ORDER BY emb_row",
+                        (category,))), dtype=np.int64)
+                    if len(dead):
+                        vector_sum -= _chunked_sum(matrix, dead)
+                    result[category] = (vector_sum, committed - len(dead))
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return result
+
+    # --- Compaction ---
+    def dead_ratio(self, category: str = None) -> float:
+        where, params = ("WHERE category = ?", (category,)) if category is not None else ("", ())
+        total, dead = self._conn.execute(
+            f"SELECT COUNT(*), COALESCE(SUM(deleted), 0) FROM good_prompts {where}", params).fetchone()
+        return (dead / total) if total else 0.0
+
+    def shard_dead_ratios(self) -> dict:
+        return {category: dead / total for category, total, dead in self._conn.execute(
+            "SELECT category, COUNT(*), SUM(deleted) FROM good_prompts GROUP BY category")}
+
+    def maybe_compact(self) -> list:
+        """Sirf un shards ki compaction jinme kaafi tombstones hain; compact hue categories lautao."""
+        categories = [c for c, ratio in self.shard_dead_ratios().items() if ratio >= COMPACT_DEAD_RATIO]
+        for category in categories:
+            self.compact(category)
+        if not categories:
+            self._conn.execute("PRAGMA wal_checkpoint(PASSIVE)")
+        return categories
+
+    def compact(self, category: str = None):
+        """Deleted rows hatao aur shard ki embeddings nayi contiguous file mein likho (category=None: saare shards)."""
+        with self._lock:
+            self.flush()
+            categories = [category] if category is not None else [r[0] for r in self._conn.execute(
+                "SELECT DISTINCT category FROM good_prompts")]
+            for name in categories:
+                self._compact_shard(name)
+            self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def _compact_shard(self, category: str):
+        self._conn.execute("BEGIN IMMEDIATE")
+        old_generation = self.shard_generation(category)
+        new_generation = old_generation + 1
+        new_path = self.embeddings_path(category, new_generation)
+        try:
+            live = self._conn.execute(
+                "SELECT id, emb_row FROM good_prompts WHERE category = ? AND deleted = 0 ORDER BY emb_row",
+                (category,)).fetchall()
+            dim = self.dim
+            old_path = self.embeddings_path(category, old_generation)
+            vector_sum = None
+            with open(new_path, "wb") as out:
+                if live and dim and os.path.exists(old_path):
+                    old = np.memmap(old_path, dtype=np.float32, mode="r").reshape(-1, dim)
+                    vector_sum = _copy_rows(out, old, np.fromiter((r for _, r in live), dtype=np.int64, count=len(live)))
+                    del old
+                out.flush()
+                os.fsync(out.fileno())
+            self._conn.execute("DELETE FROM good_prompts WHERE category = ? AND deleted = 1", (category,))
+            self._conn.execute("DELETE FROM shard_sums WHERE category = ?", (category,))
+            if vector_sum is not None:
+                self._conn.execute("INSERT INTO shard_sums (category, vector_sum, rows) VALUES (?, ?, ?)",
+                                   (category, vector_sum.tobytes(), len(live)))
+            # UNIQUE(category, emb_row) ki wajah se pehle negative, phir final numbering
+            self._conn.executemany("UPDATE good_prompts SET emb_row = ? WHERE id = ?",
+                                   [(-1 - i, row_id) for i, (row_id, _) in enumerate(live)])
+            self._conn.execute("UPDATE good_prompts SET emb_row = -1 - emb_row WHERE category = ?", (category,))
+            self._set_meta(f"generation:{category}", new_generation)
+            self._conn.execute("COMMIT")
+        except Exception:
+            self._conn.execute("ROLLBACK")
+            if os.path.exists(new_path):
+                os.remove(new_path)
+            raise
+        try:
+            os.remove(self.embeddings_path(category, old_generation))
+        except OSError:
+            pass
+        print(f"Shard '{category}' compaction complete: {len(live)} live examples (generation {new_generation}).")
+
+    # --- Reads ---
+    def count_good(self, category: str = None) -> int:
+        self.flush()
+        if category is None:
+            return self._conn.execute("SELECT COUNT(*) FROM good_prompts WHERE deleted = 0").fetchone()[0]
+        return self._conn.execute("SELECT COUNT(*) FROM good_prompts WHERE category = ? AND deleted = 0",
+                                  (category,)).fetchone()[0]
+
+    def count_bad(self) -> int:
+        self.flush()
+        return self._conn.execute("SELECT COUNT(*) FROM bad_prompts").fetchone()[0]
+
+    def category_counts(self) -> dict:
+        """category -> live rows; shards load kiye bina sizes."""
+        return dict(self._conn.execute(
+            "SELECT category, COUNT(*) FROM good_prompts WHERE deleted = 0 GROUP BY category").fetchall())
+
+    def committed_rows(self, category: str) -> int:
+        return self._conn.execute("SELECT COALESCE(MAX(emb_row) + 1, 0) FROM good_prompts WHERE category = ?",
+                                  (category,)).fetchone()[0]
+
+    def max_good_id(self) -> int:
+        return self._conn.execute("SELECT COALESCE(MAX(id), 0) FROM good_prompts").fetchone()[0]
+
+    def embedding_matrix(self, category: str) -> np.ndarray:
+        """Shard ki committed embeddings ka read-only np.memmap (rows = emb_row).
+
+        File OS page cache se map hoti hai, isliye saare worker processes ek hi
+        physical copy share karte hain aur resident memory DB ke saath nahi badhti.
+        """
+        dim = self.dim
+        path = self.embeddings_path(category)
+        rows = self.committed_rows(category)
+        if dim is None or rows == 0 or not os.path.exists(path):
+            return np.zeros((0, dim or 0), dtype=np.float32)
+        return np.memmap(path, dtype=np.float32, mode="r", shape=(rows, dim))
+
+    def load_embeddings(self, category: str) -> np.ndarray:
+        """Shard ki committed embedding matrix ki in-memory copy."""
+        return np.array(self.embedding_matrix(category))
+
+    def shard_row_ids(self, category: str) -> np.ndarray:
+        """Shard ki live emb_rows, covering index se bina poori rows padhe."""
+        cursor = self._conn.execute(
+            "SELECT emb_row FROM good_prompts WHERE category = ? AND deleted = 0 ORDER BY emb_row", (category,))
+        return np.fromiter((r[0] for r in cursor), dtype=np.int64)
+
+    def shard_rows(self, category: str) -> list:
+        """Maintenance ke liye: [(id, emb_row, use_count), ...] emb_row order mein."""
+        self.flush()
+        return self._conn.execute(
+            "SELECT id, emb_row, use_count FROM good_prompts WHERE category = ? AND deleted = 0 ORDER BY emb_row",
+            (category,)).fetchall()
+
+    def good_rows_since(self, last_id: int) -> list:
+        """Kisi aur process ne jo rows add ki hain: [(id, category, emb_row), ...]."""
+        return self._conn.execute(
+            "SELECT id, category, emb_row FROM good_prompts WHERE id > ? AND deleted = 0 ORDER BY id", (last_id,)).fetchall()
+
+    def get_examples(self, category: str, emb_rows) -> list:
+        """Shard ke diye gaye emb_rows ke user_text/model_response/use_count, usi order mein."""
+        emb_rows = [int(r) for r in emb_rows]
+        if not emb_rows:
+            return []
+        placeholders = ",".join("?" * len(emb_rows))
+        found = {row[0]: {'user_text': row[1], 'model_response': row[2], 'use_count': row[3]}
+                 for row in self._conn.execute(
+                     f"SELECT emb_row, user_text, model_response, use_count FROM good_prompts "
+                     f"WHERE category = ? AND emb_row IN ({placeholders})", [category] + emb_rows)}
+        return [found[r] for r in emb_rows if r in found]
+
+    def load_good_frame(self) -> pd.DataFrame:
+        self.flush()
+        df = pd.read_sql_query(
+            "SELECT id, category, user_text, model_response, emb_row, use_count FROM good_prompts "
+            "WHERE deleted = 0 ORDER BY id", self._conn)
+        embeddings = [None] * len(df)
+        for category, positions in df.groupby('category').indices.items():
+            matrix = self.embedding_matrix(category)
+            for position, vector in zip(positions, matrix[df['emb_row'].to_numpy()[positions]]):
+                embeddings[position] = vector
+        df['embedding'] = embeddings
+        return df
+
+    def bad_rows(self) -> list:
+        """[(id, log_data dict, use_count), ...] id order mein."""
+        self.flush()
+        return [(row_id, json.loads(log), use_count) for row_id, log, use_count in self._conn.execute(
+            "SELECT id, log_data, use_count FROM bad_prompts ORDER BY id")]
+
+    def bad_responses_since(self, last_id: int) -> list:
+        """👎 mile model_responses: [(id, response), ...] (response cache ki block list ke liye)."""
+        return self._conn.execute(
+            "SELECT id, json_extract(log_data, '$.model_response') FROM bad_prompts WHERE id > ? ORDER BY id",
+            (last_id,)).fetchall()
+
+    def load_bad_frame(self) -> pd.DataFrame:
+        rows = self.bad_rows()
+        return pd.DataFrame({'log_data': [r[1] for r in rows], 'use_count': [r[2] for r in rows]},
+                            columns=['log_data', 'use_count'])
+
+    # --- One-time migration ---
+    def migrate_from_pickles(self, good_pickle_path: str, bad_pickle_path: str):
+        """Purani hissab_vector_db.pkl / bad_prompts_db.pkl files ko store mein import karo."""
+        if os.path.exists(good_pickle_path) and self.count_good() == 0:
+            old_df = pd.read_pickle(good_pickle_path)
+            print(f"Migrating {len(old_df)} good examples from '{good_pickle_path}'...")
+            with self._lock:
+                for row in old_df.itertuples(index=False):
+                    self._pending_good.append((row.category, row.user_text, row.model_response,
+                                               np.asarray(row.embedding, dtype=np.float32)))
+                self.flush()
+            os.replace(good_pickle_path, good_pickle_path + ".migrated")
+        if os.path.exists(bad_pickle_path) and self.count_bad() == 0:
+            old_df = pd.read_pickle(bad_pickle_path)
+            print(f"Migrating {len(old_df)} bad prompt logs from '{bad_pickle_path}'...")
+            with self._lock:
+                for log_data in old_df.get('log_data', []):
+                    self._pending_bad.append(json.dumps(log_data, ensure_ascii=False, default=str))
+                self.flush()
+            os.replace(bad_pickle_path, bad_pickle_path + ".migrated")
+
+    def close(self):
+        try:
+            self.flush()
+        except sqlite3.ProgrammingError:
+            pass  # connection pehle hi band ho chuka hai
+
+
+_store = None
+_store_lock = threading.Lock()
+
+def get_store() -> ExampleStore:
+    """Process-wide shared store instance."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = ExampleStore()
+        return _store
@@ -0,0 +1,49 @@
+import numpy as np
+
+from annnew import IVFIndex, exact_top_k, normalize_rows
+
+
+def _clustered(rows=4000, dim=32, clusters=50, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dim))
+    matrix = centers[rng.integers(clusters, size=rows)] + 0.3 * rng.normal(size=(rows, dim))
+    return matrix.astype(np.float32), rng
+
+
+def _recall(index, matrix, queries, k=10, nprobe=None):
+    inv_norms = 1.0 / np.linalg.norm(matrix, axis=1)
+    all_rows = np.arange(len(matrix))
+    hits = 0
+    for query in queries:
+        truth, _ = exact_top_k(matrix, inv_norms, query, all_rows, k)
+        found, _ = exact_top_k(matrix, inv_norms, query, index.candidates(query, nprobe), k)
+        hits += len(np.intersect1d(truth, found))
+    return hits / (k * len(queries))
+
+
+def test_ivf_recall_against_exact_search():
+    matrix, rng = _clustered()
+    index = IVFIndex.train(matrix, nlist=64, nprobe=8)
+    index.add_all(matrix)
+    queries = normalize_rows(matrix[rng.choice(len(matrix), 50, replace=False)]
+                             + 0.1 * rng.normal(size=(50, matrix.shape[1])).astype(np.float32))
+
+    assert len(index) == len(matrix)
+    assert _recall(index, matrix, queries) >= 0.9
+    # Saare clusters probe karo to ANN aur exact search ek hi jawab dete hain
+    assert _recall(index, matrix, queries, nprobe=index.nlist) == 1.0
+
+
+def test_incremental_rows_and_reload_keep_recall(tmp_path):
+    matrix, rng = _clustered(seed=1)
+    index = IVFIndex.train(matrix[:3000], nlist=64, nprobe=8)
+    index.add_all(matrix[:3000])
+    index.add(np.arange(3000, len(matrix)), matrix[3000:])
+    path = str(tmp_path / "ann.npz")
+    index.save(path, generation=3)
+
+    assert IVFIndex.load(path, generation=4) is None
+    reloaded = IVFIndex.load(path, generation=3, dim=matrix.shape[1], nprobe=8)
+    queries = normalize_rows(matrix[3000:][:40])
+    assert len(reloaded) == len(matrix)
+    assert _recall(reloaded, matrix, queries) >= 0.9
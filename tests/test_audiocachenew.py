@@ -0,0 +1,58 @@
+# Disk eviction zinda sessions ke clips ko nahi chhoota; session khatam hote hi woh bhi evict ho sakte hain
+import os
+
+import audiocachenew
+from audiocachenew import AudioCache
+
+CLIP = b"x" * 100
+
+
+def _add(cache, text, when, session_id=None):
+    """Clip likho aur mtime `when` par set karo, taaki disk LRU ka order tay rahe."""
+    cache.get_or_create_audio(text, lambda _: CLIP, session_id=session_id)
+    key = cache.audio_key(text)
+    os.utime(cache._path(key), (when, when))
+    return key
+
+
+def _on_disk(cache, key):
+    return os.path.exists(cache._path(key))
+
+
+def test_eviction_skips_pinned_session_clips(tmp_path):
+    cache = AudioCache(str(tmp_path), max_bytes=250)
+    pinned = _add(cache, "session ka jawab", 1000, session_id="s1")
+    old = _add(cache, "purana jawab", 2000)
+    newer = _add(cache, "naya jawab", 3000)
+
+    # 400 bytes > 250: sabse purana (pinned) bacha rehta hai, uske baad wale hatte hain
+    latest = _add(cache, "sabse naya jawab", 4000)
+    assert _on_disk(cache, pinned) and _on_disk(cache, latest)
+    assert not _on_disk(cache, old) and not _on_disk(cache, newer)
+    assert cache.metrics()["evicted_files"] == 2
+
+
+def test_only_last_clips_of_a_live_session_stay_pinned(tmp_path, monkeypatch):
+    monkeypatch.setattr(audiocachenew, "SESSION_KEEP", 2)
+    cache = AudioCache(str(tmp_path), max_bytes=10_000)
+    keys = [_add(cache, f"jawab {i}", 1000 + i, session_id="s1") for i in range(3)]
+    assert cache._pinned() == set(keys[1:])
+
+    cache.max_bytes = 150
+    _add(cache, "doosra user", 2000)
+    assert not _on_disk(cache, keys[0])
+    assert all(_on_disk(cache, key) for key in keys[1:])
+
+
+def test_released_or_expired_sessions_become_evictable(tmp_path, monkeypatch):
+    cache = AudioCache(str(tmp_path), max_bytes=10_000)
+    released = _add(cache, "released", 1000, session_id="s1")
+    expired = _add(cache, "expired", 1001, session_id="s2")
+    cache.release_session("s1")
+    monkeypatch.setattr(audiocachenew, "SESSION_TTL_SECONDS", -1.0)  # s2 ab TTL se bahar
+
+    cache.max_bytes = 150
+    latest = _add(cache, "naya", 2000, session_id="s3")
+    assert not _on_disk(cache, released) and not _on_disk(cache, expired)
+    assert _on_disk(cache, latest)
+    assert "s1" not in cache._sessions and "s2" not in cache._sessions
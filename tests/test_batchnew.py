@@ -0,0 +1,38 @@
+# Output JSONL hi checkpoint hai: crash ke beech adhuri aakhri line kaati jaati hai, poori lines bachti hain
+import json
+
+from batchnew import load_checkpoint
+
+
+def _write(path, records, tail=b""):
+    with open(path, "wb") as f:
+        for record in records:
+            f.write((json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8"))
+        f.write(tail)
+
+
+def test_partial_last_line_is_truncated(tmp_path):
+    path = tmp_path / "results.jsonl"
+    _write(path, [{"id": "1", "answer": "₹500 bache"}, {"id": 2, "answer": "EMI ₹4,707"}],
+           tail='{"id": "3", "answer": "adhu'.encode("utf-8"))
+    complete_size = path.stat().st_size - len('{"id": "3", "answer": "adhu'.encode("utf-8"))
+
+    assert load_checkpoint(str(path)) == {"1", "2"}
+    assert path.stat().st_size == complete_size
+    assert path.read_bytes().endswith(b"\n")
+    # Dobara padhne par kuch nahi badalta
+    assert load_checkpoint(str(path)) == {"1", "2"}
+    assert path.stat().st_size == complete_size
+
+
+def test_complete_file_is_left_alone(tmp_path):
+    path = tmp_path / "results.jsonl"
+    _write(path, [{"id": "a"}, {"id": "b"}])
+    before = path.read_bytes()
+
+    assert load_checkpoint(str(path)) == {"a", "b"}
+    assert path.read_bytes() == before
+
+
+def test_missing_output_means_nothing_done(tmp_path):
+    assert load_checkpoint(str(tmp_path / "missing.jsonl")) == set()
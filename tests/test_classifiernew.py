@@ -0,0 +1,46 @@
+# partial_fit se incremental update aur store se dobara train karna ek hi centroids dein
+import numpy as np
+
+from classifiernew import CentroidClassifier
+from storenew import ExampleStore
+
+CATEGORIES = ["loan_and_emi", "price_comparison", "unknown"]
+
+
+def _descriptions(rng, dim=8):
+    return {c: rng.standard_normal(dim).astype(np.float32) for c in CATEGORIES}
+
+
+def test_partial_fit_matches_retraining_from_store(tmp_path):
+    rng = np.random.default_rng(0)
+    descriptions = _descriptions(rng)
+    vectors = rng.standard_normal((6, 8)).astype(np.float32)
+    labels = ["loan_and_emi"] * 4 + ["price_comparison"] * 2
+
+    incremental = CentroidClassifier.from_store(descriptions)
+    incremental.partial_fit(vectors[:3], labels[:3])
+    incremental.partial_fit(vectors[3], labels[3:4])  # ek akela embedding bhi chalta hai
+    incremental.partial_fit(vectors[4:], labels[4:])
+
+    store = ExampleStore(str(tmp_path / "store.db"), str(tmp_path / "emb"), flush_batch_size=100)
+    for i, (vector, label) in enumerate(zip(vectors, labels)):
+        store.append_good(label, f"sawaal {i}", "jawab", vector)
+    retrained = CentroidClassifier.from_store(descriptions, store)
+
+    np.testing.assert_allclose(incremental._centroids, retrained._centroids, rtol=1e-5, atol=1e-6)
+    assert incremental._counts.tolist() == retrained._counts.tolist()
+
+
+def test_partial_fit_moves_predictions_and_ignores_unknown_categories():
+    rng = np.random.default_rng(1)
+    model = CentroidClassifier.from_store(_descriptions(rng))
+    query = rng.standard_normal(8).astype(np.float32)
+    before = model._centroids.copy()
+
+    model.partial_fit(query[None, :], ["salary_calculation"])  # anjaan category: kuch nahi badalta
+    np.testing.assert_array_equal(model._centroids, before)
+
+    model.partial_fit(np.repeat(query[None, :], 20, axis=0), ["price_comparison"] * 20)
+    category, score, margin = model.predict(query)
+    assert category == "price_comparison"
+    assert score > 0.9 and margin > 0
@@ -0,0 +1,16 @@
+import numpy as np
+
+from embedcachenew import EmbeddingCache, make_model_key
+
+
+def test_prune_keeps_other_backends_and_drops_stale_versions(tmp_path):
+    cache = EmbeddingCache(str(tmp_path / "embed.db"))
+    current = make_model_key("paraphrase-multilingual-MiniLM-L12-v2", "onnx")
+    other_backend = make_model_key("paraphrase-multilingual-MiniLM-L12-v2", "torch")
+    stale = current.rsplit("|", 1)[0] + "|v0"
+    for key in (current, other_backend, stale):
+        cache.put_many(key, ["kitne bache"], [np.ones(4)])
+
+    assert cache.prune(current) == 1
+    assert cache.get_many(current, ["kitne bache"]) and cache.get_many(other_backend, ["kitne bache"])
+    assert not cache.get_many(stale, ["kitne bache"])
@@ -0,0 +1,46 @@
+# ExampleIndex ko doosre process (alag ExampleStore connection) ki rows bhi dikhni chahiye
+import numpy as np
+
+from storenew import ExampleStore
+from vectordbnew import ExampleIndex
+
+
+def _vector(seed: int) -> np.ndarray:
+    return np.random.default_rng(seed).standard_normal(8).astype(np.float32)
+
+
+def test_rows_from_another_store_are_not_skipped(tmp_path):
+    db_path, prefix = str(tmp_path / "store.db"), str(tmp_path / "emb")
+    store_a = ExampleStore(db_path, prefix, flush_batch_size=100)
+    store_b = ExampleStore(db_path, prefix, flush_batch_size=100)
+    store_a.append_good("income_and_balance", "pehla", "jawab", _vector(0))
+    store_a.flush()
+    index = ExampleIndex(store_a)
+    assert len(index.rows_for_category("income_and_balance")) == 1  # shard load ho chuka hai
+
+    # B pehle commit karta hai (chhoti id), phir A ki local flush listener se index tak aati hai
+    store_b.append_good("income_and_balance", "doosre process ka", "jawab", _vector(1))
+    store_b.flush()
+    store_a.append_good("income_and_balance", "teesra", "jawab", _vector(2))
+    store_a.flush()
+
+    rows = index.rows_for_category("income_and_balance")
+    texts = {e["user_text"] for e in store_a.get_examples("income_and_balance", rows)}
+    assert texts == {"pehla", "doosre process ka", "teesra"}
+    assert len(index) == 3
+
+
+def test_thumbs_up_with_new_amounts_is_not_merged(tmp_path, monkeypatch):
+    import vectordbnew
+    store = ExampleStore(str(tmp_path / "store.db"), str(tmp_path / "emb"), flush_batch_size=1)
+    monkeypatch.setattr(vectordbnew, "get_store", lambda: store)
+    monkeypatch.setattr(vectordbnew, "hissab_db", ExampleIndex(store))
+    vector = _vector(3)
+
+    assert vectordbnew.add_user_prompt_to_db("Aman ko 2000 diye, 500 lautaye", "jawab 1500", "lending_and_borrowing", vector)
+    assert not vectordbnew.add_user_prompt_to_db("Aman ko 2000 diye, 500 lautaye", "jawab 1500", "lending_and_borrowing", vector)
+    # Same wording, amounts ulte: naya approved jawab alag row mein rehna chahiye
+    assert vectordbnew.add_user_prompt_to_db("Aman ko 500 diye, 2000 lautaye", "jawab galat sawaal", "lending_and_borrowing", vector)
+    rows = vectordbnew.hissab_db.rows_for_category("lending_and_borrowing")
+    assert sorted(e["model_response"] for e in store.get_examples("lending_and_borrowing", rows)) == \
+        ["jawab 1500", "jawab galat sawaal"]
@@ -0,0 +1,19 @@
+import time
+
+from jobsnew import JobQueue
+
+
+def test_expired_worker_cannot_finish_a_reclaimed_job(tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.db"), lease_seconds=0.01)
+    job_id = queue.enqueue("save_good", {"n": 1})
+    stale = queue.claim()
+    time.sleep(0.02)  # lease expire; doosra worker job dobara uthata hai
+    current = queue.claim()
+    assert current[0] == stale[0] == job_id and current[4] != stale[4]
+
+    assert not queue.complete(job_id, "save_good", stale[4], {"by": "stale"})
+    assert not queue.fail(job_id, "save_good", stale[4], "purana worker")
+    assert queue.get(job_id)["status"] == "running"
+
+    assert queue.complete(job_id, "save_good", current[4], {"by": "current"})
+    assert queue.get(job_id)["result"] == {"by": "current"}
@@ -0,0 +1,30 @@
+import numpy as np
+
+import maintenancenew
+from storenew import ExampleStore
+
+
+def test_dedup_bad_keeps_different_wrong_responses(tmp_path, monkeypatch):
+    # Same sawaal ke alag galat jawab error analysis ke liye alag rehne chahiye
+    monkeypatch.setattr(maintenancenew.vectordbnew, "encode_cached", lambda texts: np.ones((len(texts), 4), np.float32))
+    store = ExampleStore(str(tmp_path / "store.db"), str(tmp_path / "emb"))
+    for response in ("jawab 500", "jawab  500", "jawab 700"):
+        store.append_bad({"hinglish_story": "kitne bache", "model_response": response, "primary_category": "income"})
+    store.flush()
+
+    report = maintenancenew.dedup_bad(store, threshold=0.97, apply=True)
+
+    assert report["income"]["duplicate_rows"] == 1
+    assert sorted(log["model_response"] for _, log, _ in store.bad_rows()) == ["jawab 500", "jawab 700"]
+
+
+def test_dedup_good_keeps_examples_with_different_amounts(tmp_path):
+    store = ExampleStore(str(tmp_path / "store.db"), str(tmp_path / "emb"))
+    for text in ("Mere paas 2000 the, 500 kharch", "Mere paas 2000 the, 500 kharch", "Mere paas 5000 the, 500 kharch"):
+        store.append_good("income_and_balance", text, f"jawab: {text}", np.ones(4, np.float32))
+    store.flush()
+
+    report = maintenancenew.dedup_good(store, threshold=0.97, apply=True)
+
+    assert report["income_and_balance"]["duplicate_rows"] == 1
+    assert store.count_good("income_and_balance") == 2
@@ -0,0 +1,91 @@
+# LLMRouter: retry, fallback, circuit breaker aur hedging, StubProvider ke saath offline
+import asyncio
+
+import pytest
+
+import providersnew
+from providersnew import LLMError, LLMRouter, ProviderError, StubProvider, is_retryable
+
+
+class FlakyProvider(StubProvider):
+    """Pehli calls par diye gaye errors raise karta hai, phir StubProvider jaisa jawab."""
+
+    def __init__(self, errors=(), **kwargs):
+        super().__init__(**kwargs)
+        self.errors = list(errors)
+        self.calls = 0
+
+    def complete(self, model, prompt, timeout):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return super().complete(model, prompt, timeout)
+
+    async def acomplete(self, model, prompt, timeout):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return await super().acomplete(model, prompt, timeout)
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(providersnew, "BACKOFF_BASE_SECONDS", 0.0)
+
+
+def _router(primary, secondary=None, **kwargs):
+    providers = {"primary": primary, "secondary": secondary or StubProvider()}
+    return LLMRouter(routes={"summary": "primary:a,secondary:b"}, providers=providers, **kwargs)
+
+
+def test_error_classification():
+    assert is_retryable(TimeoutError()) and is_retryable(ConnectionError())
+    assert is_retryable(ProviderError("busy", 429)) and is_retryable(ProviderError("down", 503))
+    assert not is_retryable(ProviderError("bad key", 401)) and not is_retryable(ProviderError("invalid", 400))
+
+
+def test_transient_error_is_retried_on_the_same_target():
+    primary = FlakyProvider([ProviderError("down", 503)])
+    router = _router(primary)
+    assert router.complete("summary", "summary sentence").target == "stub:a"
+    assert primary.calls == 2 and router.stats["retries"] == 1 and router.stats["fallbacks"] == 0
+
+
+def test_client_error_is_not_retried_or_counted_by_the_breaker():
+    primary = FlakyProvider([ProviderError("bad key", 401)] * 10)
+    router = _router(primary, max_retries=3)
+    for _ in range(3):
+        assert router.complete("summary", "summary sentence").target == "stub:b"  # fallback phir bhi
+    assert primary.calls == 3 and router.stats["retries"] == 0
+    assert router.metrics()["breakers"]["primary:a"] == "closed"
+
+
+def test_breaker_opens_after_repeated_transient_failures():
+    primary = FlakyProvider([ProviderError("down", 503)] * 10)
+    router = _router(primary, max_retries=4)
+    assert router.complete("summary", "summary sentence").target == "stub:b"
+    assert router.metrics()["breakers"]["primary:a"] == "open"
+    calls = primary.calls
+    router.complete("summary", "summary sentence")
+    assert primary.calls == calls  # band target ko call hi nahi jaati
+
+
+def test_all_targets_failing_raises_llm_error():
+    router = _router(FlakyProvider([ProviderError("down", 503)] * 10),
+                     FlakyProvider([ProviderError("invalid", 400)] * 10), max_retries=1)
+    with pytest.raises(LLMError):
+        router.complete("summary", "summary sentence")
+    assert router.stats["failures"] == 1
+
+
+def test_hedge_wins_when_primary_is_slow():
+    router = _router(StubProvider(completion_seconds=0.5), hedge_after_seconds=0.02)
+    assert router.complete("summary", "summary sentence").target == "stub:b"
+    assert router.stats["hedges"] == 1 and router.stats["hedge_wins"] == 1
+
+
+def test_async_path_skips_retries_for_client_errors():
+    primary = FlakyProvider([ProviderError("bad key", 403)] * 10)
+    router = _router(primary, max_retries=3)
+    assert asyncio.run(router.acomplete("summary", "summary sentence")).target == "stub:b"
+    assert primary.calls == 1 and router.stats["retries"] == 0
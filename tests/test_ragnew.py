@@ -0,0 +1,57 @@
+# Prompt builder: examples budget mein, near-duplicates aur category cap ke baad hi aate hain
+import ragnew
+from ragnew import MAX_EXAMPLES_PER_CATEGORY, build_prompt, count_tokens, select_examples
+
+WORDS = ["chai", "samosa", "kiraya", "bijli", "petrol", "dawai", "kitaab", "joote", "sabzi", "doodh"]
+
+
+def _example(i: int, score: float, response: str = "Kul kharcha 100 rupaye hai.") -> dict:
+    # Har example ke alag shabd, taaki sirf jaan-boojhkar banaye duplicates hi near-duplicate hon
+    return {"user_text": f"maine {WORDS[i]} par {100 + i} rupaye kharch kiye", "model_response": response,
+            "score": score}
+
+
+def test_per_category_cap_keeps_best_scored():
+    examples = [_example(i, score=i / 10) for i in range(MAX_EXAMPLES_PER_CATEGORY + 2)]
+    selected, dropped = select_examples({"personal_expense_tracking": examples}, token_budget=10_000)
+
+    kept = selected["personal_expense_tracking"]
+    assert len(kept) == MAX_EXAMPLES_PER_CATEGORY and dropped == 2
+    assert [e["score"] for e in kept] == sorted((e["score"] for e in examples), reverse=True)[:len(kept)]
+
+
+def test_near_duplicates_dropped_across_categories():
+    original = _example(0, score=0.9)
+    duplicate = {**original, "user_text": original["user_text"] + " aaj", "score": 0.8}
+    selected, dropped = select_examples({"personal_expense_tracking": [original],
+                                         "monthly_budget_and_savings": [duplicate, _example(1, 0.7)]},
+                                        token_budget=10_000, primary_category="personal_expense_tracking")
+
+    assert selected == {"personal_expense_tracking": [original], "monthly_budget_and_savings": [_example(1, 0.7)]}
+    assert dropped == 1
+
+
+def test_budget_skips_oversized_examples_and_keeps_packing():
+    huge = _example(0, score=0.99, response="bahut lamba jawab " * ragnew.MAX_EXAMPLE_TOKENS)
+    small = [_example(i, score=0.9 - i / 100) for i in range(1, 5)]
+    one_example = count_tokens(ragnew._format_example(1, small[0])) + count_tokens(
+        "\n--- EXAMPLES FROM CATEGORY: loan_and_emi ---")
+    selected, dropped = select_examples({"loan_and_emi": [huge] + small}, token_budget=2 * one_example + 5)
+
+    assert selected == {"loan_and_emi": small[:2]}
+    assert dropped == 3
+
+
+def test_build_prompt_stays_within_budget():
+    examples = {"loan_and_emi": [_example(i, score=1 - i / 10) for i in range(5)],
+                "price_comparison": [_example(i, score=0.5 - i / 10) for i in range(5, 10)]}
+    generous = build_prompt("kitni EMI banegi", "loan_and_emi", ["loan_and_emi", "price_comparison"], examples,
+                            token_budget=10_000)
+    budget = generous.tokens - 60
+    tight = build_prompt("kitni EMI banegi", "loan_and_emi", ["loan_and_emi", "price_comparison"], examples,
+                         token_budget=budget)
+
+    assert generous.examples_used == 10 and generous.examples_dropped == 0
+    assert tight.tokens <= budget
+    assert 0 < tight.examples_used < 10 and tight.examples_used + tight.examples_dropped == 10
+    assert tight.text.startswith(ragnew.STATIC_PREAMBLE)
@@ -0,0 +1,29 @@
+import numpy as np
+
+from responsecachenew import SemanticResponseCache, extract_numbers
+
+
+def test_number_key_uses_multipliers_and_words():
+    assert extract_numbers("2 lakh ka loan") != extract_numbers("2 hazaar ka loan")
+    assert extract_numbers("do hazaar paanch sau") == extract_numbers("2500")
+    assert extract_numbers("1000 par 20% off") != extract_numbers("1000 par 20 off")
+
+
+def test_swapped_amounts_miss_the_cache():
+    # Embedding lagbhag same, par amounts ka role ulta: purana jawab nahi milna chahiye
+    pairs = [("Aman ko 2000 udhaar diye, usne 500 lautaye", "Aman ko 500 udhaar diye, usne 2000 lautaye"),
+             ("Mere paas 5000 the, 1000 kharch kiye", "Mere paas 1000 the, 5000 kharch kiye")]
+    for first, swapped in pairs:
+        assert extract_numbers(first) != extract_numbers(swapped)
+        cache = SemanticResponseCache()
+        cache.store(first, np.ones(4), extract_numbers(first), "pehle sawaal ka jawab")
+        assert cache.lookup(np.ones(4), extract_numbers(first)) == ("pehle sawaal ka jawab", "cache")
+        assert cache.lookup(np.ones(4), extract_numbers(swapped)) is None
+
+
+def test_block_list_is_seeded_from_durable_source():
+    cache = SemanticResponseCache()
+    cache.store("pehle ka sawaal", np.ones(4), (100,), "galat jawab")
+    cache.set_blocked_source(lambda last_id: [(7, "galat  jawab")] if last_id < 7 else [])
+    assert cache.is_blocked("galat jawab")
+    assert cache.lookup(np.ones(4), (100,)) is None
@@ -0,0 +1,55 @@
+# RIFF bytes jo wave module nahi padh sakta, ffmpeg tak girte hain; 16-bit PCM WAV memory mein hi decode hota hai
+import io
+import struct
+import wave
+
+import pytest
+
+import speechnew
+from speechnew import decode_to_pcm
+
+
+def _pcm_wav(frames: bytes, channels: int = 1, rate: int = 16000) -> bytes:
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(channels)
+        wav.setsampwidth(2)
+        wav.setframerate(rate)
+        wav.writeframes(frames)
+    return buffer.getvalue()
+
+
+def _float_wav() -> bytes:
+    # WAVE_FORMAT_IEEE_FLOAT (3): wave module "unknown format" wave.Error deta hai
+    fmt = struct.pack("<HHIIHH", 3, 1, 16000, 64000, 4, 32)
+    data = struct.pack("<4f", 0.0, 0.5, -0.5, 0.0)
+    body = b"WAVE" + b"fmt " + struct.pack("<I", len(fmt)) + fmt + b"data" + struct.pack("<I", len(data)) + data
+    return b"RIFF" + struct.pack("<I", len(body)) + body
+
+
+@pytest.fixture
+def ffmpeg_calls(monkeypatch):
+    calls = []
+
+    def fake_ffmpeg(audio_bytes, sample_rate):
+        calls.append(audio_bytes)
+        return b"ffmpeg-pcm"
+    monkeypatch.setattr(speechnew, "_decode_ffmpeg", fake_ffmpeg)
+    return calls
+
+
+@pytest.mark.parametrize("audio", [
+    _float_wav(),
+    b"RIFF\x10\x00\x00\x00WEBPVP8 ",   # RIFF hai, WAVE nahi
+    _pcm_wav(b"\x01\x00" * 10)[:20],    # header beech mein kata
+], ids=["float-wav", "riff-not-wave", "truncated-header"])
+def test_unreadable_riff_falls_back_to_ffmpeg(audio, ffmpeg_calls):
+    assert decode_to_pcm(audio) == b"ffmpeg-pcm"
+    assert ffmpeg_calls == [audio]
+
+
+def test_pcm_wav_decodes_in_memory_even_if_cut_mid_frame(ffmpeg_calls):
+    stereo = _pcm_wav(struct.pack("<4h", 100, 300, -200, -400), channels=2)
+    assert decode_to_pcm(stereo) == struct.pack("<2h", 200, -300)
+    assert decode_to_pcm(stereo[:-1]) == struct.pack("<h", 200)  # adhura aakhri frame chhoot jaata hai
+    assert ffmpeg_calls == []
@@ -0,0 +1,33 @@
+# Per-shard embedding sums (classifier centroids) shards load kiye bina sahi rehne chahiye
+import numpy as np
+
+from storenew import ExampleStore
+
+
+def _expected(vectors: list) -> np.ndarray:
+    matrix = np.asarray(vectors, dtype=np.float64)
+    return (matrix / np.linalg.norm(matrix, axis=1, keepdims=True)).sum(axis=0)
+
+
+def test_shard_vector_sums_follow_writes_deletes_and_compaction(tmp_path):
+    store = ExampleStore(str(tmp_path / "store.db"), str(tmp_path / "emb"), flush_batch_size=100)
+    vectors = np.random.default_rng(0).standard_normal((5, 8)).astype(np.float32)
+    for i, vector in enumerate(vectors):
+        store.append_good("loan_and_emi" if i < 3 else "price_comparison", f"sawaal {i}", "jawab", vector)
+    store.flush()
+    sums = store.shard_vector_sums()
+    assert sums["loan_and_emi"][1] == 3
+    np.testing.assert_allclose(sums["loan_and_emi"][0], _expected(vectors[:3]), rtol=1e-5)
+
+    store.delete_good([1])  # tombstone: compaction se pehle bhi sum se bahar
+    sums = store.shard_vector_sums()
+    assert sums["loan_and_emi"][1] == 2
+    np.testing.assert_allclose(sums["loan_and_emi"][0], _expected(vectors[1:3]), rtol=1e-5, atol=1e-6)
+
+    store.compact("loan_and_emi")
+    store.append_good("loan_and_emi", "naya", "jawab", vectors[0])
+    store.flush()
+    store._conn.execute("DELETE FROM shard_sums WHERE category = 'price_comparison'")  # purana store
+    sums = store.shard_vector_sums()
+    np.testing.assert_allclose(sums["loan_and_emi"][0], _expected(vectors[:3]), rtol=1e-5, atol=1e-6)
+    np.testing.assert_allclose(sums["price_comparison"][0], _expected(vectors[3:]), rtol=1e-5)
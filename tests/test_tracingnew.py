@@ -0,0 +1,12 @@
+import tracingnew
+
+
+def test_timings_are_recorded_with_metrics_disabled(monkeypatch):
+    # Batch report context["timings"] par chalta hai, Prometheus switch se alag
+    monkeypatch.setattr(tracingnew, "METRICS_ENABLED", False)
+    context = tracingnew.start_trace({})
+    with tracingnew.span("retrieval", context):
+        pass
+    tracingnew.record("llm_ttft", 0.25, context)
+    assert set(context["timings"]) == {"retrieval", "llm_ttft"}
+    assert context["timings"]["llm_ttft"] == 0.25
@@ -0,0 +1,264 @@
+# tracingnew.py - Per-stage tracing spans aur Prometheus metrics
+#
+# Har pipeline stage (preprocess, embed, semantic_search, retrieval, prompt_build,
+# llm_ttft/llm_generate, tts, db writes, ...) span() se naapa jaata hai:
+#   - latency histogram (hissab_stage_seconds) hamesha update hota hai — sirf ek lock + bisect;
+#   - context["timings"] mein stage ka time jud jaata hai (batch mode isi ko report karta hai;
+#     yeh HISSAB_METRICS=0 par bhi hota hai, woh switch sirf Prometheus/trace export band karta hai);
+#   - sampled requests (HISSAB_TRACE_SAMPLE_RATE) ke spans JSONL trace file mein jaate hain.
+# Metrics Prometheus text format mein /metrics endpoint (HISSAB_METRICS_PORT) se
+# ya textfile sink (HISSAB_METRICS_FILE) mein milte hain.
+import os
+import json
+import time
+import uuid
+import atexit
+import random
+import bisect
+import threading
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# --- Configuration ---
+METRICS_ENABLED = os.getenv("HISSAB_METRICS", "1") != "0"
+TRACE_SAMPLE_RATE = float(os.getenv("HISSAB_TRACE_SAMPLE_RATE", "0.01"))
+TRACE_FILE = os.getenv("HISSAB_TRACE_FILE", "hissab_traces.jsonl")
+TRACE_LOG = os.getenv("HISSAB_TRACE_LOG", "0") == "1"  # stage markers console par bhi
+METRICS_PORT = int(os.getenv("HISSAB_METRICS_PORT", "0"))
+METRICS_FILE = os.getenv("HISSAB_METRICS_FILE")
+METRICS_FILE_INTERVAL_SECONDS = 15.0
+TRACE_FLUSH_SECONDS = 1.0
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: tuple, values: tuple, extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str, labels: tuple = ()):
+        self.name, self.help, self.labels = name, help_text, labels
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, label_values: tuple = (), amount: float = 1.0):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0.0) + amount
+
+    def render(self) -> list:
+        with self._lock:
+            values = dict(self._values)
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        lines += [f"{self.name}{_format_labels(self.labels, k)} {v:g}" for k, v in sorted(values.items())]
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, labels: tuple = (), buckets: tuple = LATENCY_BUCKETS):
+        self.name, self.help, self.labels, self.buckets = name, help_text, labels, tuple(buckets)
+        self._series = {}  # label values -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, label_values: tuple = ()):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def render(self) -> list:
+        with self._lock:
+            snapshot = {k: list(v) for k, v in self._series.items()}
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for label_values, series in sorted(snapshot.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series[:-1]):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                labels = _format_labels(self.labels, label_values, 'le="' + le + '"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, label_values)} {series[-1]:g}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, label_values)} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """Counters/histograms + collectors (jo render ke waqt gauges lautate hain, jaise cache hit ratios)."""
+
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+
+    def counter(self, name: str, help_text: str, labels: tuple = ()) -> Counter:
+        metric = Counter(name, help_text, labels)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, help_text: str, labels: tuple = (), buckets: tuple = LATENCY_BUCKETS) -> Histogram:
+        metric = Histogram(name, help_text, labels, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def register_collector(self, collect):
+        """collect() -> [(name, help, {label: value}, value)]; har ek gauge ke roop mein render hota hai."""
+        self._collectors.append(collect)
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines += metric.render()
+        gauges = {}
+        for collect in self._collectors:
+            try:
+                for name, help_text, labels, value in collect():
+                    gauges.setdefault(name, (help_text, []))[1].append((labels, value))
+            except Exception as e:
+                print(f"Metrics collector error: {e}")
+        for name, (help_text, samples) in gauges.items():
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} gauge"]
+            for labels, value in samples:
+                lines.append(f"{name}{_format_labels(tuple(labels), tuple(labels.values()))} {float(value):g}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
+STAGE_SECONDS = metrics.histogram("hissab_stage_seconds", "Pipeline stage latency in seconds.", ("stage",))
+STAGE_ERRORS = metrics.counter("hissab_stage_errors_total", "Pipeline stages that raised an exception.", ("stage",))
+REQUESTS = metrics.counter("hissab_requests_total", "Queries answered, by response source.", ("source",))
+
+
+# --- Trace sink ---
+class _TraceSink:
+    """Sampled spans memory mein jama hote hain aur background thread har second JSONL mein likhta hai."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._buffer = []
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def write(self, record: dict):
+        with self._lock:
+            self._buffer.append(record)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+
+    def flush(self):
+        with self._lock:
+            records, self._buffer = self._buffer, []
+        if records:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.writelines(json.dumps(r, ensure_ascii=False, default=str) + "\n" for r in records)
+
+    def _run(self):
+        while True:
+            time.sleep(TRACE_FLUSH_SECONDS)
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"Trace sink error: {e}")
+
+
+_sink = _TraceSink(TRACE_FILE)
+atexit.register(_sink.flush)
+
+
+# --- Spans ---
+def start_trace(context: dict) -> dict:
+    """Request ke shuru mein: trace id aur sampling faisla (poori request ke liye ek hi baar)."""
+    context["trace_id"] = uuid.uuid4().hex
+    context["trace_sampled"] = METRICS_ENABLED and random.random() < TRACE_SAMPLE_RATE
+    return context
+
+
+def record(stage: str, seconds: float, context: dict = None, error: str = None, **attrs):
+    """Ek stage ka time darj karo (span() isi ko bulata hai; TTFT jaise non-block stages seedha)."""
+    if context is not None:
+        timings = context.setdefault("timings", {})
+        timings[stage] = timings.get(stage, 0.0) + seconds
+    if not METRICS_ENABLED:
+        return
+    STAGE_SECONDS.observe(seconds, (stage,))
+    if error:
+        STAGE_ERRORS.inc((stage,))
+    if context is not None and context.get("trace_sampled"):
+        _sink.write({"trace_id": context.get("trace_id"), "stage": stage, "end": time.time(),
+                     "duration_ms": round(seconds * 1000, 3), "error": error, **attrs})
+    if TRACE_LOG:
+        print(f"✅ {stage}: {seconds * 1000:.1f} ms{' ' + str(attrs) if attrs else ''}{' ERROR ' + error if error else ''}")
+
+
+@contextmanager
+def span(stage: str, context: dict = None, **attrs):
+    """with span("retrieval", context): ... — exception bhi darj hota hai aur aage jaata hai."""
+    started = time.perf_counter()
+    error = None
+    try:
+        yield attrs  # block andar se attrs mein extra jaankari daal sakta hai
+    except BaseException as e:
+        error = type(e).__name__
+        raise
+    finally:
+        record(stage, time.perf_counter() - started, context, error, **attrs)
+
+
+# --- Exporters ---
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = metrics.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass  # har scrape ko console par mat likho
+
+
+_exporters_started = False
+_exporters_lock = threading.Lock()
+
+def _write_metrics_file(path: str):
+    while True:
+        try:
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(metrics.render())
+            os.replace(tmp_path, path)
+        except Exception as e:
+            print(f"Metrics file sink error: {e}")
+        time.sleep(METRICS_FILE_INTERVAL_SECONDS)
+
+def start_exporters(port: int = METRICS_PORT, path: str = METRICS_FILE):
+    """/metrics HTTP endpoint aur/ya textfile sink ek baar (per process) shuru karo."""
+    global _exporters_started
+    with _exporters_lock:
+        if _exporters_started or not METRICS_ENABLED:
+            return
+        _exporters_started = True
+    if port:
+        try:
+            server = ThreadingHTTPServer(("0.0.0.0", port), _MetricsHandler)
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+            print(f"✅ Metrics endpoint: http://0.0.0.0:{port}/metrics")
+        except OSError as e:
+            print(f"Metrics endpoint port {port} par shuru nahi hua: {e}")
+    if path:
+        threading.Thread(target=_write_metrics_file, args=(path,), daemon=True).start()
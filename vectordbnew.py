@@ -1,130 +1,572 @@
-# vectordbnew.py - Upgraded Vector DB Engine with Hybrid Retrieval & Structured Logging
-import os
-import pandas as pd
-import numpy as np
-import random
-from sentence_transformers import SentenceTransformer
-from sklearn.metrics.pairwise import cosine_similarity
-from dotenv import load_dotenv
-
-load_dotenv()
-
-# --- Configuration ---
-DB_FILE_PATH = "hissab_vector_db.pkl"
-BAD_DB_FILE_PATH = "bad_prompts_db.pkl"
-MODEL_NAME = 'paraphrase-multilingual-MiniLM-L12-v2'
-
-# --- Global Variables ---
-embedding_model = SentenceTransformer(MODEL_NAME)
-hissab_db = None
-bad_prompts_db = None
-category_embeddings = None
-
-# --- Initial Data & Category Descriptions ---
-INITIAL_PROMPTS = [
-    {"category": "personal_expense_tracking", "user_text": "Aaj 30 rupaye bus ke lage, 250 ka khana khaya, aur 500 ki ek shirt kharidi.", "model_response": "Aapke aaj ke kul kharch is prakaar hain:\n- Bus: ₹30\n- Khana: ₹250\n- Shirt: ₹500\n**Kul Kharch: ₹830**"},
-    {"category": "group_settlement", "user_text": "Hum 3 dost, main, Rohit aur Suman, Goa gaye. Maine hotel ke 6000 diye, Rohit ne khaane ke 3000 kharch kiye.", "model_response": "**Trip ka Hisaab:**\n- **Kul Kharch:** ₹9,000\n- **Log:** 3\n- **Prati Vyakti Hissa:** ₹3,000\n**Settlement:**\n- Aapne ₹3,000 extra diye hain.\n- Rohit ne apna hissa de diya hai.\n- **Isliye, Suman ko aapko ₹3,000 dene hain.**"},
-    {"category": "monthly_budget_and_savings", "user_text": "Meri salary 50000 hai. 15000 ghar ka kiraya, 3000 bijli paani, 10000 ration aur 5000 aane jaane mein lag jaata hai. Kitni bachat hoti hai?", "model_response": "**Aapka Maheene ka Hisaab:**\n- **Kul Aamdani (Salary):** ₹50,000\n- **Kul Kharch:** ₹33,000 (₹15000 Kiraya + ₹3000 Bill + ₹10000 Ration + ₹5000 Aana-Jaana)\n- **Isliye, aapki kul bachat ₹17,000 hai.**"},
-    {"category": "price_comparison", "user_text": "Ek dukaan par Samsung ka phone 25000 ka hai aur wahi phone doosri dukaan par 23500 ka mil raha hai. Kaunsa sasta hai?", "model_response": "**Cheezon ki Tulna:**\n- Dusri dukaan wala phone sasta hai.\n- **Dono ke beech ₹1,500 ka antar hai.**"},
-    {"category": "lending_and_borrowing", "user_text": "Maine apne dost Aman ko 2000 rupaye udhaar diye the, usne mujhe 500 lauta diye hain. Ab kitne paise lene baaki hain?", "model_response": "**Udhaari ka Hisaab:**\n- **Kul Udhaar:** ₹2,000\n- **Vaapas Mile:** ₹500\n- **Isliye, aapko Aman se abhi ₹1,500 aur lene hain.**"},
-    {"category": "investment_and_profit", "user_text": "Maine 50,000 rupaye share market mein lagaye the, aur ab unki value 65,000 ho gayi hai. Mujhe kitna munafa hua?", "model_response": "**Nivesh ka Hisaab:**\n- **Aapka Nivesh:** ₹50,000\n- **Abhi ka Value:** ₹65,000\n- **Isliye, aapko kul ₹15,000 ka munafa hua hai.**"},
-    {"category": "loan_and_emi", "user_text": "Mera 2 lakh ka personal loan hai aur har mahine 5000 ki EMI jaati hai. 1 saal mein main kitna chuka dunga?", "model_response": "**Loan ka Hisaab:**\n- **Har Mahine ki EMI:** ₹5,000\n- **Ek Saal (12 Mahine) mein Kul Bhugtaan:** ₹60,000 (5000 x 12)\n- **Isliye, aap ek saal mein ₹60,000 chuka denge.**"},
-    {"category": "income_and_balance", "user_text": "Mere account mein 10000 the, mujhe 25000 salary mili. Uske baad maine 2000 ka bill bhara. Ab kitne bache?", "model_response": "**Account ka Hisaab:**\n- **Shuruaati Balance:** ₹10,000\n- **Salary Aayi:** + ₹25,000\n- **Bill Bhara:** - ₹2,000\n- **Aapka abhi ka balance ₹33,000 hai.**"},
-    {"category": "discount_and_offers", "user_text": "Ek jacket 4000 ki hai aur us par 20% ka discount hai. Mujhe kitne paise dene honge?", "model_response": "**Discount ka Hisaab:**\n- **Jacket ka Daam:** ₹4,000\n- **Discount (20%):** ₹800 (4000 ka 20%)\n- **Isliye, aapko ₹3,200 dene honge.**"},
-    {"category": "salary_calculation", "user_text": "Main din ke 800 rupaye kamata hoon. Is mahine maine 25 din kaam kiya. Meri is mahine ki salary kitni hui?", "model_response": "**Salary ka Hisaab:**\n- **Ek Din ki Kamai:** ₹800\n- **Kul Kaam ke Din:** 25\n- **Isliye, aapki is mahine ki salary ₹20,000 hui (800 x 25).**"},
-    {"category": "income_and_balance", "user_text": "Mere paas 1000 rupay the, maine 300 kharch kar diye, ab kitne bachche hain?", "model_response": "**Account ka Hisaab:**\n- **Shuruaati Balance:** ₹1,000\n- **Kharch:** - ₹300\n- **Aapke paas ab ₹700 bache hain.**"}
-]
-
-CATEGORY_DESCRIPTIONS = {
-    "personal_expense_tracking": "Calculating total daily expenses for one person.",
-    "group_settlement": "Settling shared expenses between multiple friends on a trip or event.",
-    "monthly_budget_and_savings": "Calculating monthly savings based on salary and recurring bills like rent.",
-    "price_comparison": "Comparing the prices of two or more items to find which is cheaper.",
-    "lending_and_borrowing": "Tracking money given or taken as a loan between individuals.",
-    "investment_and_profit": "Calculating profit or loss from investments like stocks.",
-    "loan_and_emi": "Calculating loan repayments and Equated Monthly Installments (EMI).",
-    "income_and_balance": "Calculating the final balance after income and expenses in an account.",
-    "discount_and_offers": "Calculating the final price after applying a percentage discount.",
-    "salary_calculation": "Calculating total salary based on daily or hourly wages.",
-    "unknown": "A general financial query that does not fit other categories."
-}
-
-def _initialize_database():
-    global category_embeddings
-    print("Naya 'Good Prompts' Vector DB banaya ja raha hai...")
-    df = pd.DataFrame(INITIAL_PROMPTS)
-    df['embedding'] = list(embedding_model.encode(df['user_text'].tolist()))
-    df.to_pickle(DB_FILE_PATH)
-    
-    categories = list(CATEGORY_DESCRIPTIONS.keys())
-    descriptions = list(CATEGORY_DESCRIPTIONS.values())
-    cat_embeds = embedding_model.encode(descriptions)
-    category_embeddings = {cat: emb for cat, emb in zip(categories, cat_embeds)}
-    return df
-
-def setup_vector_db():
-    global hissab_db, category_embeddings
-    if os.path.exists(DB_FILE_PATH):
-        hissab_db = pd.read_pickle(DB_FILE_PATH)
-        if category_embeddings is None:
-            categories = list(CATEGORY_DESCRIPTIONS.keys())
-            descriptions = list(CATEGORY_DESCRIPTIONS.values())
-            cat_embeds = embedding_model.encode(descriptions)
-            category_embeddings = {cat: emb for cat, emb in zip(categories, cat_embeds)}
-    else:
-        hissab_db = _initialize_database()
-
-def setup_bad_prompts_db():
-    global bad_prompts_db
-    if os.path.exists(BAD_DB_FILE_PATH):
-        bad_prompts_db = pd.read_pickle(BAD_DB_FILE_PATH)
-    else:
-        print("Naya 'Bad Prompts' DB banaya ja raha hai...")
-        df = pd.DataFrame(columns=['log_data'])
-        df.to_pickle(BAD_DB_FILE_PATH)
-        bad_prompts_db = df
-
-def find_semantic_categories(user_prompt: str, top_k: int = 2) -> list:
-    global category_embeddings
-    if not category_embeddings: return []
-    user_embedding = embedding_model.encode([user_prompt])[0]
-    categories = list(category_embeddings.keys())
-    embeddings = np.array(list(category_embeddings.values()))
-    similarities = cosine_similarity([user_embedding], embeddings)[0]
-    top_indices = np.argsort(similarities)[-top_k:][::-1]
-    return [categories[i] for i in top_indices]
-
-def find_random_examples_from_category(category: str, max_examples: int = 5, min_examples: int = 1) -> list:
-    global hissab_db
-    category_df = hissab_db[hissab_db['category'] == category]
-    if category_df.empty: return []
-    num_samples = min(max_examples, len(category_df))
-    if num_samples < min_examples: return []
-    return category_df.sample(n=num_samples)[['user_text', 'model_response']].to_dict(orient='records')
-
-def add_user_prompt_to_db(hinglish_prompt: str, model_response: str, primary_category: str):
-    global hissab_db
-    print(f"Naya example '{primary_category}' category mein add kiya ja raha hai...")
-    embedding = embedding_model.encode([hinglish_prompt])[0]
-    new_example = pd.DataFrame([{'category': primary_category, 'user_text': hinglish_prompt, 'model_response': model_response, 'embedding': embedding}])
-    hissab_db = pd.concat([hissab_db, new_example], ignore_index=True)
-    hissab_db.to_pickle(DB_FILE_PATH)
-    print("Naya example 'Good DB' mein save ho gaya.")
-
-def add_to_bad_prompts_db(log_data: dict):
-    global bad_prompts_db
-    print("Galti ka structured log 'Bad DB' mein save kiya ja raha hai...")
-    new_log = pd.DataFrame([{'log_data': log_data}])
-    bad_prompts_db = pd.concat([bad_prompts_db, new_log], ignore_index=True)
-    bad_prompts_db.to_pickle(BAD_DB_FILE_PATH)
-    print("'Bad DB' update ho gaya hai.")
-
-def get_all_categories() -> list:
-    return list(CATEGORY_DESCRIPTIONS.keys())
-
-# --- NAYA CHANGE: YEH FUNCTION ADD KIYA GAYA HAI ---
-def is_bad_prompts_db_empty():
-    """Checks if the bad prompts database has any entries."""
-    global bad_prompts_db
-    return bad_prompts_db is None or bad_prompts_db.empty
-
+# vectordbnew.py - Upgraded Vector DB Engine with Hybrid Retrieval & Structured Logging
+import os
+import time
+import threading
+import numpy as np
+import random
+from dotenv import load_dotenv
+
+from storenew import get_store, shard_name
+from cachenew import LRUCache
+from embedcachenew import get_embedding_cache, make_model_key
+from classifiernew import CentroidClassifier
+from responsecachenew import extract_numbers
+from annnew import (GrowableArray, IVFIndex, ANN_INDEX_PATH, ANN_MIN_ROWS, ANN_RETRAIN_GROWTH, exact_top_k,
+                    normalize_rows)
+
+load_dotenv()
+
+# --- Configuration ---
+# Purani pickle files; ab sirf one-time migration ke liye padhi jaati hain (dekhein storenew.py)
+DB_FILE_PATH = "hissab_vector_db.pkl"
+BAD_DB_FILE_PATH = "bad_prompts_db.pkl"
+MODEL_NAME = 'paraphrase-multilingual-MiniLM-L12-v2'
+# "torch" (default), "onnx" (ONNX Runtime, `pip install "sentence-transformers[onnx]"`)
+# ya "int8" (torch dynamic quantization, sirf CPU)
+EMBEDDING_BACKEND = os.getenv("HISSAB_EMBEDDING_BACKEND", "torch")
+QUERY_CACHE_SIZE = int(os.getenv("HISSAB_QUERY_CACHE_SIZE", "4096"))
+# Naya 👍 example apni category ke kisi example se itna (cosine) milta ho aur amounts bhi
+# same hon (extract_numbers) to nayi row nahi banti, us row ka use_count badhta hai.
+# 1 se upar = dedup band.
+DEDUP_THRESHOLD = float(os.getenv("HISSAB_DEDUP_THRESHOLD", "0.97"))
+DEDUP_CANDIDATES = 5  # itni kareeb rows mein same amounts wali row dhoondhi jaati hai
+
+# --- Global Variables ---
+_embedding_model = None  # pehli zaroorat par load hota hai, dekhein get_embedding_model()
+_embedding_model_key = make_model_key(MODEL_NAME, EMBEDDING_BACKEND)
+_embedding_model_lock = threading.Lock()
+hissab_db = None
+bad_prompts_db = None
+category_embeddings = None
+_category_names = []       # category_embeddings ke keys, _category_matrix ki row order mein
+_category_matrix = None    # (num_categories, dim) pre-normalized, find_semantic_categories ke liye
+_query_cache = LRUCache(QUERY_CACHE_SIZE)
+category_classifier = None  # local fast-path classifier, setup_vector_db mein banta hai
+INDEX_REFRESH_SECONDS = 1.0  # doosre processes ki nayi rows itni der mein dikhne lagti hain
+
+# --- Initial Data & Category Descriptions ---
+INITIAL_PROMPTS = [
+    {"category": "personal_expense_tracking", "user_text": "Aaj 30 rupaye bus ke lage, 250 ka khana khaya, aur 500 ki ek shirt kharidi.", "model_response": "Aapke aaj ke kul kharch is prakaar hain:\n- Bus: ₹30\n- Khana: ₹250\n- Shirt: ₹500\n**Kul Kharch: ₹830**"},
+    {"category": "group_settlement", "user_text": "Hum 3 dost, main, Rohit aur Suman, Goa gaye. Maine hotel ke 6000 diye, Rohit ne khaane ke 3000 kharch kiye.", "model_response": "**Trip ka Hisaab:**\n- **Kul Kharch:** ₹9,000\n- **Log:** 3\n- **Prati Vyakti Hissa:** ₹3,000\n**Settlement:**\n- Aapne ₹3,000 extra diye hain.\n- Rohit ne apna hissa de diya hai.\n- **Isliye, Suman ko aapko ₹3,000 dene hain.**"},
+    {"category": "monthly_budget_and_savings", "user_text": "Meri salary 50000 hai. 15000 ghar ka kiraya, 3000 bijli paani, 10000 ration aur 5000 aane jaane mein lag jaata hai. Kitni bachat hoti hai?", "model_response": "**Aapka Maheene ka Hisaab:**\n- **Kul Aamdani (Salary):** ₹50,000\n- **Kul Kharch:** ₹33,000 (₹15000 Kiraya + ₹3000 Bill + ₹10000 Ration + ₹5000 Aana-Jaana)\n- **Isliye, aapki kul bachat ₹17,000 hai.**"},
+    {"category": "price_comparison", "user_text": "Ek dukaan par Samsung ka phone 25000 ka hai aur wahi phone doosri dukaan par 23500 ka mil raha hai. Kaunsa sasta hai?", "model_response": "**Cheezon ki Tulna:**\n- Dusri dukaan wala phone sasta hai.\n- **Dono ke beech ₹1,500 ka antar hai.**"},
+    {"category": "lending_and_borrowing", "user_text": "Maine apne dost Aman ko 2000 rupaye udhaar diye the, usne mujhe 500 lauta diye hain. Ab kitne paise lene baaki hain?", "model_response": "**Udhaari ka Hisaab:**\n- **Kul Udhaar:** ₹2,000\n- **Vaapas Mile:** ₹500\n- **Isliye, aapko Aman se abhi ₹1,500 aur lene hain.**"},
+    {"category": "investment_and_profit", "user_text": "Maine 50,000 rupaye share market mein lagaye the, aur ab unki value 65,000 ho gayi hai. Mujhe kitna munafa hua?", "model_response": "**Nivesh ka Hisaab:**\n- **Aapka Nivesh:** ₹50,000\n- **Abhi ka Value:** ₹65,000\n- **Isliye, aapko kul ₹15,000 ka munafa hua hai.**"},
+    {"category": "loan_and_emi", "user_text": "Mera 2 lakh ka personal loan hai aur har mahine 5000 ki EMI jaati hai. 1 saal mein main kitna chuka dunga?", "model_response": "**Loan ka Hisaab:**\n- **Har Mahine ki EMI:** ₹5,000\n- **Ek Saal (12 Mahine) mein Kul Bhugtaan:** ₹60,000 (5000 x 12)\n- **Isliye, aap ek saal mein ₹60,000 chuka denge.**"},
+    {"category": "income_and_balance", "user_text": "Mere account mein 10000 the, mujhe 25000 salary mili. Uske baad maine 2000 ka bill bhara. Ab kitne bache?", "model_response": "**Account ka Hisaab:**\n- **Shuruaati Balance:** ₹10,000\n- **Salary Aayi:** + ₹25,000\n- **Bill Bhara:** - ₹2,000\n- **Aapka abhi ka balance ₹33,000 hai.**"},
+    {"category": "discount_and_offers", "user_text": "Ek jacket 4000 ki hai aur us par 20% ka discount hai. Mujhe kitne paise dene honge?", "model_response": "**Discount ka Hisaab:**\n- **Jacket ka Daam:** ₹4,000\n- **Discount (20%):** ₹800 (4000 ka 20%)\n- **Isliye, aapko ₹3,200 dene honge.**"},
+    {"category": "salary_calculation", "user_text": "Main din ke 800 rupaye kamata hoon. Is mahine maine 25 din kaam kiya. Meri is mahine ki salary kitni hui?", "model_response": "**Salary ka Hisaab:**\n- **Ek Din ki Kamai:** ₹800\n- **Kul Kaam ke Din:** 25\n- **Isliye, aapki is mahine ki salary ₹20,000 hui (800 x 25).**"},
+    {"category": "income_and_balance", "user_text": "Mere paas 1000 rupay the, maine 300 kharch kar diye, ab kitne bachche hain?", "model_response": "**Account ka Hisaab:**\n- **Shuruaati Balance:** ₹1,000\n- **Kharch:** - ₹300\n- **Aapke paas ab ₹700 bache hain.**"}
+]
+
+CATEGORY_DESCRIPTIONS = {
+    "personal_expense_tracking": "Calculating total daily expenses for one person.",
+    "group_settlement": "Settling shared expenses between multiple friends on a trip or event.",
+    "monthly_budget_and_savings": "Calculating monthly savings based on salary and recurring bills like rent.",
+    "price_comparison": "Comparing the prices of two or more items to find which is cheaper.",
+    "lending_and_borrowing": "Tracking money given or taken as a loan between individuals.",
+    "investment_and_profit": "Calculating profit or loss from investments like stocks.",
+    "loan_and_emi": "Calculating loan repayments and Equated Monthly Installments (EMI).",
+    "income_and_balance": "Calculating the final balance after income and expenses in an account.",
+    "discount_and_offers": "Calculating the final price after applying a percentage discount.",
+    "salary_calculation": "Calculating total salary based on daily or hourly wages.",
+    "unknown": "A general financial query that does not fit other categories."
+}
+
+# --- Embedding Model (lazy, one per process) ---
+def _load_embedding_model(backend: str = EMBEDDING_BACKEND):
+    # Import yahin: torch/sentence-transformers sirf tab load hote hain jab model sach mein chahiye
+    # (injected models, maintenance/batch CLIs aur store-only code ko iski zaroorat nahi)
+    from sentence_transformers import SentenceTransformer
+    started = time.perf_counter()
+    if backend == "onnx":
+        try:
+            model = SentenceTransformer(MODEL_NAME, backend="onnx")
+        except Exception as e:
+            print(f"ONNX backend load nahi hua ({e}), torch par wapas ja rahe hain.")
+            return _load_embedding_model("torch")
+    elif backend == "int8":
+        import torch
+        model = SentenceTransformer(MODEL_NAME, device="cpu")
+        model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    else:
+        model = SentenceTransformer(MODEL_NAME)
+    print(f"Embedding model '{MODEL_NAME}' ({backend}) {time.perf_counter() - started:.2f}s mein load hua.")
+    return model
+
+def get_embedding_model():
+    """Process-wide shared SentenceTransformer; pehli call par hi load hota hai."""
+    global _embedding_model
+    if _embedding_model is None:
+        with _embedding_model_lock:
+            if _embedding_model is None:
+                _embedding_model = _load_embedding_model()
+    return _embedding_model
+
+def set_embedding_model(model, model_key: str = None):
+    """Koi bhi `.encode()` wala model inject karo (benchmarks / offline runs ke liye)."""
+    global _embedding_model, _embedding_model_key
+    with _embedding_model_lock:
+        _embedding_model = model
+        _embedding_model_key = model_key or f"injected:{type(model).__name__}"
+
+def encode_cached(texts: list) -> np.ndarray:
+    """Disk cache ke through encode karo; sirf naye texts model tak jaate hain.
+
+    Category descriptions, seed prompts aur re-embedding jobs isi ko use karein.
+    """
+    return get_embedding_cache().encode(lambda batch: get_embedding_model().encode(batch), _embedding_model_key, texts)
+
+def encode_query(text: str) -> np.ndarray:
+    """Ek query ka embedding, bounded LRU cache ke through ("kitne bache" jaise common queries ke liye)."""
+    key = " ".join(text.split())
+    embedding = _query_cache.get(key)
+    if embedding is None:
+        embedding = np.asarray(get_embedding_model().encode([key])[0], dtype=np.float32)
+        _query_cache.put(key, embedding)
+    return embedding
+
+def encode_queries(texts: list, batch_size: int = 64) -> np.ndarray:
+    """Bahut saari queries ek saath encode karo aur query cache mein daal do (batch mode).
+
+    Baad mein pipeline ka encode_query() inhi texts ke liye cache hit paata hai.
+    """
+    keys = [" ".join(t.split()) for t in texts]
+    missing = list(dict.fromkeys(k for k in keys if _query_cache.get(k) is None))
+    if missing:
+        vectors = np.asarray(get_embedding_model().encode(missing, batch_size=batch_size), dtype=np.float32)
+        for key, vector in zip(missing, vectors):
+            _query_cache.put(key, vector)
+    return np.vstack([encode_query(k) for k in keys]) if keys else np.zeros((0, 0), dtype=np.float32)
+
+def query_cache_stats() -> dict:
+    return _query_cache.stats()
+
+def _load_category_embeddings():
+    global category_embeddings, _category_names, _category_matrix
+    categories = list(CATEGORY_DESCRIPTIONS.keys())
+    cat_embeds = encode_cached(list(CATEGORY_DESCRIPTIONS.values()))
+    category_embeddings = {cat: emb for cat, emb in zip(categories, cat_embeds)}
+    _category_names = categories
+    _category_matrix = normalize_rows(cat_embeds)
+
+def __getattr__(name):
+    # Purane `vectordbnew.embedding_model` imports ke liye lazy attribute
+    if name == "embedding_model":
+        return get_embedding_model()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+# --- In-memory index over the store ---
+def _shard_ann_path(category: str) -> str:
+    base, ext = os.path.splitext(ANN_INDEX_PATH)
+    return f"{base}.{shard_name(category)}{ext}"
+
+
+class CategoryShard:
+    """Ek category ke good examples: shard ki memmap embeddings, norms aur (bade shard par) apna IVF index.
+
+    Shard pehli zaroorat par load hota hai; compaction ke baad sirf wahi shard dobara load hota hai
+    aur ANN bhi sirf isi shard ke rows par train hota hai.
+    """
+
+    def __init__(self, store, category: str, size_hint: int = 0):
+        self.store = store
+        self.category = category
+        self.loaded = False
+        self.generation = None
+        self.ann = None
+        self.ann_building = False
+        self._size_hint = size_hint  # load hone se pehle len() ke liye
+        self._lock = threading.RLock()
+        self._embeddings = np.zeros((0, 0), dtype=np.float32)
+        self._rows = GrowableArray(np.int64)
+        self._live = GrowableArray(np.bool_, fill=False)    # emb_row -> index mein live hai?
+        self._inv_norms = GrowableArray(np.float32)          # emb_row -> 1/||embedding||
+        self._num_rows = 0
+
+    def ensure_loaded(self) -> "CategoryShard":
+        if not self.loaded:
+            with self._lock:
+                if not self.loaded:
+                    self.load()
+        return self
+
+    def load(self):
+        """Shard ko store se (dobara) padho, jaise compaction ke baad."""
+        with self._lock:
+            self.generation = self.store.shard_generation(self.category)
+            self._embeddings = self.store.embedding_matrix(self.category)
+            self._num_rows = len(self._embeddings)
+            rows = self.store.shard_row_ids(self.category)
+            self._rows = GrowableArray(np.int64, rows)
+            self._live = GrowableArray(np.bool_, fill=False)
+            self._live.set_at(rows, True, fill=False)
+            self._inv_norms = GrowableArray(np.float32)
+            self._extend_norms(self._num_rows)
+            self.ann = IVFIndex.load(_shard_ann_path(self.category), generation=self.generation,
+                                     dim=self._embeddings.shape[1] if self._num_rows else None)
+            if self.ann is not None:
+                known = self.ann.assign.size
+                if known < self._num_rows:
+                    self.ann.add_all(self._embeddings, start=known)
+            self.loaded = True
+        self._maybe_build_ann()
+
+    def _extend_norms(self, upto: int):
+        start = self._inv_norms.size
+        for begin in range(start, upto, 65536):
+            norms = np.linalg.norm(self._embeddings[begin:min(begin + 65536, upto)], axis=1)
+            norms[norms == 0] = 1.0
+            self._inv_norms.extend(1.0 / norms)
+
+    def add(self, emb_rows: np.ndarray) -> np.ndarray:
+        """Nayi committed rows jodo aur unke vectors lautao; unloaded shard sirf size hint badhata hai."""
+        with self._lock:
+            if not self.loaded:
+                self._size_hint += len(emb_rows)
+                return np.asarray(self.store.embedding_matrix(self.category)[emb_rows])
+            # Reload ke turant baad wahi rows refresh se dobara aa sakti hain
+            known = emb_rows < self._live.size
+            known[known] = self._live.view()[emb_rows[known]]
+            emb_rows = emb_rows[~known]
+            self._num_rows = max(self._num_rows, int(emb_rows.max()) + 1) if len(emb_rows) else self._num_rows
+            matrix = self.embeddings
+            vectors = np.asarray(matrix[emb_rows])
+            if len(emb_rows):
+                self._rows.extend(emb_rows)
+                self._live.set_at(emb_rows, True, fill=False)
+                self._extend_norms(self._num_rows)
+                if self.ann is not None:
+                    self.ann.add(emb_rows, vectors)
+        self._maybe_build_ann()
+        return vectors
+
+    # --- ANN maintenance ---
+    def _maybe_build_ann(self):
+        """Shard bada hone par uska IVF index background thread mein (dobara) train karo."""
+        with self._lock:
+            if self.ann_building or not self.loaded or self._num_rows < ANN_MIN_ROWS:
+                return
+            if self.ann is not None and self._num_rows < self.ann.trained_rows * ANN_RETRAIN_GROWTH:
+                return
+            self.ann_building = True
+        threading.Thread(target=self.rebuild_ann, daemon=True).start()
+
+    def rebuild_ann(self):
+        """Naye clusters train karke index swap karo; beech mein aayi rows bhi jodi jaati hain."""
+        try:
+            with self._lock:
+                matrix, generation = self.embeddings, self.generation
+            print(f"ANN index ban raha hai: '{self.category}' ({len(matrix)} rows)...")
+            new_index = IVFIndex.train(matrix)
+            new_index.add_all(matrix)
+            with self._lock:
+                if generation != self.generation:
+                    return  # beech mein compaction ho gaya; reload dobara banayega
+                if self._num_rows > len(matrix):
+                    new_index.add_all(self.embeddings, start=len(matrix))
+                self.ann = new_index
+            new_index.save(_shard_ann_path(self.category), generation=generation)
+            print(f"ANN index ready: '{self.category}', {new_index.nlist} lists.")
+        finally:
+            self.ann_building = False
+
+    # --- Reads ---
+    @property
+    def embeddings(self) -> np.ndarray:
+        """(rows, dim) float32 memmap; nayi rows aane par dobara map hota hai."""
+        with self._lock:
+            if self._num_rows > len(self._embeddings):
+                self._embeddings = self.store.embedding_matrix(self.category)
+            return self._embeddings
+
+    @property
+    def rows(self) -> np.ndarray:
+        self.ensure_loaded()
+        return self._rows.view()
+
+    def search(self, query: np.ndarray, k: int):
+        """Normalized query ke top-k (emb_rows, scores); bade shard par IVF candidates, warna exact."""
+        self.ensure_loaded()
+        with self._lock:
+            matrix, inv_norms, ann = self.embeddings, self._inv_norms.view(), self.ann
+            rows, live = self._rows.view(), self._live.view()
+        if ann is not None:
+            rows = ann.candidates(query)
+            rows = rows[rows < len(live)]
+            rows = rows[live[rows]]
+        return exact_top_k(matrix, inv_norms, query, rows, k)
+
+    def __len__(self) -> int:
+        return self._rows.size if self.loaded else self._size_hint
+
+
+class ExampleIndex:
+    """Good examples ka view, har category ka alag CategoryShard.
+
+    Row id = shard ke andar store ka emb_row. Shards alag-alag load, search aur
+    rebuild hote hain; text sirf zaroorat padne par (sampled rows ke liye) store
+    se padha jaata hai.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self._lock = threading.RLock()
+        self._shards = {}
+        self._last_id = 0
+        self._last_refresh = 0.0
+        self._listeners = []
+        store.add_flush_listener(self._on_rows_added)
+        self._reload()
+
+    def _reload(self):
+        with self._lock:
+            self._last_id = self.store.max_good_id()
+            self._shards = {category: CategoryShard(self.store, category, size)
+                            for category, size in self.store.category_counts().items()}
+        self._last_refresh = time.monotonic()
+
+    def add_listener(self, callback):
+        """callback(emb_rows, categories, vectors) har nayi row (kisi bhi process se) ke baad chalta hai."""
+        self._listeners.append(callback)
+
+    def _on_rows_added(self, rows):
+        with self._lock:
+            if rows and min(row[0] for row in rows) > self._last_id + 1:
+                # Beech ki ids kisi aur process ki ho sakti hain; local rows se high-water
+                # mark aage badhne se pehle woh bhi le lo, warna refresh unhe kabhi nahi dekhega
+                rows = self.store.good_rows_since(self._last_id)
+            by_category = {}
+            for row_id, category, emb_row in rows:
+                if row_id <= self._last_id:
+                    continue
+                by_category.setdefault(category, []).append(emb_row)
+                self._last_id = row_id
+            shards = {category: self._shards.setdefault(category, CategoryShard(self.store, category))
+                      for category in by_category}
+        for category, emb_rows in by_category.items():
+            emb_rows = np.asarray(emb_rows, dtype=np.int64)
+            vectors = shards[category].add(emb_rows)
+            for listener in self._listeners:
+                listener(emb_rows, [category] * len(emb_rows), vectors)
+
+    def refresh(self, force: bool = False):
+        """Doosre processes ke inserts aur shard compactions ke baad sync karo (throttled).
+
+        Sirf woh loaded shards dobara padhe jaate hain jinki generation badli hai.
+        """
+        now = time.monotonic()
+        if not force and now - self._last_refresh < INDEX_REFRESH_SECONDS:
+            return
+        self._last_refresh = now
+        generations = self.store.shard_generations()
+        for category, shard in list(self._shards.items()):
+            if shard.loaded and shard.generation != generations.get(category, 0):
+                shard.load()
+        new_rows = self.store.good_rows_since(self._last_id)
+        if new_rows:
+            self._on_rows_added(new_rows)
+
+    # --- Reads ---
+    def shard(self, category: str) -> CategoryShard:
+        """Loaded shard, ya None agar category mein koi example nahi."""
+        self.refresh()
+        shard = self._shards.get(category)
+        return shard.ensure_loaded() if shard is not None else None
+
+    def shards(self) -> list:
+        return [shard.ensure_loaded() for shard in list(self._shards.values())]
+
+    @property
+    def ann_building(self) -> bool:
+        return any(shard.ann_building for shard in list(self._shards.values()))
+
+    def rows_for_category(self, category: str) -> np.ndarray:
+        shard = self.shard(category)
+        return shard.rows if shard is not None else np.empty(0, dtype=np.int64)
+
+    def search(self, query_embedding, categories: list = None, k: int = 5):
+        """Query ke sabse similar rows (cosine): [(emb_row, category, score), ...], best pehle.
+
+        Har shard apna top-k deta hai (chhote shard par exact, bade par IVF ANN);
+        results score se merge hote hain.
+        """
+        self.refresh()
+        query = normalize_rows(np.asarray(query_embedding, dtype=np.float32))
+        with self._lock:
+            if categories is None:
+                categories = list(self._shards.keys())
+            shards = [self._shards[c] for c in categories if c in self._shards]
+        matches = []
+        for shard in shards:
+            rows, scores = shard.search(query, k)
+            matches.extend((int(r), shard.category, float(s)) for r, s in zip(rows, scores))
+        matches.sort(key=lambda match: -match[2])
+        return matches[:k]
+
+    def find_duplicate(self, category: str, embedding, threshold: float, accept=None):
+        """Category shard ki sabse kareeb row jiska cosine >= threshold: (emb_row, generation, score), warna None.
+
+        accept(emb_row) False de (jaise amounts alag hon) to threshold ke andar agli kareeb row dekhi jaati hai.
+        """
+        shard = self.shard(category)
+        if shard is None or threshold > 1.0:
+            return None
+        generation = shard.generation
+        rows, scores = shard.search(normalize_rows(np.asarray(embedding, dtype=np.float32)), DEDUP_CANDIDATES)
+        for row, score in zip(rows, scores):
+            if score < threshold:
+                break
+            if accept is None or accept(int(row)):
+                return int(row), generation, float(score)
+        return None
+
+    def categories(self) -> list:
+        return list(self._shards.keys())
+
+    def __len__(self) -> int:
+        return sum(len(shard) for shard in list(self._shards.values()))
+
+    @property
+    def empty(self) -> bool:
+        return len(self) == 0
+
+
+def _initialize_database():
+    print("Naya 'Good Prompts' Vector DB banaya ja raha hai...")
+    store = get_store()
+    embeddings = encode_cached([p['user_text'] for p in INITIAL_PROMPTS])
+    for prompt, embedding in zip(INITIAL_PROMPTS, embeddings):
+        store.append_good(prompt['category'], prompt['user_text'], prompt['model_response'], embedding)
+    store.flush()
+    _load_category_embeddings()
+    return ExampleIndex(store)
+
+def setup_vector_db():
+    global hissab_db
+    store = get_store()
+    store.migrate_from_pickles(DB_FILE_PATH, BAD_DB_FILE_PATH)
+    # Isi model + backend ke purane EMBED_CACHE_VERSION wale vectors ab kaam ke nahi
+    if not _embedding_model_key.startswith("injected:"):
+        get_embedding_cache().prune(_embedding_model_key)
+    if store.count_good() > 0:
+        hissab_db = ExampleIndex(store)
+        if category_embeddings is None:
+            _load_category_embeddings()
+    else:
+        hissab_db = _initialize_database()
+    _setup_classifier()
+
+def _setup_classifier():
+    global category_classifier
+    category_classifier = CentroidClassifier.from_store(category_embeddings, hissab_db.store)
+    # Har naye good example (is ya kisi aur process se) par centroid incremental update
+    hissab_db.add_listener(lambda rows, categories, vectors: category_classifier.partial_fit(vectors, categories))
+
+def classify_locally(text: str, query_embedding=None):
+    """Local classifier ka result: (category, confident). Classifier na ho to (None, False)."""
+    if category_classifier is None: return None, False
+    if query_embedding is None:
+        query_embedding = encode_query(text)
+    category, score, margin = category_classifier.predict(query_embedding)
+    return category, category_classifier.is_confident(category, score, margin)
+
+def setup_bad_prompts_db():
+    global bad_prompts_db
+    store = get_store()
+    store.migrate_from_pickles(DB_FILE_PATH, BAD_DB_FILE_PATH)
+    # Bad logs sirf disk par rehte hain; memory mein poora frame rakhne ki zaroorat nahi
+    bad_prompts_db = store
+
+def find_semantic_categories(user_prompt: str, top_k: int = 2, query_embedding=None) -> list:
+    if _category_matrix is None: return []
+    if query_embedding is None:
+        query_embedding = encode_query(user_prompt)
+    similarities = _category_matrix @ normalize_rows(query_embedding)
+    top_indices = np.argsort(similarities)[-top_k:][::-1]
+    return [_category_names[i] for i in top_indices]
+
+def find_random_examples_from_category(category: str, max_examples: int = 5, min_examples: int = 1) -> list:
+    global hissab_db
+    rows = hissab_db.rows_for_category(category)
+    if len(rows) == 0: return []
+    num_samples = min(max_examples, len(rows))
+    if num_samples < min_examples: return []
+    sampled = np.random.choice(rows, size=num_samples, replace=False)
+    return get_store().get_examples(category, sampled)
+
+def find_similar_examples(user_prompt: str, categories: list, max_examples: int = 5, query_embedding=None) -> dict:
+    """Query ke sabse similar stored examples, category ke hisaab se grouped.
+
+    Har category se top `max_examples` examples (cosine similarity), score ke saath.
+    """
+    if hissab_db is None or hissab_db.empty or not categories: return {}
+    if query_embedding is None:
+        query_embedding = encode_query(user_prompt)
+    store = get_store()
+    examples_by_category = {}
+    for category in categories:
+        matches = hissab_db.search(query_embedding, [category], k=max_examples)
+        if not matches: continue
+        examples = store.get_examples(category, [row for row, _, _ in matches])
+        for example, (_, _, score) in zip(examples, matches):
+            example['score'] = score
+        examples_by_category[category] = examples
+    return examples_by_category
+
+def find_approved_answers(query_embedding, numbers: tuple, k: int = 3) -> list:
+    """👍-approved examples jo query ke sabse kareeb hain aur jinke numbers bilkul same hain.
+
+    [(model_response, score), ...], best pehle; answer cache inhe Gemini se pehle dekhta hai.
+    """
+    if hissab_db is None or hissab_db.empty: return []
+    store = get_store()
+    answers = []
+    for row, category, score in hissab_db.search(query_embedding, None, k=k):
+        for example in store.get_examples(category, [row]):
+            if extract_numbers(example['user_text']) == numbers:
+                answers.append((example['model_response'], score))
+    return answers
+
+def add_user_prompt_to_db(hinglish_prompt: str, model_response: str, primary_category: str, embedding=None,
+                          dedup_threshold: float = DEDUP_THRESHOLD) -> bool:
+    """👍 example save karo. Near-duplicate (same amounts, same order) ho to maujooda row ka use_count
+    badhta hai aur False milta hai; amounts alag hon to naya jawab alag row banta hai."""
+    print(f"Naya example '{primary_category}' category mein add kiya ja raha hai...")
+    # Pipeline ka query embedding mil gaya to dobara encode nahi karna padta
+    if embedding is None:
+        embedding = encode_query(hinglish_prompt)
+    store = get_store()
+    numbers = extract_numbers(hinglish_prompt)
+
+    def same_numbers(emb_row: int) -> bool:
+        return [extract_numbers(e['user_text']) for e in store.get_examples(primary_category, [emb_row])] == [numbers]
+
+    duplicate = hissab_db.find_duplicate(primary_category, embedding, dedup_threshold, accept=same_numbers) \
+        if hissab_db is not None else None
+    if duplicate is not None:
+        emb_row, generation, score = duplicate
+        if store.record_use(primary_category, emb_row, generation):
+            print(f"Example pehle se maujood hai (similarity {score:.3f}); uska use_count badhaya gaya.")
+            return False
+    # Disk par sirf ek row append hoti hai (batched flush); flush ke baad
+    # ExampleIndex ka category shard listener ke through apne aap update hota hai
+    store.append_good(primary_category, hinglish_prompt, model_response, embedding)
+    print("Naya example 'Good DB' mein save ho gaya.")
+    return True
+
+def add_to_bad_prompts_db(log_data: dict):
+    global bad_prompts_db
+    print("Galti ka structured log 'Bad DB' mein save kiya ja raha hai...")
+    get_store().append_bad(log_data)
+    print("'Bad DB' update ho gaya hai.")
+
+def get_all_categories() -> list:
+    return list(CATEGORY_DESCRIPTIONS.keys())
+
+# --- NAYA CHANGE: YEH FUNCTION ADD KIYA GAYA HAI ---
+def is_bad_prompts_db_empty():
+    """Checks if the bad prompts database has any entries."""
+    global bad_prompts_db
+    return bad_prompts_db is None or bad_prompts_db.count_bad() == 0
+